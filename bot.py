@@ -8,10 +8,36 @@ from discord.ext.commands import Bot
 from pombot import commands
 from pombot import handlers
 from pombot.config import Config, Pomwars, Secrets
+from pombot.lib.storage import Storage
 from pombot.lib.tiny_tools import BotCommand
+from pombot.state import State
 
 _log = logging.getLogger(__name__)
-bot = Bot(command_prefix=Config.PREFIX, case_insensitive=True)
+
+
+class PomBot(Bot):
+    """Discord bot which releases its resources on shutdown."""
+    async def close(self):
+        """Log out of Discord, then drain the storage connection pool so
+        that in-flight queries are allowed to finish.
+        """
+        if State.scoreboard is not None:
+            State.scoreboard.stop()
+
+        if State.story_watcher is not None:
+            State.story_watcher.cancel()
+
+        if State.user_directory_watcher is not None:
+            State.user_directory_watcher.cancel()
+
+        if State.event_scheduler is not None:
+            State.event_scheduler.stop()
+
+        await super().close()
+        await Storage.close_connection_pool()
+
+
+bot = PomBot(command_prefix=Config.PREFIX, case_insensitive=True)
 
 
 @bot.event
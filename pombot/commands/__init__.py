@@ -1,4 +1,5 @@
 from pombot.commands.ambiguous_command import *
+from pombot.commands.backfill_totals import *
 from pombot.commands.bank import *
 from pombot.commands.create_event import *
 from pombot.commands.events import *
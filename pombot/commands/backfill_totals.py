@@ -0,0 +1,16 @@
+from discord.ext.commands import Context
+
+from pombot.config import Reactions
+from pombot.lib.storage import Storage
+
+
+async def do_backfill_totals(ctx: Context):
+    """Rebuild the daily pom counts used by !total from every pom.
+
+    Daily pom counts are kept current as poms are added and removed, so this
+    is only needed after poms are changed outside of the bot.
+    """
+    num_poms = await Storage.backfill_daily_pom_counts()
+
+    await ctx.reply(f"Daily pom counts rebuilt from {num_poms:,} poms.")
+    await ctx.message.add_reaction(Reactions.CHECKMARK)
@@ -4,8 +4,6 @@ import pombot.lib.errors
 from pombot.config import Config, Reactions
 from pombot.lib.messages import send_embed_message
 from pombot.lib.storage import Storage
-from pombot.lib.types import DateRange
-from pombot.state import State
 
 
 async def do_pom(ctx: Context, *description):
@@ -48,9 +46,6 @@ async def do_pom(ctx: Context, *description):
     await Storage.add_poms_to_user_session(ctx.author, description, count)
     await ctx.message.add_reaction(Reactions.TOMATO)
 
-    if State.goal_reached:
-        return
-
     try:
         ongoing_event, *other_ongoing_events = await Storage.get_ongoing_events()
     except ValueError:
@@ -61,12 +56,11 @@ async def do_pom(ctx: Context, *description):
         msg = "Only one ongoing event supported."
         raise pombot.lib.errors.TooManyEventsError(msg)
 
-    current_poms_for_event = await Storage.get_poms(date_range=DateRange(
-        ongoing_event.start_date, ongoing_event.end_date))
-
-    if len(current_poms_for_event) >= ongoing_event.pom_goal:
-        State.goal_reached = True
+    if ongoing_event.goal_reached or ongoing_event.pom_count < ongoing_event.pom_goal:
+        return
 
+    # Only the !pom which marks the goal reached announces it.
+    if await Storage.mark_event_goal_reached(ongoing_event):
         await send_embed_message(
             ctx,
             title=ongoing_event.event_name,
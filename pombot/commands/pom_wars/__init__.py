@@ -2,3 +2,4 @@ from pombot.commands.pom_wars.actions import *
 from pombot.commands.pom_wars.attack import *
 from pombot.commands.pom_wars.bribe import *
 from pombot.commands.pom_wars.defend import *
+from pombot.commands.pom_wars.reload_stories import *
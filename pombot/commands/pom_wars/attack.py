@@ -9,9 +9,10 @@ from pombot.config import Debug, Pomwars, Reactions
 from pombot.data.pom_wars.actions import Attacks
 from pombot.lib.errors import DescriptionTooLongError
 from pombot.lib.messages import send_embed_message
+from pombot.lib.pom_wars.active_defends import ActiveDefends
 from pombot.lib.pom_wars.action_chances import is_action_successful
 from pombot.lib.pom_wars.common import (check_user_add_pom, get_average_poms,
-                                        get_user_team)
+                                        get_user_team, load_action_context)
 from pombot.lib.pom_wars.types import Outcome
 from pombot.lib.storage import Storage
 from pombot.lib.types import ActionType
@@ -24,8 +25,10 @@ async def do_attack(ctx: Context, *args):
     heavy_attack = bool(args) and args[0].casefold() in Pomwars.HEAVY_QUALIFIERS
     description = " ".join(args[1:] if heavy_attack else args)
 
+    context = await load_action_context(ctx.author, timestamp)
+
     try:
-        _ = await check_user_add_pom(ctx, description, timestamp)
+        _ = await check_user_add_pom(ctx, description, context)
     except (war_crimes.UserDoesNotExistError, DescriptionTooLongError):
         return
 
@@ -45,11 +48,12 @@ async def do_attack(ctx: Context, *args):
     get_random_attack = partial(Attacks.get_random, **dict(
         timestamp=timestamp,
         team=team,
-        average_daily_actions=await get_average_poms(ctx.author, timestamp),
+        average_daily_actions=get_average_poms(context),
         heavy=heavy_attack,
+        enemy_defence=ActiveDefends.get_defence((~team).value, timestamp),
     ))
 
-    if await is_action_successful(ctx.author, timestamp, heavy_attack):
+    if is_action_successful(context, heavy_attack):
         action["was_successful"] = True
         await ctx.message.add_reaction(Reactions.BOOM)
 
@@ -57,7 +61,7 @@ async def do_attack(ctx: Context, *args):
         attack = get_random_attack(outcome=Outcome.CRITICAL if
                                    action["was_critical"] else Outcome.REGULAR)
 
-        action["damage"] = await attack.damage
+        action["damage"] = attack.damage
     else:
         attack = get_random_attack(outcome=Outcome.MISSED)
 
@@ -66,13 +70,13 @@ async def do_attack(ctx: Context, *args):
     await send_embed_message(
         None,
         title=attack.title,
-        description=await attack.message,
+        description=attack.message,
         icon_url=None,
         colour=attack.colour,
         _func=ctx.reply,
     )
 
-    await State.scoreboard.update()
+    State.scoreboard.request_update()
 
     if Debug.POMWARS_ACTIONS_ALWAYS_SUCCEED:
         print(f"!attack took: {datetime.now() - timestamp}")
@@ -7,9 +7,10 @@ from pombot.config import Debug, Reactions
 from pombot.data.pom_wars.actions import Defends
 from pombot.lib.errors import DescriptionTooLongError
 from pombot.lib.messages import send_embed_message
+from pombot.lib.pom_wars.active_defends import ActiveDefends
 from pombot.lib.pom_wars.action_chances import is_action_successful
 from pombot.lib.pom_wars.common import (check_user_add_pom, get_average_poms,
-                                        get_user_team)
+                                        get_user_team, load_action_context)
 from pombot.lib.pom_wars.types import Outcome
 from pombot.lib.storage import Storage
 from pombot.lib.types import ActionType
@@ -20,8 +21,10 @@ async def do_defend(ctx: Context, *args):
     description = " ".join(args)
     timestamp = datetime.now()
 
+    context = await load_action_context(ctx.author, timestamp)
+
     try:
-        defender = await check_user_add_pom(ctx, description, timestamp)
+        defender = await check_user_add_pom(ctx, description, context)
     except (war_crimes.UserDoesNotExistError, DescriptionTooLongError):
         return
 
@@ -38,7 +41,7 @@ async def do_defend(ctx: Context, *args):
         "time_set":       timestamp,
     }
 
-    action["was_successful"] = await is_action_successful(ctx.author, timestamp)
+    action["was_successful"] = is_action_successful(context)
 
     if action["was_successful"]:
         await ctx.message.add_reaction(Reactions.SHIELD)
@@ -47,11 +50,14 @@ async def do_defend(ctx: Context, *args):
         user=defender,
         team=team,
         outcome=Outcome.REGULAR if action["was_successful"] else Outcome.MISSED,
-        average_daily_actions=await get_average_poms(ctx.author, timestamp),
+        average_daily_actions=get_average_poms(context),
     )
 
     await Storage.add_pom_war_action(**action)
 
+    if action["was_successful"]:
+        ActiveDefends.add(team.value, ctx.author.id, defender.defend_level, timestamp)
+
     await send_embed_message(
         None,
         title=defend.title,
@@ -0,0 +1,24 @@
+from discord.ext.commands import Context
+from lxml import etree
+
+from pombot.config import Reactions
+from pombot.data.pom_wars.actions import reload_stories
+
+
+async def do_reload_stories(ctx: Context):
+    """Reload the Pom Wars action stories after their XMLs were edited.
+
+    The current stories stay in use when any XML is invalid.
+
+    This is an admin-only command.
+    """
+    try:
+        stories = await reload_stories()
+    except (etree.LxmlError, OSError) as exc:
+        await ctx.message.add_reaction(Reactions.WARNING)
+        await ctx.reply(f"Stories were not reloaded:\n```text\n{exc}\n```")
+        return
+
+    await ctx.message.add_reaction(Reactions.CHECKMARK)
+    await ctx.reply("Reloaded {} stories.".format(
+        sum(len(group) for group in stories.values())))
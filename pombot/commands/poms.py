@@ -15,7 +15,7 @@ from pombot.lib.messages import EmbedField, send_embed_message
 from pombot.lib.rename_poms import rename_poms
 from pombot.lib.storage import Storage
 from pombot.lib.tiny_tools import normalize_and_dedent
-from pombot.lib.types import Pom, SessionType
+from pombot.lib.types import PomSummary, SessionType
 
 ZERO_WIDTH_SPACE = "\u200b"
 LIGHT_HORIZONTAL = "\u2500"
@@ -79,7 +79,7 @@ async def do_poms(ctx: Context, *args):
         return
 
     description = " ".join(args)
-    poms = await Storage.get_poms(user=ctx.author, descript=description)
+    summary = await Storage.get_pom_summary(ctx.author, description)
 
     response_is_public = ctx.invoked_with in Config.PUBLIC_POMS_ALIASES
 
@@ -89,12 +89,12 @@ async def do_poms(ctx: Context, *args):
 
     banked_session = session(
         session_type=SessionType.BANKED,
-        poms=[p for p in poms if not p.is_current_session()],
+        summary=[s for s in summary if not s.is_current_session()],
     )
 
     current_session = session(
         session_type=SessionType.CURRENT,
-        poms=[p for p in poms if p.is_current_session()],
+        summary=[s for s in summary if s.is_current_session()],
     )
 
     if response_is_public:
@@ -119,7 +119,8 @@ async def do_poms(ctx: Context, *args):
     if description:
         footer = "Total time spent on {description}: {duration}".format(
             description=description,
-            duration=_dynamic_duration(len(poms) * Config.POM_LENGTH))
+            duration=_dynamic_duration(
+                len(banked_session + current_session) * Config.POM_LENGTH))
     else:
         footer = "\n".join([
             "Total time spent pomming: {}".format(
@@ -254,23 +255,24 @@ class _Session:
     There are effectively two different durations of sessions according to
     the `poms` table: those that are in the current session and those that
     are not. This class builds and returns messages for either given a type
-    and an iterator.
+    and the summary of its poms, so that its size depends on the number of
+    descriptions rather than the number of poms.
     """
     def __init__(
         self,
         *,
         session_type: SessionType,
-        poms: List[Pom],
+        summary: List[PomSummary],
         description: str,
         public_response: bool,
     ):
         self.type = session_type
-        self.poms = sorted(poms)
+        self.summary = summary
         self.desc = description
         self.is_public = public_response
 
     def __len__(self):
-        return len(self.poms)
+        return sum(s.count for s in self.summary)
 
     def __add__(self, other):
         if not isinstance(other, self.__class__):
@@ -278,14 +280,14 @@ class _Session:
 
         return self.__class__(
             session_type=SessionType.COMBINED,
-            poms=self.poms + other.poms,
+            summary=self.summary + other.summary,
             description=self.desc,
             public_response=self.is_public,
         )
 
     def get_message_field(self) -> EmbedField:
         """Get the stats of this session as an EmbedField."""
-        pom_counts = Counter(pom.descript for pom in self.poms)
+        pom_counts = self._get_pom_counts()
 
         designated_poms = [f"{k}: *{v:,}*" for k, v in pom_counts.most_common() if k is not None]
         num_undesignated_poms = pom_counts.get(None) or 0
@@ -321,7 +323,7 @@ class _Session:
                     *designated_lines,
                     f"*Undesignated*: *{num_undesignated_poms}*",
                     TOTALS_SEPARATOR,
-                    f"Total: *{len(self.poms)}*\n",
+                    f"Total: *{len(self)}*\n",
                 ]
 
         return EmbedField(
@@ -329,10 +331,21 @@ class _Session:
             value="\n".join(detail_lines)
         )
 
+    def _get_pom_counts(self) -> Counter:
+        """Return the number of poms of each description, in order of each
+        description's first pom.
+        """
+        pom_counts = Counter()
+
+        for summary in self.summary:
+            pom_counts[summary.descript] += summary.count
+
+        return pom_counts
+
     def get_duration_message(self) -> str:
         """Return the time spent pomming this session as a dynamic string."""
         return "Time pommed this session: {}".format(
-            _dynamic_duration(len(self.poms) * Config.POM_LENGTH))
+            _dynamic_duration(len(self) * Config.POM_LENGTH))
 
     def get_session_started_message(self) -> Optional[str]:
         """Return a user-facing timestamp of when this session started, or
@@ -341,18 +354,19 @@ class _Session:
         if self.is_public:
             return None
 
-        if not self.poms:
+        if not self.summary:
             return "*Session not yet started.*"
 
         return "Current session started {}".format(
-            self.poms[0].time_set.strftime("%B %d, %Y (%H:%M UTC)"))
+            min(s.first_time_set for s in self.summary).strftime("%B %d, %Y (%H:%M UTC)"))
 
     def iter_message_field(self, max_length: int) -> Iterator[str]:
         """Generate the list of poms in the field as a plain string of at most
         `max_length` characters.
         """
         code_block_join = lambda s, n="\n": f"```{n.join(s)}```"
-        pom_counts = Counter(pom.descript for pom in self.poms if pom.descript is not None)
+        pom_counts = self._get_pom_counts()
+        del pom_counts[None]
         descripts_and_counts: List[str] = []
 
         for descript in sorted(pom_counts, key=str.casefold):
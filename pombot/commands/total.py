@@ -30,10 +30,10 @@ async def do_total(ctx: Context, *args):
             await ctx.message.add_reaction(Reactions.ROBOT)
             return
 
-        poms = await Storage.get_poms(date_range=date_range)
-        msg = f"Total amount of poms in range {date_range}: {len(poms)}"
+        num_poms = await Storage.count_poms(date_range)
+        msg = f"Total amount of poms in range {date_range}: {num_poms}"
     else:
-        poms = await Storage.get_poms()
-        msg = f"Total amount of poms since ever: {len(poms)}"
+        num_poms = await Storage.count_poms()
+        msg = f"Total amount of poms since ever: {num_poms}"
 
     await ctx.reply(msg)
@@ -48,6 +48,32 @@ class Config:
     EVENTS_TABLE = "events"
     USERS_TABLE = "users"
     ACTIONS_TABLE = "actions"
+    TEAM_STATS_TABLE = "team_stats"
+    USER_DAILY_ACTIONS_TABLE = "user_daily_actions"
+    USER_STREAKS_TABLE = "user_streaks"
+    DAILY_POM_COUNTS_TABLE = "daily_pom_counts"
+    SCHEMA_VERSION_TABLE = "schema_version"
+
+    # MySQL connection pool
+    MYSQL_POOL_MIN_SIZE = int(os.getenv("MYSQL_POOL_MIN_SIZE", "1"))
+    MYSQL_POOL_MAX_SIZE = int(os.getenv("MYSQL_POOL_MAX_SIZE", "10"))
+    MYSQL_POOL_RECYCLE_SECONDS = int(os.getenv("MYSQL_POOL_RECYCLE_SECONDS", "3600"))
+    MYSQL_POOL_IDLE_PING_SECONDS = int(os.getenv("MYSQL_POOL_IDLE_PING_SECONDS", "60"))
+
+    # Storage backend: "mysql", "sqlite" or "memory". Unit tests use
+    # TEST_STORAGE_BACKEND instead, so they need no database server.
+    LIVE_STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mysql").strip().lower()
+    TEST_STORAGE_BACKEND = os.getenv("TEST_STORAGE_BACKEND", "memory").strip().lower()
+    LIVE_SQLITE_DATABASE = os.getenv("SQLITE_DATABASE", "pombot.sqlite3")
+    TEST_SQLITE_DATABASE = os.getenv("TEST_SQLITE_DATABASE", ":memory:")
+
+    # Caches
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+    USER_DIRECTORY_POLL_SECONDS = float(os.getenv("USER_DIRECTORY_POLL_SECONDS", "0"))
+
+    # Group commit
+    WRITE_BATCH_DELAY_MS = float(os.getenv("WRITE_BATCH_DELAY_MS", "0"))
+    WRITE_BATCH_MAX_ROWS = int(os.getenv("WRITE_BATCH_MAX_ROWS", "50"))
 
     # Restrictions
     ADMIN_ROLES = os.getenv("ADMIN_ROLES").split(",")
@@ -60,6 +86,14 @@ class Config:
     # Testing
     TEST_DATABASE = os.getenv("TEST_DATABASE")
 
+    @classproperty
+    def STORAGE_BACKEND(self) -> str:  # pylint: disable=invalid-name
+        """Return the storage backend needed based on whether we're running
+        in a unit test, like Secrets.MYSQL_DATABASE.
+        """
+        return (Config.TEST_STORAGE_BACKEND if "unittest" in sys.modules
+                else Config.LIVE_STORAGE_BACKEND)
+
 
 class Debug:
     """Debugging options."""
@@ -129,6 +163,10 @@ class Pomwars:
     SUCCESSFUL_ATTACK_EMOTE = os.getenv("SUCCESSFUL_ATTACK_EMOTE")
     SUCCESSFUL_DEFEND_EMOTE = os.getenv("SUCCESSFUL_DEFEND_EMOTE")
     JOIN_CHANNEL_NAME = os.getenv("JOIN_CHANNEL_NAME").lstrip("#")
+    SCOREBOARD_REFRESH_INTERVAL_SECONDS = float(
+        os.getenv("SCOREBOARD_REFRESH_INTERVAL_SECONDS", "5"))
+    STORY_WATCH_INTERVAL_SECONDS = float(
+        os.getenv("STORY_WATCH_INTERVAL_SECONDS", "30"))
 
     KNIGHT_ONLY_GUILDS = [
         int(guild.strip()) if guild.strip() else 0
@@ -212,6 +250,14 @@ class Secrets:
         """
         return Config.TEST_DATABASE if "unittest" in sys.modules else Config.LIVE_DATABASE
 
+    @classproperty
+    def SQLITE_DATABASE(self) -> str:  # pylint: disable=invalid-name
+        """Return the SQLite database file needed based on whether we're
+        running in a unit test, like MYSQL_DATABASE.
+        """
+        return (Config.TEST_SQLITE_DATABASE if "unittest" in sys.modules
+                else Config.LIVE_SQLITE_DATABASE)
+
 
 TIMEZONES = {
     Reactions.UTC_MINUS_10_TO_9: -9,
@@ -1,7 +1,15 @@
+import asyncio
 import datetime
+import hashlib
+import logging
+import os
+import pickle
 import random
+import tempfile
+from collections import defaultdict
 from enum import Enum
-from typing import Union
+from types import MappingProxyType
+from typing import FrozenSet, Iterable, Mapping, NamedTuple, Optional, Tuple, Union
 
 from lxml import etree
 import discord.user as DiscordUser
@@ -9,10 +17,16 @@ import discord.user as DiscordUser
 from pombot.data import Locations
 from pombot.lib.pom_wars.team import Team
 from pombot.lib.pom_wars.types import Attack, Bribe, Defend, Outcome
-from pombot.lib.tiny_tools import flatten
+from pombot.lib.tiny_tools import normalize_newlines
 from pombot.lib.types import User as BotUser
 
 ACTIONS_SCHEMA = Locations.POMWARS_ACTIONS_DIR / "actions.xsd"
+COMPILED_STORIES_FILENAME = ".compiled_stories.pickle"
+
+# Bump when the layout of the compiled stories changes.
+_COMPILED_STORIES_VERSION = 1
+
+_log = logging.getLogger(__name__)
 
 
 class _XMLTags(str, Enum):
@@ -22,17 +36,156 @@ class _XMLTags(str, Enum):
     BRIBE = "bribe"
 
 
+class _StoryKey(NamedTuple):
+    tag: _XMLTags
+    team: Optional[str]
+    tier: Optional[int]
+    outcome: Outcome
+
+
+def _build_story_index(xmls: Iterable) -> Mapping[_StoryKey, Tuple[str, ...]]:
+    """Group the stories in the parsed action XMLs by where they can be used.
+
+    Stories are stripped and their newlines normalized here, once, so that
+    they can be sent as they are. Bribes are not bound to a team or tier.
+
+    @param xmls The root elements of the parsed action XMLs.
+    @return Read-only mapping of _StoryKey to a tuple of stories.
+    """
+    index = defaultdict(list)
+
+    def add_story(element, team: Optional[str] = None, tier: Optional[int] = None):
+        outcome = Outcome(element.attrib.get("outcome", Outcome.REGULAR))
+        key = _StoryKey(_XMLTags(element.tag), team, tier, outcome)
+        index[key].append(normalize_newlines(element.text.strip()))
+
+    for xml in xmls:
+        for bribe in xml.iterfind(_XMLTags.BRIBE.value):
+            add_story(bribe)
+
+        for team in xml.iterfind("team"):
+            for tier in team.iterfind("tier"):
+                for action in tier.iterchildren(tag=etree.Element):
+                    add_story(action, team.attrib["name"], int(tier.attrib["level"]))
+
+    return MappingProxyType({key: tuple(stories) for key, stories in index.items()})
+
+
+def _parse_story_index() -> Mapping[_StoryKey, Tuple[str, ...]]:
+    """Validate and parse every actions XML into a story index."""
+    # pylint: disable=c-extension-no-member
+    schema = etree.XMLSchema(etree.parse(str(ACTIONS_SCHEMA)))
+    parser = etree.XMLParser(schema=schema)
+
+    return _build_story_index(
+        etree.parse(str(path), parser=parser).getroot()
+        for path in Locations.POMWARS_ACTIONS_DIR.rglob("*.xml")
+    )
+    # pylint: enable=c-extension-no-member
+
+
+class _SourceFile(NamedTuple):
+    path: str
+    mtime_ns: int
+    size: int
+    sha256: str
+
+
+def _get_source_files(known: Mapping[str, _SourceFile]) -> Tuple[_SourceFile, ...]:
+    """Describe the schema and actions XMLs from which stories are compiled.
+
+    @param known Previously described files by path. A file is only read and
+        hashed when its mtime or size differs from the known one.
+    @return Tuple of _SourceFile in a stable order.
+    """
+    sources = []
+
+    for path in [ACTIONS_SCHEMA, *sorted(Locations.POMWARS_ACTIONS_DIR.rglob("*.xml"))]:
+        stat = path.stat()
+        source = known.get(str(path))
+
+        if source and (source.mtime_ns, source.size) == (stat.st_mtime_ns, stat.st_size):
+            sha256 = source.sha256
+        else:
+            sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+
+        sources.append(_SourceFile(str(path), stat.st_mtime_ns, stat.st_size, sha256))
+
+    return tuple(sources)
+
+
+def load_story_index(*, force_compile: bool = False) -> Mapping[_StoryKey, Tuple[str, ...]]:
+    """Return the story index from the compiled stories file, (re)compiling
+    it first when an actions XML or the schema has changed.
+
+    @param force_compile Parse the XMLs even when the compiled stories are up
+        to date.
+    @return Read-only mapping of _StoryKey to a tuple of stories.
+    """
+    compiled_path = Locations.POMWARS_ACTIONS_DIR / COMPILED_STORIES_FILENAME
+    known_sources, stories = (), None
+
+    if not force_compile:
+        try:
+            with compiled_path.open("rb") as compiled:
+                version, known_sources, stories = pickle.load(compiled)
+        except FileNotFoundError:
+            pass
+        except Exception:  # pylint: disable=broad-except
+            _log.warning("Ignoring unreadable compiled stories: %s", compiled_path)
+        else:
+            if version != _COMPILED_STORIES_VERSION:
+                known_sources, stories = (), None
+
+    sources = _get_source_files({source.path: source for source in known_sources})
+
+    if sources == known_sources:
+        return MappingProxyType(stories)
+
+    # A touched file whose contents are unchanged does not need re-parsing, but
+    # its new mtime is recorded so it will not be hashed again next time.
+    contents = [(source.path, source.sha256) for source in sources]
+    known_contents = [(source.path, source.sha256) for source in known_sources]
+
+    if stories is None or contents != known_contents:
+        stories = dict(_parse_story_index())
+
+    try:
+        with tempfile.NamedTemporaryFile(
+            dir=compiled_path.parent, prefix=compiled_path.name, delete=False
+        ) as temp:
+            pickle.dump((_COMPILED_STORIES_VERSION, sources, stories), temp,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Temporary files are only readable by their owner, but the stories
+        # may be compiled by a different user than the bot, eg. at deploy.
+        os.chmod(temp.name, 0o644)
+        os.replace(temp.name, compiled_path)
+    except OSError as exc:
+        _log.warning("Could not write compiled stories to %s: %s", compiled_path, exc)
+
+    return MappingProxyType(stories)
+
+
 class _XMLLoader:
-    def __init__(self) -> None:
-        # pylint: disable=c-extension-no-member
-        schema = etree.XMLSchema(etree.parse(str(ACTIONS_SCHEMA)))
-        parser = etree.XMLParser(schema=schema)
+    def __init__(self, stories: Optional[Mapping[_StoryKey, Tuple[str, ...]]] = None) -> None:
+        self._stories = load_story_index() if stories is None else stories
+
+    def _get_random_story(
+        self,
+        tag: _XMLTags,
+        team: Optional[Team] = None,
+        tier: Optional[int] = None,
+        outcome: Outcome = Outcome.REGULAR,
+    ) -> str:
+        """Return a random story from the index.
 
-        self._xmls = [
-            etree.parse(str(path), parser=parser).getroot()
-            for path in Locations.POMWARS_ACTIONS_DIR.rglob("*.xml")
-        ]
-        # pylint: enable=c-extension-no-member
+        @raises IndexError when there is no story for the given criteria.
+        """
+        team_name = Team(team).value if team is not None else None
+        key = _StoryKey(tag, team_name, tier, Outcome(outcome))
+
+        return random.choice(self._stories.get(key, ()))
 
     @staticmethod
     def _get_tier_from_average_actions(average_daily_actions: Union[float, int]) -> int:
@@ -59,25 +212,20 @@ class _Attacks(_XMLLoader):
         average_daily_actions: int,
         outcome: Outcome,
         heavy: bool,
+        enemy_defence: float = 0.0,
     ) -> Attack:
         """Return a random Attack from the XMLs."""
         tags = {False: _XMLTags.NORMAL_ATTACK, True: _XMLTags.HEAVY_ATTACK}
         tier = self._get_tier_from_average_actions(average_daily_actions)
-
-        choice = random.choice([
-            action for action in flatten(
-                xml.xpath(
-                    f".//team[@name='{team}']/tier[@level='{tier}']/{tags[heavy]}"
-                ) for xml in self._xmls)
-            if action.attrib.get("outcome", Outcome.REGULAR) == outcome
-        ])
+        story = self._get_random_story(tags[heavy], team, tier, outcome)
 
         return Attack(
             team=team,
             timestamp=timestamp,
-            story=choice.text.strip(),
+            story=story,
             outcome=outcome,
             is_heavy=heavy,
+            enemy_defence=enemy_defence,
         )
 
 
@@ -90,28 +238,85 @@ class _Defends(_XMLLoader):
         outcome: Outcome,
     ):
         """Return a random Defend from the XMLs."""
-        tag = _XMLTags.DEFEND
         tier = self._get_tier_from_average_actions(average_daily_actions)
+        story = self._get_random_story(_XMLTags.DEFEND, team, tier, outcome)
 
-        choice = random.choice([
-            action for action in flatten(
-                x.xpath(f".//team[@name='{team}']/tier[@level='{tier}']/{tag}")
-                for x in self._xmls)
-            if action.attrib.get("outcome", Outcome.REGULAR) == outcome])
-
-        return Defend(user, team, outcome, story=choice.text.strip())
+        return Defend(user, team, outcome, story=story)
 
 
 class _Bribes(_XMLLoader):
     def get_random(self):
         """Return a random Bribe from the XMLs."""
-        choice = random.choice(
-            flatten(x.xpath(f".//{_XMLTags.BRIBE}") for x in self._xmls))
+        return Bribe(story=self._get_random_story(_XMLTags.BRIBE))
+
+
+def get_source_versions() -> FrozenSet[Tuple[str, int, int]]:
+    """Return the path, mtime and size of every file stories are compiled
+    from, for cheaply noticing when any of them changes.
+    """
+    versions = set()
+
+    for path in [ACTIONS_SCHEMA, *Locations.POMWARS_ACTIONS_DIR.rglob("*.xml")]:
+        stat = path.stat()
+        versions.add((str(path), stat.st_mtime_ns, stat.st_size))
+
+    return frozenset(versions)
 
-        return Bribe(story=choice.text.strip())
+
+async def reload_stories() -> Mapping[_StoryKey, Tuple[str, ...]]:
+    """Re-validate the actions XMLs in a worker thread and, only when they
+    are all valid, swap the new stories into Attacks, Defends and Bribes.
+
+    The swap happens on the event loop without yielding in between, so no
+    command ever sees a mix of old and new stories.
+
+    @raises lxml.etree.LxmlError or OSError when the XMLs cannot be loaded, in
+        which case the live stories are left untouched.
+    @return The new story index.
+    """
+    loop = asyncio.get_running_loop()
+    stories = await loop.run_in_executor(None, load_story_index)
+
+    for loader in (Attacks, Defends, Bribes):
+        loader._stories = stories  # pylint: disable=protected-access
+
+    _log.info("Reloaded %d stories", sum(len(group) for group in stories.values()))
+    return stories
+
+
+async def watch_stories(interval: float):
+    """Reload the stories whenever an actions XML or the schema changes.
+
+    Failed reloads are logged and retried only after the files change again.
+
+    @param interval Seconds to wait between checks of the files.
+    """
+    loop = asyncio.get_running_loop()
+    last_seen = await loop.run_in_executor(None, get_source_versions)
+
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            versions = await loop.run_in_executor(None, get_source_versions)
+        except OSError:
+            # A file can disappear between listing and stat while it is saved.
+            continue
+
+        if versions == last_seen:
+            continue
+
+        last_seen = versions
+
+        try:
+            await reload_stories()
+        except (etree.LxmlError, OSError) as exc:
+            _log.error("Keeping the current stories, reload failed: %s", exc)
 
 
 # Exports
-Attacks = _Attacks()
-Defends = _Defends()
-Bribes = _Bribes()
+_stories = load_story_index()
+
+Attacks = _Attacks(_stories)
+Defends = _Defends(_stories)
+Bribes = _Bribes(_stories)
@@ -0,0 +1,12 @@
+"""Compile the Pom Wars action stories ahead of time (eg. when deploying) so
+that the bot does not have to validate and parse the actions XMLs on startup.
+"""
+from pombot.data import Locations
+from pombot.data.pom_wars.actions import COMPILED_STORIES_FILENAME, load_story_index
+
+stories = load_story_index(force_compile=True)
+
+print("Compiled {} stories into {}".format(
+    sum(len(group) for group in stories.values()),
+    Locations.POMWARS_ACTIONS_DIR / COMPILED_STORIES_FILENAME,
+))
@@ -36,6 +36,7 @@ def setup(bot: Bot):
         ]),
 
         BotCommand(commands.do_total,        name="total",        **admin),
+        BotCommand(commands.do_backfill_totals, name="backfill_totals", **admin),
         BotCommand(commands.do_create_event, name="create_event", **admin),
         BotCommand(commands.do_remove_event, name="remove_event", **admin),
 
@@ -1,7 +1,10 @@
+from functools import partial
+
 from discord.ext.commands.bot import Bot
 
 import pombot.commands.pom_wars as commands
-from pombot.lib.tiny_tools import BotCommand
+from pombot.config import Config
+from pombot.lib.tiny_tools import BotCommand, has_any_role
 
 
 def setup(bot: Bot):
@@ -10,10 +13,16 @@ def setup(bot: Bot):
     Do not use this to add event handlers as basic and essential debugging
     and logging will be broken. Instead, add them in bot.main.
     """
+    admin = {
+        "checks": [partial(has_any_role, roles_needed=Config.ADMIN_ROLES)]
+    }
+
     for command in [
         BotCommand(commands.do_actions, name="actions"),
         BotCommand(commands.do_attack,  name="attack"),
         BotCommand(commands.do_bribe,   name="bribe", hidden=True),
         BotCommand(commands.do_defend,  name="defend"),
+
+        BotCommand(commands.do_reload_stories, name="reload_stories", **admin),
     ]:
         bot.add_command(command)
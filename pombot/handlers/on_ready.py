@@ -6,6 +6,7 @@ from discord.ext.commands import Bot
 
 from pombot.state import State
 from pombot.config import Config, Debug, Secrets
+from pombot.lib.event_scheduler import EventScheduler
 from pombot.lib.storage import Storage
 
 _log = logging.getLogger(__name__)
@@ -13,6 +14,7 @@ _log = logging.getLogger(__name__)
 
 async def on_ready(bot: Bot):
     """Startup procedure after bot has logged into Discord."""
+    _log.info("STORAGE_BACKEND: %s", Config.STORAGE_BACKEND)
     _log.info("MYSQL_DATABASE: %s", Secrets.MYSQL_DATABASE)
 
     State.event_loop = asyncio.get_event_loop()
@@ -31,6 +33,7 @@ async def on_ready(bot: Bot):
         for line in debug_enabled_message.split("\n"):
             _log.info(line)
 
+    await Storage.open_connection_pool()
     await Storage.create_tables_if_not_exists()
 
     if Debug.DROP_TABLES_ON_RESTART:
@@ -44,4 +47,16 @@ async def on_ready(bot: Bot):
 
         await Storage.delete_all_rows_from_all_tables()
 
+    await Storage.load_daily_pom_counts()
+    await Storage.load_event_calendar()
+    await Storage.load_user_directory()
+
+    if Config.USER_DIRECTORY_POLL_SECONDS > 0 and State.user_directory_watcher is None:
+        State.user_directory_watcher = asyncio.create_task(
+            Storage.watch_user_directory(Config.USER_DIRECTORY_POLL_SECONDS))
+
+    if State.event_scheduler is None:
+        State.event_scheduler = EventScheduler(bot)
+        State.event_scheduler.start()
+
     _log.info("READY ON DISCORD AS: %s", bot.user)
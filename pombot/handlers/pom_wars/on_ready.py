@@ -1,8 +1,12 @@
+import asyncio
 import logging
+from datetime import datetime
 
 from discord.ext.commands import Bot
 
 from pombot.config import Pomwars
+from pombot.data.pom_wars.actions import watch_stories
+from pombot.lib.pom_wars.active_defends import ActiveDefends
 from pombot.state import State
 from pombot.lib.pom_wars.scoreboard import Scoreboard
 
@@ -18,6 +22,19 @@ async def on_ready(bot: Bot):
             if channel.name == Pomwars.JOIN_CHANNEL_NAME:
                 channels.append(channel)
 
+    # on_ready is called again after reconnecting, so only the first call
+    # starts the watcher.
+    if Pomwars.STORY_WATCH_INTERVAL_SECONDS > 0 and State.story_watcher is None:
+        State.story_watcher = asyncio.create_task(
+            watch_stories(Pomwars.STORY_WATCH_INTERVAL_SECONDS))
+
+    await ActiveDefends.warm(datetime.now())
+
+    # The channels are found again after reconnecting, so the scoreboard is
+    # replaced, and the refresh task of the previous one is stopped.
+    if State.scoreboard is not None:
+        State.scoreboard.stop()
+
     State.scoreboard = Scoreboard(bot, channels)
     full_channels, restricted_channels = await State.scoreboard.update()
 
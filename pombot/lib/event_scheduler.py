@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import textwrap
+from datetime import datetime
+from typing import Optional
+
+from discord.ext.commands import Bot
+
+from pombot.config import Config
+from pombot.lib.messages import send_embed_message
+from pombot.lib.storage.indices import EventCalendar
+from pombot.lib.types import Event
+
+_log = logging.getLogger(__name__)
+
+
+class EventScheduler:
+    """Announce events in the pom channels as they start and end.
+
+    A single task sleeps until the next start or end in the event calendar,
+    and wakes early whenever the calendar changes, eg. when an event is
+    created or removed.
+    """
+    def __init__(self, bot: Bot) -> None:
+        self.bot = bot
+        self._calendar_changed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start announcing events from now on."""
+        self._calendar_changed = asyncio.Event()
+        EventCalendar.add_listener(self._calendar_changed.set)
+        self._task = asyncio.create_task(self._run_forever(datetime.now()))
+
+    def stop(self) -> None:
+        """Cancel the background task, if any."""
+        if self._task is not None:
+            EventCalendar.remove_listener(self._calendar_changed.set)
+            self._task.cancel()
+            self._task = None
+
+    async def _run_forever(self, last_run: datetime) -> None:
+        """Announce every start and end after `last_run` as it happens."""
+        while True:
+            self._calendar_changed.clear()
+            now = datetime.now()
+
+            for moment, event in EventCalendar.get_transitions(last_run, now):
+                try:
+                    await self.announce(event, has_started=moment == event.start_date)
+                except Exception:  # pylint: disable=broad-except
+                    _log.exception("Failed to announce event: %s", event.event_name)
+
+            last_run = now
+
+            if (next_moment := EventCalendar.get_next_transition(now)) is None:
+                timeout = None
+            else:
+                timeout = max((next_moment - datetime.now()).total_seconds(), 0)
+
+            try:
+                await asyncio.wait_for(self._calendar_changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def announce(self, event: Event, *, has_started: bool) -> None:
+        """Announce the start or end of `event` in every pom channel.
+
+        When the bot listens in every channel, events are only logged.
+        """
+        _log.info("Event %s: %s", "started" if has_started else "ended", event.event_name)
+
+        if not any(Config.POM_CHANNEL_NAMES):
+            return
+
+        if has_started:
+            description = textwrap.dedent(f"""\
+                The event has started! Our goal is **{event.pom_goal}** poms
+                by *{event.end_date.strftime("%B %d, %Y")}*.
+            """)
+        else:
+            description = textwrap.dedent(f"""\
+                The event has ended with **{event.pom_count}** of
+                **{event.pom_goal}** poms. {"Well done!" if event.goal_reached
+                                            else "Better luck next time!"}
+            """)
+
+        for guild in self.bot.guilds:
+            for channel in guild.text_channels:
+                if channel.name in Config.POM_CHANNEL_NAMES:
+                    await send_embed_message(None, title=event.event_name,
+                                             description=description,
+                                             _func=channel.send)
@@ -1,18 +1,183 @@
 import math
 import random
-from datetime import datetime
-from functools import cache
-
-from discord.user import User
+from typing import Dict, Optional, Tuple
 
 from pombot.config import Debug, Pomwars
-from pombot.lib.storage import Storage
-from pombot.lib.tiny_tools import daterange_from_timestamp
+from pombot.lib.types import ActionContext
+
+
+def delayed_exponential_drop(num_poms: int) -> float:
+    r"""Return the chance of an action succeeding based on the
+    right-hand-side of a normal Gaussian distribution.
+
+             1.0 |-------------------
+           (100%)|                    \
+    Return       |                      -
+     Value       |                        \
+    (Base        |                          -
+    Chance   0.5 |                            \
+      of    (50%)|                              -
+    Success)     |                                \
+                 |                                  -
+                 |                                    \
+            ~0.0 |                                      ----------------..
+            (~0%)|________________________________________________________
+                  1   2   3   4   5   6   7   8   9   10  11  12  13  14..
+                                num_poms (ie. len(actions))
+    """
+    operand = lambda x: math.pow(math.e, ((-(x - 9)**2) / 2)) / (math.sqrt(2 * math.pi))
+
+    probabilities = {
+        range(0, 6):     lambda x: 1.0,
+        range(6, 11):    lambda x: -0.016 * math.pow(x, 2) + 0.16 * x + 0.6,
+        range(11, 1000): lambda x: operand(x) / operand(9)
+    }
+
+    for range_, function in probabilities.items():
+        if num_poms in range_:
+            break
+    else:
+        function = lambda x: 0.0
 
+    return function(num_poms)
+
+
+def get_heavy_attack_base_chance(heavy_attack_level: int, num_misses: int) -> float:
+    """Return the base chance of a heavy attack succeeding, which grows with
+    each consecutive unsuccessful action (the pity ladder).
+
+    @param heavy_attack_level The user's heavy attack level.
+    @param num_misses Number of unsuccessful actions since the user's last
+        successful action today.
+    """
+    pity_levels = Pomwars.HEAVY_ATTACK_LEVEL_VALIANT_ATTEMPT_CONDOLENCE_REWARDS
+    min_chance, max_chance = pity_levels[heavy_attack_level]
+
+    # Do not add the +1 to max_chance because it's defaulted to later.
+    pity_range = range(*(int(x * 100) for x in (
+        min_chance,
+        max_chance,
+        Pomwars.HEAVY_PITY_INCREMENT,
+    )))
+
+    return dict(enumerate(pity_range)).get(num_misses, max_chance * 100) / 100
+
+
+class _SuccessChances:
+    """Success chances of Pom Wars actions, precomputed from the formulas
+    above so that looking one up does not evaluate them again.
+
+    The heavy attack pity ladders are recomputed when a different
+    HEAVY_ATTACK_LEVEL_VALIANT_ATTEMPT_CONDOLENCE_REWARDS or
+    HEAVY_PITY_INCREMENT is assigned to Pomwars; call refresh() after
+    modifying them in place.
+    """
+    MAX_TABULATED_ACTIONS = 64
+
+    def __init__(self) -> None:
+        self.drop: Tuple[float, ...] = tuple(
+            delayed_exponential_drop(num_actions)
+            for num_actions in range(self.MAX_TABULATED_ACTIONS + 1))
+        self.heavy_base: Dict[int, Tuple[float, ...]] = {}
+        self._config = None
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Recompute the heavy attack pity ladders from the configuration."""
+        pity_levels = Pomwars.HEAVY_ATTACK_LEVEL_VALIANT_ATTEMPT_CONDOLENCE_REWARDS
+        increment = Pomwars.HEAVY_PITY_INCREMENT
+        heavy_base = {}
+
+        for level, (min_chance, max_chance) in pity_levels.items():
+            # Each rung of the ladder, then the maximum chance for any further
+            # number of misses.
+            num_rungs = len(range(*(int(x * 100) for x in (
+                min_chance,
+                max_chance,
+                increment,
+            ))))
+            heavy_base[level] = tuple(get_heavy_attack_base_chance(level, num_misses)
+                                      for num_misses in range(num_rungs + 1))
+
+        self.heavy_base = heavy_base
+        self._config = (pity_levels, increment)
+
+    def get_drop(self, num_actions: int) -> float:
+        """Return delayed_exponential_drop(num_actions)."""
+        if num_actions <= self.MAX_TABULATED_ACTIONS:
+            return self.drop[num_actions]
+
+        return delayed_exponential_drop(num_actions)
+
+    def get_drops(self, max_actions: int) -> Tuple[float, ...]:
+        """Return get_drop(num_actions) for every num_actions from 0 to
+        `max_actions`, so that callers can index them in bulk.
+        """
+        if max_actions <= self.MAX_TABULATED_ACTIONS:
+            return self.drop[:max_actions + 1]
 
-async def is_action_successful(
-    user: User,
-    timestamp: datetime,
+        return self.drop + tuple(
+            delayed_exponential_drop(num_actions)
+            for num_actions in range(self.MAX_TABULATED_ACTIONS + 1, max_actions + 1))
+
+    def get_heavy_attack_base_chance(self, heavy_attack_level: int, num_misses: int) -> float:
+        """Return get_heavy_attack_base_chance(heavy_attack_level, num_misses).
+        """
+        ladder = self._get_ladder(heavy_attack_level)
+        return ladder[min(num_misses, len(ladder) - 1)]
+
+    def get_heavy_attack_base_chances(
+        self,
+        heavy_attack_level: int,
+        max_misses: int,
+    ) -> Tuple[float, ...]:
+        """Return get_heavy_attack_base_chance(heavy_attack_level, num_misses)
+        for every num_misses from 0 to `max_misses`, so that callers can
+        index them in bulk.
+        """
+        ladder = self._get_ladder(heavy_attack_level)
+
+        if max_misses < len(ladder):
+            return ladder[:max_misses + 1]
+
+        return ladder + ladder[-1:] * (max_misses + 1 - len(ladder))
+
+    def _get_ladder(self, heavy_attack_level: int) -> Tuple[float, ...]:
+        """Return the pity ladder of `heavy_attack_level`, recomputing the
+        ladders first when the configuration was replaced.
+        """
+        pity_levels, increment = self._config
+
+        if (pity_levels is not Pomwars.HEAVY_ATTACK_LEVEL_VALIANT_ATTEMPT_CONDOLENCE_REWARDS
+                or increment != Pomwars.HEAVY_PITY_INCREMENT):
+            self.refresh()
+
+        return self.heavy_base[heavy_attack_level]
+
+    def get(
+        self,
+        num_actions: int,
+        heavy_attack_level: Optional[int] = None,
+        num_misses: int = 0,
+    ) -> float:
+        """Return the chance of an action succeeding.
+
+        @param num_actions Number of actions the user already took today.
+        @param heavy_attack_level The user's heavy attack level when this is a
+            heavy attack, otherwise None.
+        @param num_misses Number of unsuccessful actions since the user's last
+            successful action today; only used for heavy attacks.
+        """
+        chance = self.get_drop(num_actions)
+
+        if heavy_attack_level is not None:
+            chance *= self.get_heavy_attack_base_chance(heavy_attack_level, num_misses)
+
+        return chance
+
+
+def is_action_successful(
+    context: ActionContext,
     is_heavy_attack: bool = False,
 ) -> bool:
     """Considering the time, user choices and previous user actions,
@@ -21,82 +186,16 @@ async def is_action_successful(
     if Debug.POMWARS_ACTIONS_ALWAYS_SUCCEED:
         return True
 
-    actions = await Storage.get_actions(
-        user=user,
-        date_range=daterange_from_timestamp(timestamp),
-    )
-
-    def _delayed_exponential_drop(num_poms: int):
-        r"""Return the chance of an action succeeding based on the
-        right-hand-side of a normal Gaussian distribution.
-
-                 1.0 |-------------------
-               (100%)|                    \
-        Return       |                      -
-         Value       |                        \
-        (Base        |                          -
-        Chance   0.5 |                            \
-          of    (50%)|                              -
-        Success)     |                                \
-                     |                                  -
-                     |                                    \
-                ~0.0 |                                      ----------------..
-                (~0%)|________________________________________________________
-                      1   2   3   4   5   6   7   8   9   10  11  12  13  14..
-                                    num_poms (ie. len(actions))
-        """
-        operand = lambda x: math.pow(math.e, ((-(x - 9)**2) / 2)) / (math.sqrt(2 * math.pi))
-
-        probabilities = {
-            range(0, 6):     lambda x: 1.0,
-            range(6, 11):    lambda x: -0.016 * math.pow(x, 2) + 0.16 * x + 0.6,
-            range(11, 1000): lambda x: operand(x) / operand(9)
-        }
+    num_actions = len(context.actions_today)
 
-        for range_, function in probabilities.items():
-            if num_poms in range_:
-                break
-        else:
-            function = lambda x: 0.0
+    if not is_heavy_attack:
+        return random.random() <= SuccessChances.get(num_actions)
 
-        return function(num_poms)
+    num_misses = context.streak.misses_on(context.timestamp.date())
+    chance = SuccessChances.get(num_actions, context.user.heavy_attack_level, num_misses)
 
-    async def _get_heavy_attack_base_chance(user_id: int) -> float:
-        nonlocal actions
+    return random.random() <= chance
 
-        botuser = await Storage.get_user_by_id(user_id)
-        pity_levels = Pomwars.HEAVY_ATTACK_LEVEL_VALIANT_ATTEMPT_CONDOLENCE_REWARDS
-        min_chance, max_chance = pity_levels[botuser.heavy_attack_level]
-
-        # Do not add the +1 to max_chance because it's defaulted to later.
-        pity_range = range(*(int(x * 100) for x in (
-            min_chance,
-            max_chance,
-            Pomwars.HEAVY_PITY_INCREMENT,
-        )))
-
-        # A modified reducer because functools.reduce() won't break after some
-        # condition is met.
-        num_misses = 0
-        for action in reversed(actions):
-            if action.was_successful:
-                break
-            num_misses += 1
-
-        return dict(enumerate(pity_range)).get(num_misses, max_chance * 100) / 100
-
-    @cache
-    def _get_normal_attack_success_chance(num_poms: int):
-        return 1.0 * _delayed_exponential_drop(num_poms)
-
-    @cache
-    def _get_heavy_attack_success_chance(num_poms: int, base_chance: float):
-        return base_chance * _delayed_exponential_drop(num_poms)
-
-    if is_heavy_attack:
-        base_chance = await _get_heavy_attack_base_chance(user.id)
-        chance_func = lambda x: _get_heavy_attack_success_chance(x, base_chance)
-    else:
-        chance_func = _get_normal_attack_success_chance
 
-    return random.random() <= chance_func(len(actions))
+# Exports
+SuccessChances = _SuccessChances()
@@ -0,0 +1,114 @@
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, NamedTuple
+
+from pombot.config import Pomwars
+from pombot.lib.storage import Storage
+from pombot.lib.types import ActionType, DateRange
+
+
+class _Defend(NamedTuple):
+    timestamp: datetime
+    user_id: int
+
+
+class _TeamDefends:
+    """Successful defends of one team within the last DEFEND_DURATION_MINUTES.
+
+    Like the DB query it replaces, each defender counts once no matter how
+    many times they defended within that time.
+    """
+    def __init__(self) -> None:
+        self._defends: Deque[_Defend] = deque()
+        self._defends_per_user: Dict[int, int] = {}
+        self._user_levels: Dict[int, int] = {}
+        self._level_counts: Counter = Counter()
+
+    def add(self, user_id: int, defend_level: int, timestamp: datetime) -> None:
+        """Record a successful defend."""
+        # Concurrent commands can finish out of order, but not by much.
+        position = len(self._defends)
+        while position and self._defends[position - 1].timestamp > timestamp:
+            position -= 1
+        self._defends.insert(position, _Defend(timestamp, user_id))
+
+        if (previous_level := self._user_levels.get(user_id)) is not None:
+            self._level_counts[previous_level] -= 1
+
+        self._defends_per_user[user_id] = self._defends_per_user.get(user_id, 0) + 1
+        self._user_levels[user_id] = defend_level
+        self._level_counts[defend_level] += 1
+
+    def expire(self, timestamp: datetime) -> None:
+        """Forget defends which are no longer active at `timestamp`."""
+        oldest_active = timestamp - timedelta(minutes=Pomwars.DEFEND_DURATION_MINUTES)
+
+        while self._defends and self._defends[0].timestamp < oldest_active:
+            user_id = self._defends.popleft().user_id
+            self._defends_per_user[user_id] -= 1
+
+            if not self._defends_per_user[user_id]:
+                del self._defends_per_user[user_id]
+                self._level_counts[self._user_levels.pop(user_id)] -= 1
+
+    def get_defence(self) -> float:
+        """Return the summed defend level multipliers of active defenders."""
+        return sum(Pomwars.DEFEND_LEVEL_MULTIPLIERS[level] * count
+                   for level, count in self._level_counts.items())
+
+
+class _ActiveDefends:
+    """In-memory sliding windows of the active defends of each team, so that
+    attacks need not query them.
+    """
+    def __init__(self) -> None:
+        self._teams: Dict[str, _TeamDefends] = {}
+
+    def add(self, team: str, user_id: int, defend_level: int, timestamp: datetime) -> None:
+        """Record a successful defend.
+
+        @param team Name of the defending team.
+        @param user_id ID of the defender.
+        @param defend_level The defender's defend level.
+        @param timestamp The time of the defend.
+        """
+        self._teams.setdefault(team, _TeamDefends()).add(user_id, defend_level, timestamp)
+
+    def get_defence(self, team: str, timestamp: datetime) -> float:
+        """Return the cumulative defence of `team` at `timestamp`, before
+        applying Pomwars.MAXIMUM_TEAM_DEFENCE.
+        """
+        if (team_defends := self._teams.get(team)) is None:
+            return 0.0
+
+        team_defends.expire(timestamp)
+        return team_defends.get_defence()
+
+    def clear(self) -> None:
+        """Forget all defends."""
+        self._teams.clear()
+
+    async def warm(self, timestamp: datetime) -> None:
+        """Replace the known defends with the ones still active in storage.
+
+        @param timestamp The current time.
+        """
+        defends = await Storage.get_actions(
+            action_type=ActionType.DEFEND,
+            was_successful=True,
+            date_range=DateRange(
+                timestamp - timedelta(minutes=Pomwars.DEFEND_DURATION_MINUTES),
+                timestamp,
+            ),
+        )
+        defenders = await Storage.get_users_by_id(defend.user_id for defend in defends)
+
+        self.clear()
+
+        for defend in sorted(defends, key=lambda defend: defend.timestamp):
+            if (defender := defenders.get(defend.user_id)) is not None:
+                self.add(defend.team, defend.user_id, defender.defend_level, defend.timestamp)
+
+
+# Exports
+ActiveDefends = _ActiveDefends()
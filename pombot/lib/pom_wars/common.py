@@ -1,5 +1,3 @@
-from collections import Counter
-from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 from discord.ext.commands import Context
@@ -10,29 +8,47 @@ from pombot.config import Config, Pomwars, Reactions
 from pombot.lib.errors import DescriptionTooLongError
 from pombot.lib.pom_wars.team import Team
 from pombot.lib.storage import Storage
-from pombot.lib.types import ActionType, DateRange, User as BotUser
+from pombot.lib.tiny_tools import daterange_from_timestamp
+from pombot.lib.types import ActionContext, User as BotUser
+
+
+async def load_action_context(
+    user: DiscordUser,
+    timestamp: datetime,
+) -> ActionContext:
+    """Fetch everything needed to resolve a Pom Wars action by `user` in a
+    single round trip to storage.
+
+    @param user The Discord user taking the action (eg. ctx.author).
+    @param timestamp The time a user issued the command.
+    @return ActionContext object.
+    """
+    return await Storage.get_action_context(
+        user,
+        timestamp,
+        actions_range=daterange_from_timestamp(timestamp),
+        daily_actions_since=_offset(timestamp).date(),
+    )
 
 
 async def check_user_add_pom(
     ctx: Context,
     description: str,
-    timestamp: datetime,
+    context: ActionContext,
 ) -> BotUser:
     """Based on `ctx` verify a user exists, ensure the pom description is
     within limits and add their pom to the DB.
 
     @param ctx The context to use for reading author and replying.
     @param description Pom description provided by the user via args.
-    @param timestamp The time a user issued the command.
+    @param context The prefetched action context for ctx.author.
     @raises UserDoesNotExistError, DescriptionTooLongError.
     @return The user from the DB based on their ID.
     """
-    try:
-        user = await Storage.get_user_by_id(ctx.author.id)
-    except war_crimes.UserDoesNotExistError:
+    if (user := context.user) is None:
         await ctx.reply("How did you get in here? You haven't joined the war!")
         await ctx.message.add_reaction(Reactions.ROBOT)
-        raise
+        raise war_crimes.UserDoesNotExistError()
 
     if len(description) > Config.DESCRIPTION_LIMIT:
         await ctx.message.add_reaction(Reactions.WARNING)
@@ -44,40 +60,35 @@ async def check_user_add_pom(
         ctx.author,
         descript=description,
         count=1,
-        time_set=timestamp,
+        time_set=context.timestamp,
     )
     await ctx.message.add_reaction(Reactions.TOMATO)
 
     return user
 
 
-async def get_average_poms(
-    user: DiscordUser,
-    timestamp: datetime,
-) -> int:
+def get_average_poms(context: ActionContext) -> int:
     """Return user's average number of pom wars actions per day."""
-    kwargs = dict(user=user, date_range=DateRange(_offset(timestamp), timestamp))
-
-    if only_successful := Pomwars.CONSIDER_ONLY_SUCCESSFUL_ACTIONS:
-        kwargs.update(was_successful=only_successful)
+    timestamp = context.timestamp
+    start_date = _offset(timestamp).date()
+    only_successful = Pomwars.CONSIDER_ONLY_SUCCESSFUL_ACTIONS
 
-    actions = await Storage.get_actions(**kwargs) + [_PlaceholderAction(timestamp)]
+    counts = {
+        day: daily.successful_actions if only_successful else daily.actions
+        for day, daily in context.daily_actions.items()
+        if start_date <= day <= timestamp.date()
+    }
 
-    actions = (a for a in actions if a.type in (
-        ActionType.DEFEND,
-        ActionType.NORMAL_ATTACK,
-        ActionType.HEAVY_ATTACK,
-        ActionType.PLACEHOLDER,
-    ))
+    # The current action has not yet been added to storage, so count it here.
+    counts[timestamp.date()] = counts.get(timestamp.date(), 0) + 1
 
     period = Pomwars.AVERAGING_PERIOD_DAYS - Pomwars.MAX_FORGIVEN_DAYS
-    counter = Counter(a.timestamp.date() for a in actions)
-    counts = (count for _, count in counter.most_common()[:period])
+    top_counts = sorted(counts.values(), reverse=True)[:period]
 
     if not only_successful and (limit := Pomwars.SHADOW_CAP_LIMIT_PER_DAY):
-        counts = (count if count < limit else limit for count in counts)
+        top_counts = [count if count < limit else limit for count in top_counts]
 
-    return round(sum(counts) / period)
+    return round(sum(top_counts) / period)
 
 
 def _offset(timestamp):
@@ -88,17 +99,6 @@ def _offset(timestamp):
     return datetime(date.year, date.month, date.day)
 
 
-@dataclass
-class _PlaceholderAction:
-    """An object that acts enough like an Action to be averaged.
-
-    We need to append one extra action to the list of actions returned from
-    the DB because the current action has not yet been added to the DB.
-    """
-    timestamp: datetime
-    type: ActionType = ActionType.PLACEHOLDER
-
-
 def get_user_team(user: BotUser) -> Team:
     """Find a Discord user's team based on their roles.
 
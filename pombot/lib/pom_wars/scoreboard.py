@@ -1,12 +1,19 @@
-from typing import List
+import asyncio
+import logging
+from typing import Dict, List, Optional
 
 import discord.errors
-from discord.channel import ChannelType
+from discord.channel import ChannelType, TextChannel
 from discord.ext.commands.bot import Bot
+from discord.message import Message
 
 from pombot.config import Pomwars, Reactions
 from pombot.lib.messages import EmbedField, send_embed_message
 from pombot.lib.pom_wars.team import Team
+from pombot.lib.storage import Storage
+from pombot.lib.types import TeamStats
+
+_log = logging.getLogger(__name__)
 
 
 class Scoreboard:
@@ -14,6 +21,44 @@ class Scoreboard:
     def __init__(self, bot: Bot, scoreboard_channels: List) -> None:
         self.bot = bot
         self.scoreboard_channels = scoreboard_channels
+        self._messages: Dict[int, Optional[Message]] = {}
+        self._digests: Dict[int, int] = {}
+        self._dirty = asyncio.Event()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def request_update(self) -> None:
+        """Mark the scoreboard as stale without waiting for it to be redrawn.
+
+        The first request is served right away. Any further requests which
+        arrive within Pomwars.SCOREBOARD_REFRESH_INTERVAL_SECONDS of a redraw
+        are coalesced into a single redraw at the end of that interval, which
+        reads the latest stats at that time.
+        """
+        self._dirty.set()
+
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_forever())
+
+    def stop(self) -> None:
+        """Cancel the background refresh task, if any."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    async def _refresh_forever(self) -> None:
+        """Redraw the scoreboard whenever it is marked as dirty, at most once
+        per refresh interval.
+        """
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+
+            try:
+                await self.update()
+            except Exception:  # pylint: disable=broad-except
+                _log.exception("Failed to refresh the scoreboard")
+
+            await asyncio.sleep(Pomwars.SCOREBOARD_REFRESH_INTERVAL_SECONDS)
 
     async def update(self) -> List[ChannelType]:
         """Updates or creates the live scoreboards of all guilds.
@@ -26,6 +71,11 @@ class Scoreboard:
             - Shows populations.
             - Shows favorite attacks.
 
+        The scoreboard message in each channel is remembered once it is found,
+        and the channel history is only read again after that message is
+        deleted. Scoreboards which already show the same content are not
+        edited.
+
         @returns Two lists of channels.
             - The first is a list of channels in which a message has already
               been sent, and it is not authored by the bot.
@@ -36,93 +86,128 @@ class Scoreboard:
         knights, vikings = Team.KNIGHTS, Team.VIKINGS
         winner = None
 
-        stats = {
-            knights: {
-                "damage":      await knights.damage,
-                "fav_attack":  await knights.favorite_action,
-                "population":  await knights.population,
-                "num_attacks": await knights.attack_count,
-            },
-            vikings: {
-                "damage":      await vikings.damage,
-                "fav_attack":  await vikings.favorite_action,
-                "population":  await vikings.population,
-                "num_attacks": await vikings.attack_count,
+        team_stats = await Storage.get_team_stats()
+        stats = {}
+
+        for team in (knights, vikings):
+            totals = team_stats.get(team.value) or TeamStats(team.value)
+            stats[team] = {
+                "damage":      totals.damage,
+                "fav_attack":  totals.favorite_action,
+                "population":  totals.population,
+                "num_attacks": totals.action_count,
             }
-        }
 
         if stats[knights]["damage"] != stats[vikings]["damage"]:
             winner = knights if stats[vikings]["damage"] < stats[knights]["damage"] else vikings
 
-        for channel in self.scoreboard_channels:
-            history = channel.history(limit=1, oldest_first=True)
-
-            lines = [
-                "{dmg} damage dealt {emt}",
-                "** **",
-                "`Attacks:` {attacks} attacks",
-                "`Favorite Attack:` {fav}",
-                "`Member Count:` {participants} participants",
-            ]
-
-            knight_values = {
-                "dmg": stats[knights]["damage"],
-                "emt": Pomwars.Emotes.ATTACK,
-                "fav": stats[knights]["fav_attack"],
-                "attacks": stats[knights]["num_attacks"],
-                "participants": stats[knights]["population"],
-            }
+        lines = [
+            "{dmg} damage dealt {emt}",
+            "** **",
+            "`Attacks:` {attacks} attacks",
+            "`Favorite Attack:` {fav}",
+            "`Member Count:` {participants} participants",
+        ]
+
+        knight_values = {
+            "dmg": stats[knights]["damage"],
+            "emt": Pomwars.Emotes.ATTACK,
+            "fav": stats[knights]["fav_attack"],
+            "attacks": stats[knights]["num_attacks"],
+            "participants": stats[knights]["population"],
+        }
 
-            viking_values = {
-                "dmg": stats[vikings]["damage"],
-                "emt": Pomwars.Emotes.ATTACK,
-                "fav": stats[vikings]["fav_attack"],
-                "attacks": stats[vikings]["num_attacks"],
-                "participants": stats[vikings]["population"],
-            }
+        viking_values = {
+            "dmg": stats[vikings]["damage"],
+            "emt": Pomwars.Emotes.ATTACK,
+            "fav": stats[vikings]["fav_attack"],
+            "attacks": stats[vikings]["num_attacks"],
+            "participants": stats[vikings]["population"],
+        }
 
-            fields = [
-                EmbedField(
-                    name="{emt} Knights {win}".format(
-                        emt=Pomwars.Emotes.KNIGHT,
-                        win=f"{Pomwars.Emotes.WINNER}" if winner==knights else "",
-                    ),
-                    value="\n".join(lines).format(**knight_values),
+        fields = [
+            EmbedField(
+                name="{emt} Knights {win}".format(
+                    emt=Pomwars.Emotes.KNIGHT,
+                    win=f"{Pomwars.Emotes.WINNER}" if winner==knights else "",
                 ),
-                EmbedField(
-                    name="{emt} Vikings {win}".format(
-                        emt=Pomwars.Emotes.VIKING,
-                        win=f"{Pomwars.Emotes.WINNER}" if winner==vikings else "",
-                    ),
-                    value="\n".join(lines).format(**viking_values),
+                value="\n".join(lines).format(**knight_values),
+            ),
+            EmbedField(
+                name="{emt} Vikings {win}".format(
+                    emt=Pomwars.Emotes.VIKING,
+                    win=f"{Pomwars.Emotes.WINNER}" if winner==vikings else "",
                 ),
-            ]
+                value="\n".join(lines).format(**viking_values),
+            ),
+        ]
 
-            msg_title = "Pom War Season 3 Warboard"
-            msg_footer = f"React with {Reactions.WAR_JOIN_REACTION} to join a team!"
+        msg_title = "Pom War Season 3 Warboard"
+        msg_footer = f"React with {Reactions.WAR_JOIN_REACTION} to join a team!"
 
-            channel_messages = await history.flatten()
-            scoreboard_msg = None
+        embed = dict(title=msg_title, fields=fields, footer=msg_footer)
+        digest = hash((msg_title, tuple(fields), msg_footer))
 
-            if channel_messages:
-                scoreboard_msg = channel_messages[0]
-                if scoreboard_msg.author != self.bot.user:
-                    full_channels.append(channel)
-                    continue
+        for channel in self.scoreboard_channels:
+            if self._digests.get(channel.id) == digest:
+                continue
 
             try:
-                new_msg = await send_embed_message(
-                    None,
-                    title=msg_title,
-                    description=None,
-                    fields=fields,
-                    footer=msg_footer,
-                    colour=Pomwars.ACTION_COLOUR,
-                    _func=scoreboard_msg.edit if scoreboard_msg else channel.send
-                )
-                if new_msg:
-                    await new_msg.add_reaction(Reactions.WAR_JOIN_REACTION)
+                try:
+                    is_drawn = await self._draw(channel, **embed)
+                except discord.errors.NotFound:
+                    # The scoreboard was deleted since we last saw it.
+                    del self._messages[channel.id]
+                    is_drawn = await self._draw(channel, **embed)
             except discord.errors.Forbidden:
                 restricted_channels.append(channel)
+                continue
+
+            if not is_drawn:
+                full_channels.append(channel)
+                continue
+
+            self._digests[channel.id] = digest
 
         return [full_channels, restricted_channels]
+
+    async def _get_message(self, channel: TextChannel) -> Optional[Message]:
+        """Return the first message in `channel`, only reading the channel
+        history when it is not already known.
+        """
+        if channel.id not in self._messages:
+            history = channel.history(limit=1, oldest_first=True)
+            channel_messages = await history.flatten()
+            self._messages[channel.id] = channel_messages[0] if channel_messages else None
+
+        return self._messages[channel.id]
+
+    async def _draw(self, channel: TextChannel, **embed) -> bool:
+        """Edit the scoreboard in `channel`, or send it when the channel is
+        empty.
+
+        @param channel The join channel in which to draw the scoreboard.
+        @param embed Keyword arguments for send_embed_message.
+        @raises discord.errors.NotFound when the remembered scoreboard message
+            no longer exists.
+        @return False when the first message in the channel is not authored by
+            the bot, otherwise True.
+        """
+        scoreboard_msg = await self._get_message(channel)
+
+        if scoreboard_msg is not None and scoreboard_msg.author != self.bot.user:
+            return False
+
+        new_msg = await send_embed_message(
+            None,
+            description=None,
+            colour=Pomwars.ACTION_COLOUR,
+            _func=scoreboard_msg.edit if scoreboard_msg else channel.send,
+            **embed,
+        )
+
+        if new_msg:
+            self._messages[channel.id] = new_msg
+            await new_msg.add_reaction(Reactions.WAR_JOIN_REACTION)
+
+        return True
@@ -0,0 +1,365 @@
+"""Offline Monte Carlo simulation of Pom Wars balance.
+
+A season of synthetic players on both teams is simulated with the same
+formulas and `Pomwars` configuration the bot uses, but without Discord or
+MySQL, so balance changes can be evaluated before they reach real users:
+
+    python -m pombot.lib.pom_wars.simulator --players 25000 --days 28
+
+NumPy is only needed for this module; the bot itself never imports it.
+"""
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pombot.config import Pomwars
+from pombot.data.pom_wars.actions import _XMLLoader
+from pombot.lib.pom_wars.action_chances import SuccessChances
+from pombot.lib.pom_wars.team import Team
+
+_NORMAL_ATTACK, _HEAVY_ATTACK, _DEFEND = range(3)
+_MINUTES_PER_DAY = 24 * 60
+
+
+@dataclass
+class Season:
+    """Behaviour of the synthetic players in a simulated season."""
+    players_per_team: int = 1000
+    days: int = 28
+
+    # Each player has their own average number of actions per day, drawn
+    # from a gamma distribution, so that a few players are far more active
+    # than the rest.
+    mean_actions_per_day: float = 4.0
+    activity_shape: float = 2.0
+    max_actions_per_day: int = 30
+
+    heavy_attack_ratio: float = 0.2
+    defend_ratio: float = 0.3
+
+    # Heavy attack and defend levels are drawn uniformly from 1 to max_level,
+    # which must be a configured level.
+    max_level: int = 1
+
+    # Actions are spread uniformly over this many minutes of each day.
+    active_minutes_per_day: int = 16 * 60
+
+    # Upper bound on the number of player-days rolled in one batch, to keep
+    # memory use flat for very large seasons.
+    batch_size: int = 250_000
+
+    seed: Optional[int] = None
+
+
+class TeamResult(NamedTuple):
+    """Per player-day outcomes for one team, each of shape (players, days).
+    """
+    team: Team
+    actions: np.ndarray
+    damage: np.ndarray
+    tiers: np.ndarray
+
+
+class _Actions(NamedTuple):
+    """Flat arrays describing every action a team took in the season."""
+    player: np.ndarray
+    day: np.ndarray
+    kind: np.ndarray
+    was_successful: np.ndarray
+    was_critical: np.ndarray
+    minute: np.ndarray
+
+
+def attack_damage(
+    is_heavy: np.ndarray,
+    is_critical: np.ndarray,
+    enemy_defence: np.ndarray,
+) -> np.ndarray:
+    """Vectorized Attack.damage for successful attacks.
+
+    @param is_heavy Whether each attack is a heavy attack.
+    @param is_critical Whether each attack is a critical hit.
+    @param enemy_defence Sum of the active enemy defend level multipliers.
+    @return Array of damage per attack.
+    """
+    base_damage = np.where(is_heavy,
+                           Pomwars.BASE_DAMAGE_FOR_HEAVY_ATTACKS,
+                           Pomwars.BASE_DAMAGE_FOR_NORMAL_ATTACKS)
+    multiplier = 1 - np.minimum(enemy_defence, Pomwars.MAXIMUM_TEAM_DEFENCE)
+    critical = np.where(is_critical, Pomwars.DAMAGE_MULTIPLIER_FOR_CRITICAL, 1)
+
+    return base_damage * multiplier * critical
+
+
+def average_daily_actions(daily_counts: np.ndarray) -> np.ndarray:
+    """Vectorized get_average_poms at each player's first action of each day.
+
+    @param daily_counts Array of shape (players, days) with the number of
+        actions counted towards the average (ie. only successful ones when
+        Pomwars.CONSIDER_ONLY_SUCCESSFUL_ACTIONS is set).
+    @return Array of shape (players, days) of averages.
+    """
+    averaging_days = Pomwars.AVERAGING_PERIOD_DAYS
+    period = averaging_days - Pomwars.MAX_FORGIVEN_DAYS
+
+    # The averaged dates run from AVERAGING_PERIOD_DAYS days ago up to and
+    # including today, on which only the placeholder for the current action
+    # is counted.
+    padded = np.pad(daily_counts, ((0, 0), (averaging_days, 0)))
+    windows = sliding_window_view(padded, averaging_days + 1, axis=1)
+    windows = windows[:, :daily_counts.shape[1]].copy()
+    windows[..., -1] = 1
+
+    if not Pomwars.CONSIDER_ONLY_SUCCESSFUL_ACTIONS and Pomwars.SHADOW_CAP_LIMIT_PER_DAY:
+        windows = np.minimum(windows, Pomwars.SHADOW_CAP_LIMIT_PER_DAY)
+
+    busiest_days = np.sort(windows, axis=-1)[..., windows.shape[-1] - period:]
+
+    # Like round(), np.rint rounds halves to the nearest even number.
+    return np.rint(busiest_days.sum(axis=-1) / period).astype(int)
+
+
+def _get_tiers(averages: np.ndarray) -> np.ndarray:
+    get_tier = _XMLLoader._get_tier_from_average_actions  # pylint: disable=protected-access
+    values, inverse = np.unique(averages, return_inverse=True)
+
+    return np.array([get_tier(value) for value in values])[inverse].reshape(averages.shape)
+
+
+class _ChanceTables(NamedTuple):
+    drop: np.ndarray
+    heavy_base: np.ndarray
+    defend_multipliers: np.ndarray
+
+    @classmethod
+    def create(cls, season: Season) -> "_ChanceTables":
+        """Tabulate the success chances for every possible input."""
+        levels = range(season.max_level + 1)
+
+        return cls(
+            drop=np.array(SuccessChances.get_drops(season.max_actions_per_day)),
+            heavy_base=np.array([
+                SuccessChances.get_heavy_attack_base_chances(max(level, 1),
+                                                             season.max_actions_per_day)
+                for level in levels
+            ]),
+            defend_multipliers=np.array([
+                Pomwars.DEFEND_LEVEL_MULTIPLIERS.get(level, 0.0) for level in levels
+            ]),
+        )
+
+
+def _roll_actions(
+    season: Season,
+    rng: np.random.Generator,
+    tables: _ChanceTables,
+    daily_actions: np.ndarray,
+    heavy_levels: np.ndarray,
+) -> _Actions:
+    """Roll the kind, time and outcome of every action of a team's players.
+
+    Actions within a day depend on each other (the success chance drops with
+    each action and heavy attacks pity earlier misses), so a day is rolled one
+    action slot at a time, but for all player-days of a batch at once.
+    """
+    players, days = daily_actions.shape
+    slots = season.max_actions_per_day
+    kind_chances = [
+        1 - season.heavy_attack_ratio - season.defend_ratio,
+        season.heavy_attack_ratio,
+        season.defend_ratio,
+    ]
+    rows_per_batch = max(1, season.batch_size // days)
+    batches = []
+
+    for first_row in range(0, players, rows_per_batch):
+        rows = slice(first_row, first_row + rows_per_batch)
+        counts = daily_actions[rows]
+        shape = counts.shape + (slots, )
+
+        is_active = np.arange(slots) < counts[..., None]
+        kind = rng.choice(3, size=shape, p=kind_chances)
+        minute = np.sort(rng.uniform(0, season.active_minutes_per_day, size=shape), axis=-1)
+        was_critical = rng.random(size=shape) <= Pomwars.BASE_CHANCE_FOR_CRITICAL
+        was_successful = np.zeros(shape, dtype=bool)
+
+        num_misses = np.zeros(counts.shape, dtype=int)
+
+        for slot in range(slots):
+            if not is_active[..., slot].any():
+                break
+
+            heavy_base = tables.heavy_base[heavy_levels[rows, None], num_misses]
+            base_chance = np.where(kind[..., slot] == _HEAVY_ATTACK, heavy_base, 1.0)
+            chance = base_chance * tables.drop[slot]
+
+            succeeded = is_active[..., slot] & (rng.random(size=counts.shape) <= chance)
+            was_successful[..., slot] = succeeded
+            num_misses = np.where(is_active[..., slot] & ~succeeded, num_misses + 1, 0)
+
+        player, day, slot = np.nonzero(is_active)
+        batches.append(_Actions(
+            player=player + first_row,
+            day=day,
+            kind=kind[player, day, slot],
+            was_successful=was_successful[player, day, slot],
+            was_critical=was_critical[player, day, slot],
+            minute=day * _MINUTES_PER_DAY + minute[player, day, slot],
+        ))
+
+    return _Actions(*(np.concatenate(field) for field in zip(*batches)))
+
+
+def _get_enemy_defence(
+    attacks: _Actions,
+    enemy_actions: _Actions,
+    enemy_defend_levels: np.ndarray,
+    tables: _ChanceTables,
+) -> np.ndarray:
+    """Return the sum of enemy defend multipliers active at each attack.
+
+    A defend is active from its time until DEFEND_DURATION_MINUTES later.
+    Unlike the bot, several defends by the same player within that time all
+    count; this makes little difference at realistic rates of defending.
+    """
+    is_defend = (enemy_actions.kind == _DEFEND) & enemy_actions.was_successful
+    order = np.argsort(enemy_actions.minute[is_defend])
+    defend_minutes = enemy_actions.minute[is_defend][order]
+    multipliers = tables.defend_multipliers[
+        enemy_defend_levels[enemy_actions.player[is_defend]]][order]
+    cumulative = np.concatenate([[0.0], np.cumsum(multipliers)])
+
+    first = np.searchsorted(
+        defend_minutes, attacks.minute - Pomwars.DEFEND_DURATION_MINUTES, side="left")
+    last = np.searchsorted(defend_minutes, attacks.minute + 1 / 60, side="right")
+
+    return cumulative[last] - cumulative[first]
+
+
+def simulate(season: Season) -> Dict[Team, TeamResult]:
+    """Simulate a season of Pom Wars between synthetic Knights and Vikings.
+
+    @param season Behaviour of the synthetic players.
+    @return Mapping of each team to its per player-day results.
+    """
+    seed_sequence = np.random.SeedSequence(season.seed)
+    tables = _ChanceTables.create(season)
+    shape = (season.players_per_team, season.days)
+    teams = (Team.KNIGHTS, Team.VIKINGS)
+
+    daily_actions, heavy_levels, defend_levels, actions = {}, {}, {}, {}
+
+    for team in teams:
+        # Players are drawn independently from their actions, so that they
+        # stay the same regardless of the batch size.
+        rng, actions_rng = (np.random.default_rng(seed) for seed in seed_sequence.spawn(2))
+
+        activity = rng.gamma(
+            season.activity_shape,
+            season.mean_actions_per_day / season.activity_shape,
+            size=season.players_per_team,
+        )
+        daily_actions[team] = np.minimum(
+            rng.poisson(activity[:, None], size=shape), season.max_actions_per_day)
+        heavy_levels[team] = rng.integers(1, season.max_level + 1, size=season.players_per_team)
+        defend_levels[team] = rng.integers(1, season.max_level + 1, size=season.players_per_team)
+        actions[team] = _roll_actions(
+            season, actions_rng, tables, daily_actions[team], heavy_levels[team])
+
+    results = {}
+
+    for team in teams:
+        team_actions = actions[team]
+        is_attack = (team_actions.kind != _DEFEND) & team_actions.was_successful
+        attacks = _Actions(*(field[is_attack] for field in team_actions))
+
+        damage = attack_damage(
+            attacks.kind == _HEAVY_ATTACK,
+            attacks.was_critical,
+            _get_enemy_defence(attacks, actions[~team], defend_levels[~team], tables),
+        )
+        player_days = attacks.player * season.days + attacks.day
+        damage_per_day = np.bincount(
+            player_days, weights=damage, minlength=np.prod(shape)).reshape(shape)
+
+        if Pomwars.CONSIDER_ONLY_SUCCESSFUL_ACTIONS:
+            counted = team_actions.was_successful
+            successes = team_actions.player * season.days + team_actions.day
+            daily_counts = np.bincount(
+                successes[counted], minlength=np.prod(shape)).reshape(shape)
+        else:
+            daily_counts = daily_actions[team]
+
+        results[team] = TeamResult(
+            team=team,
+            actions=daily_actions[team],
+            damage=damage_per_day,
+            tiers=_get_tiers(average_daily_actions(daily_counts)),
+        )
+
+    return results
+
+
+def summarize(results: Dict[Team, TeamResult]) -> List[str]:
+    """Describe the damage dealt per active player-day by team and tier.
+
+    @return Lines of a plain-text table.
+    """
+    header = "{:<8} {:>4} {:>12} {:>8} {:>8} {:>8} {:>8} {:>14}".format(
+        "Team", "Tier", "Player-days", "Mean", "P50", "P90", "P99", "Total")
+    lines = [header, "-" * len(header)]
+
+    for team, result in results.items():
+        is_active = result.actions > 0
+
+        for tier in (1, 2, 3):
+            damage = result.damage[is_active & (result.tiers == tier)]
+
+            if not damage.size:
+                continue
+
+            p50, p90, p99 = np.percentile(damage, [50, 90, 99])
+            lines.append("{:<8} {:>4} {:>12} {:>8.1f} {:>8.1f} {:>8.1f} {:>8.1f} {:>14.1f}".format(
+                team.value, tier, damage.size, damage.mean(), p50, p90, p99, damage.sum()))
+
+    totals = {team: result.damage.sum() for team, result in results.items()}
+    lines += ["", "Total damage: " + ", ".join(
+        f"{team.value} {total:.1f}" for team, total in totals.items())]
+
+    return lines
+
+
+def main():
+    """Run a simulation from the command line and print its summary."""
+    defaults = Season()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+
+    for flag, attribute, type_ in (
+        ("--players",      "players_per_team",     int),
+        ("--days",         "days",                 int),
+        ("--mean-actions", "mean_actions_per_day", float),
+        ("--heavy-ratio",  "heavy_attack_ratio",   float),
+        ("--defend-ratio", "defend_ratio",         float),
+        ("--max-level",    "max_level",            int),
+        ("--seed",         "seed",                 int),
+    ):
+        parser.add_argument(flag, dest=attribute, type=type_,
+                            default=getattr(defaults, attribute))
+
+    season = Season(**vars(parser.parse_args()))
+
+    started = time.perf_counter()
+    results = simulate(season)
+    elapsed = time.perf_counter() - started
+
+    print("\n".join(summarize(results)))
+    print(f"\nSimulated {2 * season.players_per_team * season.days} "
+          f"player-days in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
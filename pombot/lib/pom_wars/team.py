@@ -1,8 +1,8 @@
 from enum import Enum
 
-from pombot.config import Config, IconUrls, Pomwars
+from pombot.config import IconUrls, Pomwars
 from pombot.lib.storage import Storage
-from pombot.lib.types import ActionType
+from pombot.lib.types import ActionType, TeamStats
 
 
 class Team(str, Enum):
@@ -22,28 +22,28 @@ class Team(str, Enum):
 
         return icons[self]
 
+    @property
+    async def stats(self) -> TeamStats:
+        """The team's running totals."""
+        team_stats = await Storage.get_team_stats()
+        return team_stats.get(self.value) or TeamStats(self.value)
+
     @property
     async def damage(self) -> int:
         """The team's total damage."""
-        return int(await Storage.sum_team_damage(self.value) / 100.0)
+        return (await self.stats).damage
 
     @property
     async def favorite_action(self) -> ActionType:
         """The team's most-used action."""
-        async def _count_actions(typ: ActionType):
-            await Storage.count_rows_in_table(Config.ACTIONS_TABLE,
-                action_type=typ,
-                team=self.value,
-            )
-
-        return max({typ: await _count_actions(typ) for typ in ActionType})
+        return (await self.stats).favorite_action
 
     @property
     async def attack_count(self) -> int:
         """The team's total number of actions."""
-        return await Storage.count_rows_in_table(Config.ACTIONS_TABLE, team=self.value)
+        return (await self.stats).action_count
 
     @property
     async def population(self) -> int:
         """The team's population."""
-        return await Storage.count_rows_in_table(Config.USERS_TABLE, team=self.value)
+        return (await self.stats).population
@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
 from string import Template
 
@@ -7,9 +7,7 @@ from discord.user import User as DiscordUser
 
 from pombot.config import Pomwars
 from pombot.lib.pom_wars.team import Team
-from pombot.lib.storage import Storage
-from pombot.lib.tiny_tools import normalize_newlines
-from pombot.lib.types import ActionType, DateRange, User as BotUser
+from pombot.lib.types import User as BotUser
 
 
 class Outcome(str, Enum):
@@ -29,72 +27,56 @@ class Attack:
         story: str,
         outcome: Outcome,
         is_heavy: bool,
+        enemy_defence: float = 0.0,
     ):
         self._team = team
         self._timestamp = timestamp
         self._story = story
         self._outcome = outcome
         self._is_heavy = is_heavy
-
-        # Prevent unnecessary DB hits.
-        self._damage = None
+        self._enemy_defence = enemy_defence
 
     @property
-    async def damage(self):
+    def damage(self):
         """Return the total damage this attack produces after heavy, critical
         and defensive modifiers.
         """
-        if self._damage is not None:
-            return self._damage
-
         if self._outcome == Outcome.MISSED:
-            self._damage = 0
-        else:
-            normal_dmg = Pomwars.BASE_DAMAGE_FOR_NORMAL_ATTACKS
-            heavy_dmg = Pomwars.BASE_DAMAGE_FOR_HEAVY_ATTACKS
-            base_damage = heavy_dmg if self._is_heavy else normal_dmg
-            adjusted_damage = base_damage * await self.defensive_multiplier
+            return 0
+
+        normal_dmg = Pomwars.BASE_DAMAGE_FOR_NORMAL_ATTACKS
+        heavy_dmg = Pomwars.BASE_DAMAGE_FOR_HEAVY_ATTACKS
+        base_damage = heavy_dmg if self._is_heavy else normal_dmg
+        adjusted_damage = base_damage * self.defensive_multiplier
 
-            if self._outcome == Outcome.CRITICAL:
-                self._damage =  adjusted_damage * Pomwars.DAMAGE_MULTIPLIER_FOR_CRITICAL
-            else:
-                self._damage = adjusted_damage
+        if self._outcome == Outcome.CRITICAL:
+            return adjusted_damage * Pomwars.DAMAGE_MULTIPLIER_FOR_CRITICAL
 
-        return self._damage
+        return adjusted_damage
 
     @property
-    async def defensive_multiplier(self) -> float:
+    def defensive_multiplier(self) -> float:
         """Return the cumulative effect of the opposing team's Defend actions.
         """
-        defend_actions = await Storage.get_actions(
-            action_type=ActionType.DEFEND,
-            team=(~self._team).value,
-            was_successful=True,
-            date_range=DateRange(
-                self._timestamp - timedelta(minutes=Pomwars.DEFEND_DURATION_MINUTES),
-                self._timestamp + timedelta(seconds=1),
-            ),
-        )
-        defenders = await Storage.get_users_by_id([a.user_id for a in defend_actions])
-        multipliers = [Pomwars.DEFEND_LEVEL_MULTIPLIERS[d.defend_level] for d in defenders]
-        multiplier = min([sum(multipliers), Pomwars.MAXIMUM_TEAM_DEFENCE])
+        multiplier = min([self._enemy_defence, Pomwars.MAXIMUM_TEAM_DEFENCE])
 
         return 1 - multiplier
 
     @property
-    async def message(self) -> str:
+    def message(self) -> str:
         """Return the effect and the markdown-formatted story for this attack as
         a combined string.
         """
+        damage = self.damage
         message_lines = [f"{Pomwars.Emotes.ATTACK} `{{}} damage!`".format(
-            ("{:.1f}" if await self.damage % 1 else "{}").format(self._damage)
+            ("{:.1f}" if damage % 1 else "{}").format(damage)
         )]
 
         if self._outcome == Outcome.CRITICAL:
             message_lines += [f"{Pomwars.Emotes.CRITICAL} `Critical attack!`"]
 
         action_result = "\n".join(message_lines)
-        formatted_story = "*" + normalize_newlines(self._story) + "*"
+        formatted_story = "*" + self._story + "*"
 
         return ("\n\n".join([action_result, formatted_story])
                 if self._outcome != Outcome.MISSED else formatted_story)
@@ -137,7 +119,7 @@ class Defend:
             emt=Pomwars.Emotes.DEFEND,
             dfn=100 * Pomwars.DEFEND_LEVEL_MULTIPLIERS[self._user.defend_level],
         )
-        formatted_story = "*" + normalize_newlines(self._story) + "*"
+        formatted_story = "*" + self._story + "*"
 
         return ("\n\n".join([action_result, formatted_story])
                 if self._outcome != Outcome.MISSED else formatted_story)
@@ -163,7 +145,7 @@ class Bribe:
         """Return the markdown-formatted story for this bribe as a combined
         string.
         """
-        story = Template(normalize_newlines(self._story))
+        story = Template(self._story)
 
         return story.safe_substitute(
             NAME=user.name,
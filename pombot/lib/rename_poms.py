@@ -1,7 +1,7 @@
-from aiomysql import DataError
 from discord.ext.commands import Context
 
 from pombot.config import Config, Reactions
+from pombot.lib.errors import DescriptionTooLongError
 from pombot.lib.storage import Storage
 from pombot.lib.tiny_tools import normalize_and_dedent
 from pombot.lib.types import SessionType
@@ -27,10 +27,7 @@ async def rename_poms(ctx: Context, old: str, new: str, session_type: SessionTyp
             session_poms_only=session_poms_only,
             banked_poms_only=banked_poms_only,
         )
-    except DataError as exc:
-        if "Data too long" not in exc.args[1]:
-            raise
-
+    except DescriptionTooLongError:
         await ctx.author.send(normalize_and_dedent(f"""
             New description is too long: "{new}" ({len(new)} of
             {Config.DESCRIPTION_LIMIT} character maximum).
@@ -0,0 +1,606 @@
+import asyncio
+import importlib
+import logging
+from datetime import date
+from datetime import datetime as dt
+from datetime import timezone
+from typing import Dict, Iterable, List, Optional, Union
+
+from discord.user import User as DiscordUser
+
+import pombot.lib.pom_wars.errors as war_crimes
+from pombot.config import Config
+from pombot.lib.storage.backend import StorageBackend
+from pombot.lib.storage.caches import UserDailyActionsCache, UserStreaksCache
+from pombot.lib.storage.indices import (DailyPomCounts, EventCalendar,
+                                        UserDirectory, _EventCalendar)
+from pombot.lib.storage.loaders import SharedReads, _BatchLoader
+from pombot.lib.types import (AVERAGED_ACTION_TYPES, Action, ActionContext,
+                              ActionType, DateRange, Event, Pom, PomSummary,
+                              SessionType, TeamStats)
+from pombot.lib.types import User as PombotUser
+
+_log = logging.getLogger(__name__)
+
+# Backends which can be chosen with Config.STORAGE_BACKEND, by module and
+# class. Only the chosen one is imported, so a bot needs only its driver.
+_BACKEND_TYPES = {
+    "mysql":  ("pombot.lib.storage.mysql", "MySQLBackend"),
+    "sqlite": ("pombot.lib.storage.sqlite", "SQLiteBackend"),
+    "memory": ("pombot.lib.storage.memory", "MemoryBackend"),
+}
+
+_backends: Dict[str, StorageBackend] = {}
+
+
+def _backend() -> StorageBackend:
+    """Return the backend chosen by Config.STORAGE_BACKEND."""
+    name = Config.STORAGE_BACKEND
+
+    if (backend := _backends.get(name)) is None:
+        try:
+            module_name, class_name = _BACKEND_TYPES[name]
+        except KeyError as exc:
+            raise RuntimeError(f"Unknown storage backend: {name}") from exc
+
+        backend_type = getattr(importlib.import_module(module_name), class_name)
+        backend = _backends[name] = backend_type()
+
+    return backend
+
+
+async def _load_daily_pom_counts() -> Dict[date, int]:
+    """Load the daily pom counts index from storage, unless it raced with
+    a write, and return the counts read.
+    """
+    async def read():
+        generation = DailyPomCounts.generation
+        counts = await _backend().get_daily_pom_counts()
+        DailyPomCounts.load(counts, generation)
+
+        return counts
+
+    return await SharedReads.load("daily_pom_counts", read)
+
+
+async def _event_calendar() -> _EventCalendar:
+    """Return the event calendar, loading it from storage first if needed.
+
+    When the load races with a write, a calendar of the events read is
+    returned instead, which is as current as a query.
+    """
+    if EventCalendar.is_loaded:
+        return EventCalendar
+
+    async def read():
+        generation = EventCalendar.generation
+        events = await _backend().get_all_events()
+        EventCalendar.load(events, generation)
+
+        if EventCalendar.is_loaded:
+            return EventCalendar
+
+        calendar = _EventCalendar()
+        calendar.load(events, calendar.generation)
+
+        return calendar
+
+    return await SharedReads.load("event_calendar", read)
+
+
+async def _load_user_directory() -> None:
+    """Load the user directory from storage, unless it raced with a write."""
+    async def read():
+        generation = UserDirectory.generation
+        UserDirectory.load(await _backend().get_all_users(), generation)
+
+    await SharedReads.load("user_directory", read)
+
+
+# Users who are not in the user directory, looked up in the same tick of the
+# event loop, are read together.
+_users_by_id = _BatchLoader(lambda user_ids: _backend().get_users_by_id(user_ids))
+
+
+class Storage:
+    """The global object-relational mapping.
+
+    Queries are answered by the backend chosen with Config.STORAGE_BACKEND,
+    while the caches of recently active users live here so that every
+    backend shares them.
+
+    Identical reads which are in flight at the same time share one query.
+    Every write calls `SharedReads.forget` once committed, so that reads
+    made after it are not answered by a query made before it.
+    """
+    @staticmethod
+    async def open_connection_pool():
+        """Start the storage backend ahead of the first query."""
+        await _backend().open()
+
+    @staticmethod
+    async def close_connection_pool():
+        """Commit queued writes and let in-flight queries finish, then
+        release the storage backend.
+        """
+        await _backend().flush_writes()
+        await _backend().close()
+
+    @staticmethod
+    async def create_tables_if_not_exists():
+        """Create predefined DB tables if they don't already exist, then
+        apply any pending schema migrations.
+        """
+        await _backend().create_tables_if_not_exists()
+
+    @staticmethod
+    async def delete_all_rows_from_all_tables():
+        """Delete all rows from all tables.
+
+        This is a dangerous function and should only be run by developers on
+        development machines.
+        """
+        _log.info("Deleting tables... ")
+        await _backend().delete_all_rows_from_all_tables()
+        SharedReads.forget()
+        UserDailyActionsCache.clear()
+        UserStreaksCache.clear()
+        DailyPomCounts.clear()
+        EventCalendar.clear()
+        UserDirectory.clear()
+        _log.info("Tables deleted.")
+
+    @staticmethod
+    async def add_poms_to_user_session(
+        user: DiscordUser,
+        descript: Optional[Union[str, Iterable]],
+        count: int,
+        time_set: dt = None,
+    ):
+        """Add a number of user poms.
+
+        If `descript` is specified as a non-string iterable, like a list or
+        generator, then this will check that we're in a unit test and fail if
+        not. This is because it is generally only possible to have one pom
+        description per user command specified, but this makes unit tests that
+        require many poms in the DB very slow.
+        """
+        time_set = time_set or dt.now()
+        num_added = await _backend().add_poms_to_user_session(user, descript, count, time_set)
+        SharedReads.forget()
+        DailyPomCounts.add(time_set.date(), num_added)
+        EventCalendar.add_poms(time_set, num_added)
+
+    @staticmethod
+    async def bank_user_session_poms(user: DiscordUser) -> int:
+        """Set all active session poms to be non-active and return number of
+        rows affected.
+        """
+        num_banked = await _backend().bank_user_session_poms(user)
+        SharedReads.forget()
+
+        return num_banked
+
+    @staticmethod
+    async def delete_poms(
+        *,
+        user: DiscordUser,
+        time_set: dt = None,
+        session: SessionType = None,
+     ) -> int:
+        """Delete a user's poms matching the criteria.
+
+        NOTE: When only the user is specified, all of their poms will be
+        deleted!
+
+        @param user Only match poms for this user.
+        @param time_set Only match poms with this timestamp value.
+        @param session Only remove poms from this session.
+        @return Number of rows deleted.
+        """
+        deleted = await _backend().delete_poms(user=user, time_set=time_set, session=session)
+        SharedReads.forget()
+
+        for pom_time_set, num_deleted in deleted.items():
+            DailyPomCounts.add(pom_time_set.date(), -num_deleted)
+            EventCalendar.add_poms(pom_time_set, -num_deleted)
+
+        return sum(deleted.values())
+
+    @staticmethod
+    async def load_daily_pom_counts():
+        """Load the daily pom counts index, which `count_poms` answers from.
+
+        The index is kept current as poms are added and deleted, so this only
+        needs to be done once, at startup.
+        """
+        await _load_daily_pom_counts()
+
+    @staticmethod
+    async def backfill_daily_pom_counts() -> int:
+        """Rebuild the daily pom counts table from the poms table, then
+        reload the daily pom counts index.
+
+        @return Number of poms counted.
+        """
+        await _backend().backfill_daily_pom_counts()
+        SharedReads.forget()
+        DailyPomCounts.clear()
+        counts = await _load_daily_pom_counts()
+
+        return sum(counts.values())
+
+    @staticmethod
+    async def count_poms(date_range: DateRange = None) -> int:
+        """Count the poms of all users, without loading the poms themselves.
+
+        Poms are counted by the day they were logged, so the days at either
+        end of the range are counted in full.
+
+        @param date_range Only count poms logged on the days of this range.
+        @return Number of poms.
+        """
+        first_day, last_day = ((date_range.start_date.date(), date_range.end_date.date())
+                               if date_range else (None, None))
+
+        if not DailyPomCounts.is_loaded:
+            counts = await _load_daily_pom_counts()
+
+            if not DailyPomCounts.is_loaded:
+                # Poms were added or deleted while the counts were read, so
+                # they were not loaded, but they are as current as a query.
+                return sum(count for day, count in counts.items()
+                           if (first_day is None or first_day <= day)
+                           and (last_day is None or day <= last_day))
+
+        return DailyPomCounts.count(first_day, last_day)
+
+    @staticmethod
+    async def get_ongoing_events() -> List[Event]:
+        """Return a list of ongoing Events."""
+        return (await _event_calendar()).get_ongoing(dt.now())
+
+    @staticmethod
+    async def load_event_calendar():
+        """Load the event calendar, which every event lookup is answered
+        from.
+
+        The calendar is kept current as events and poms are added and
+        deleted, so this only needs to be done once, at startup.
+        """
+        await _event_calendar()
+
+    @staticmethod
+    async def mark_event_goal_reached(event: Event) -> bool:
+        """Record that the event has reached its pom goal.
+
+        @param event The event which reached its goal.
+        @return Whether this call marked the goal reached, which is false
+            when it had already been marked, eg. by a concurrent !pom.
+        """
+        was_marked = await _backend().mark_event_goal_reached(event)
+        SharedReads.forget()
+        EventCalendar.mark_goal_reached(event.event_id)
+
+        return was_marked
+
+    @staticmethod
+    async def get_poms(
+        *,
+        user: DiscordUser = None,
+        descript = None,
+        date_range: DateRange = None,
+        limit: int = None
+    ) -> List[Pom]:
+        """Get a list of poms from storage matching certain criteria. When
+        limit is set, then the order is assumed to be most recent first.
+
+        @param user Only match poms for this user.
+        @param date_range Only match poms within this date range.
+        @param limit Maximum length of the returned list.
+        @return List of Pom objects.
+        """
+        return await _backend().get_poms(
+            user=user, descript=descript, date_range=date_range, limit=limit)
+
+    @staticmethod
+    async def get_pom_summary(
+        user: DiscordUser,
+        descript: Optional[str] = None,
+    ) -> List[PomSummary]:
+        """Count a user's poms by description and session, without loading
+        the poms themselves.
+
+        @param user Only count poms for this user.
+        @param descript Only count poms with this description.
+        @return List of PomSummary objects, in order of each group's first
+            pom.
+        """
+        return await _backend().get_pom_summary(user, descript)
+
+    @staticmethod
+    async def add_new_event(name: str, goal: int, date_range: DateRange):
+        """Add a new event row."""
+        EventCalendar.add(await _backend().add_new_event(name, goal, date_range))
+        SharedReads.forget()
+
+    @staticmethod
+    async def get_all_events() -> List[Event]:
+        """Return a list of all events."""
+        return (await _event_calendar()).get_all()
+
+    @staticmethod
+    async def get_overlapping_events(date_range: DateRange) -> List[Event]:
+        """Return a list of events in the database which overlap with the
+        dates specified.
+        """
+        return (await _event_calendar()).get_overlapping(date_range)
+
+    @staticmethod
+    async def delete_event(name: str):
+        """Delete the named event from the DB."""
+        event_id = await _backend().delete_event(name)
+        SharedReads.forget()
+
+        if event_id is not None:
+            EventCalendar.remove(event_id)
+
+    @staticmethod
+    async def add_user(user_id: str, zone: timezone, team: str):
+        """Add a user into the users table."""
+        try:
+            await _backend().add_user(user_id, zone, team)
+        finally:
+            UserDirectory.invalidate(user_id)
+            SharedReads.forget()
+
+    @staticmethod
+    async def set_user_timezone(user_id: str, zone: timezone):
+        """Set the user timezone."""
+        try:
+            await _backend().set_user_timezone(user_id, zone)
+        finally:
+            UserDirectory.invalidate(user_id)
+            SharedReads.forget()
+
+    @staticmethod
+    async def update_user_team(user_id: str, team: str):
+        """Set the user team."""
+        try:
+            await _backend().update_user_team(user_id, team)
+        finally:
+            UserDirectory.invalidate(user_id)
+            SharedReads.forget()
+
+    @staticmethod
+    async def update_user_poms_descriptions(
+        user: DiscordUser,
+        old_description: str,
+        new_description: str,
+        banked_poms_only: bool = False,
+        session_poms_only: bool = False,
+    ) -> int:
+        """Update user poms matching a description to a new description."""
+        num_updated = await _backend().update_user_poms_descriptions(
+            user, old_description, new_description, banked_poms_only, session_poms_only)
+        SharedReads.forget()
+
+        return num_updated
+
+    @staticmethod
+    async def get_user_by_id(user_id: int) -> Optional[PombotUser]:
+        """Return a single user by its userID.
+
+        Users are answered from the user directory, and only read from
+        storage again after their row is written. Users read from storage
+        in the same tick of the event loop are read with one query.
+        """
+        if not UserDirectory.is_loaded:
+            await _load_user_directory()
+
+        if UserDirectory.has(user_id):
+            if (user := UserDirectory.get(user_id)) is None:
+                raise war_crimes.UserDoesNotExistError()
+
+            return user
+
+        generation = UserDirectory.generation
+        user = await _users_by_id.load(int(user_id))
+        UserDirectory.put(user_id, user, generation)
+
+        if user is None:
+            raise war_crimes.UserDoesNotExistError()
+
+        return user
+
+    @staticmethod
+    async def get_users_by_id(user_ids: Iterable[int]) -> Dict[int, PombotUser]:
+        """Return the users with the given userID's, keyed by userID.
+
+        Repeated userID's are looked up once, and userID's without a user
+        are left out. Users in the user directory need no query at all, and
+        the rest are read in bounded IN lists which run concurrently.
+
+        @param user_ids The userID's to look up.
+        @return The user of each userID found.
+        """
+        if not UserDirectory.is_loaded:
+            await _load_user_directory()
+
+        user_ids = list(dict.fromkeys(map(int, user_ids)))
+        users = {user_id: UserDirectory.get(user_id) for user_id in user_ids
+                 if UserDirectory.has(user_id)}
+
+        if stale_ids := [user_id for user_id in user_ids if user_id not in users]:
+            generation = UserDirectory.generation
+            fetched = await _users_by_id.load_many(stale_ids)
+
+            for user_id in stale_ids:
+                UserDirectory.put(user_id, fetched.get(user_id), generation)
+
+            users.update(fetched)
+
+        return {user_id: user for user_id, user in users.items() if user is not None}
+
+    @staticmethod
+    async def load_user_directory():
+        """Load the user directory, which user lookups are answered from."""
+        await _load_user_directory()
+
+    @staticmethod
+    async def watch_user_directory(interval: float):
+        """Reload the user directory every `interval` seconds, so that users
+        written by another bot process on the same database are seen.
+
+        @param interval Seconds to wait between reloads.
+        """
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                await _load_user_directory()
+            except Exception:  # pylint: disable=broad-except
+                _log.exception("Keeping the current user directory, reload failed")
+
+    @staticmethod
+    async def add_pom_war_action(
+        user: DiscordUser,
+        team: str,
+        action_type: ActionType,
+        was_successful: bool,
+        was_critical: bool,
+        items_dropped: str,
+        damage: int,
+        time_set: dt,
+    ):
+        """Add an action to the ledger."""
+        await _backend().add_pom_war_action(user, team, action_type, was_successful,
+                                            was_critical, items_dropped, damage, time_set)
+        SharedReads.forget()
+
+        if action_type in AVERAGED_ACTION_TYPES:
+            UserDailyActionsCache.add(user.id, time_set.date(), was_successful)
+
+        UserStreaksCache.add(user.id, time_set.date(), was_successful)
+
+    @staticmethod
+    async def get_actions(
+        *,
+        action_type: ActionType = None,
+        user: DiscordUser = None,
+        team: str = None,
+        was_successful = None,
+        date_range: DateRange = None,
+    ) -> List[Action]:
+        """Get a list of actions from storage matching certain criteria.
+
+        This function has the potential to return a large list of actions, so
+        it is recommended to provide a date_range.
+
+        @param user Only match actions for this user.
+        @param was_successful Only match successful actions when True, or
+            unsuccessful actions when False.
+        @param date_range Only match actions within this date range.
+        @return List of Action objects.
+        """
+        return await _backend().get_actions(
+            action_type=action_type,
+            user=user,
+            team=team,
+            was_successful=was_successful,
+            date_range=date_range,
+        )
+
+    @staticmethod
+    async def get_action_context(
+        user: DiscordUser,
+        timestamp: dt,
+        *,
+        actions_range: DateRange,
+        daily_actions_since: date,
+    ) -> ActionContext:
+        """Fetch everything needed to resolve a Pom Wars action in a single
+        round trip: the user's row, their actions in `actions_range`, their
+        daily action counts from `daily_actions_since` onward and their
+        streak of unsuccessful actions.
+
+        The daily counts and streaks of recently active users are cached, in
+        which case they are not queried at all.
+
+        @param user The user taking the action.
+        @param timestamp The time the user issued the command.
+        @param actions_range Only match the user's actions within this range.
+        @param daily_actions_since The first day of daily counts to include.
+        @return ActionContext object.
+        """
+        daily_actions = UserDailyActionsCache.get(user.id, daily_actions_since)
+        daily_actions_generation = UserDailyActionsCache.generation(user.id)
+        streak = UserStreaksCache.get(user.id)
+        streak_generation = UserStreaksCache.generation(user.id)
+
+        user_row, actions, fetched_daily_actions, fetched_streak = \
+            await _backend().get_action_context_rows(
+                user,
+                actions_range=actions_range,
+                daily_actions_since=daily_actions_since if daily_actions is None else None,
+                include_streak=streak is None,
+            )
+
+        if daily_actions is None:
+            daily_actions = fetched_daily_actions
+            UserDailyActionsCache.put(
+                user.id, daily_actions_since, daily_actions, daily_actions_generation)
+
+        if streak is None:
+            streak = fetched_streak
+            UserStreaksCache.put(user.id, streak, streak_generation)
+
+        return ActionContext(
+            timestamp=timestamp,
+            user=user_row,
+            actions=actions,
+            daily_actions=daily_actions,
+            streak=streak,
+        )
+
+    @staticmethod
+    async def count_rows_in_table(
+        table: str,
+        *,
+        action_type: ActionType = None,
+        team: str = None,
+    ) -> int:
+        """Get number of users on a team.
+
+        The team parameter is a string here to avoid a circular reference.
+
+        @param table The table from which to count.
+        @param action_type Consider only these types of actions.
+        @param team Team name as a string.
+        @return Count of users on this team.
+        """
+        return await SharedReads.load(
+            ("count_rows_in_table", table, action_type, team),
+            lambda: _backend().count_rows_in_table(table, action_type=action_type, team=team))
+
+    @staticmethod
+    async def sum_team_damage(team: str) -> int:
+        """Get sum of the damage column for a team.
+
+        The team parameter is a string here to avoid a circular reference.
+
+        @param team Team name as a string.
+        @return Sum of the damage that the team has done thus far.
+        """
+        return await SharedReads.load(("sum_team_damage", team),
+                                      lambda: _backend().sum_team_damage(team))
+
+    @staticmethod
+    async def get_team_stats() -> Dict[str, TeamStats]:
+        """Return the running totals of every team, keyed by team name.
+
+        The totals are maintained alongside every action and user change, so
+        this is a lookup of one row per team rather than an aggregate over
+        the whole actions ledger.
+        """
+        return dict(await SharedReads.load("get_team_stats", _backend().get_team_stats))
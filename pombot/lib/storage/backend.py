@@ -0,0 +1,317 @@
+import sys
+from decimal import ROUND_HALF_UP, Decimal
+from datetime import date
+from datetime import datetime as dt
+from datetime import time, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from discord.user import User as DiscordUser
+
+from pombot.lib import errors
+from pombot.lib.types import (Action, ActionStreak, ActionType, DailyActions,
+                              DateRange, Event, Pom, PomSummary, SessionType,
+                              TeamStats)
+from pombot.lib.types import User as PombotUser
+
+# Columns in the team stats table which count each type of action.
+_TEAM_STATS_ACTION_COLUMNS = {
+    ActionType.NORMAL_ATTACK: "normal_attacks",
+    ActionType.HEAVY_ATTACK:  "heavy_attacks",
+    ActionType.DEFEND:        "defends",
+    ActionType.BRIBE:         "bribes",
+}
+
+# Limits of the columns which MySQL enforces, and which the other backends
+# enforce the same way.
+_DESCRIPTION_MAX_LENGTH = 30
+_EVENT_NAME_MAX_LENGTH = 100
+_POM_GOAL_RANGE = range(-2 ** 31, 2 ** 31)
+
+# The rows needed to resolve a Pom Wars action: the user, their actions in
+# the requested range, their daily action counts when requested and their
+# streak when requested.
+ActionContextRows = Tuple[
+    Optional[PombotUser],
+    List[Action],
+    Optional[Dict[date, DailyActions]],
+    Optional[ActionStreak],
+]
+
+
+def _pom_rows(
+    user: DiscordUser,
+    descript: Optional[Union[str, Iterable]],
+    count: int,
+    time_set: Optional[dt],
+) -> List[Tuple[int, Optional[str], dt]]:
+    """Return the (userID, descript, time_set) of each pom to add for
+    Storage.add_poms_to_user_session.
+    """
+    descript = descript or None
+    time_set = time_set or dt.now()
+
+    if type(descript) in [str, type(None)]:
+        _check_description(descript)
+        return [(user.id, descript, time_set) for _ in range(count)]
+
+    assert "unittest" in sys.modules, \
+        f"{type(descript)} not allowed for descript outside of unit tests"
+
+    descripts = list(descript)
+
+    for desc in descripts:
+        _check_description(desc)
+
+    return [(user.id, desc, time_set) for desc in descripts for _ in range(count)]
+
+
+def _check_description(descript: Optional[str]):
+    """Raise when `descript` does not fit in the description column.
+
+    @raises DescriptionTooLongError
+    """
+    if descript is not None and len(descript) > _DESCRIPTION_MAX_LENGTH:
+        raise errors.DescriptionTooLongError()
+
+
+def _check_new_event(name: str, goal: Optional[int]):
+    """Raise when a new event does not fit in the events table, with the same
+    messages as MySQL.
+
+    @raises EventCreationError
+    """
+    if len(name) > _EVENT_NAME_MAX_LENGTH:
+        raise errors.EventCreationError("Data too long for column 'event_name' at row 1")
+
+    if goal is not None and goal not in _POM_GOAL_RANGE:
+        raise errors.EventCreationError("Out of range value for column 'pom_goal' at row 1")
+
+
+def _raw_damage(damage: Optional[float]) -> int:
+    """Return `damage` in the hundredths stored in the damage columns,
+    rounded half away from zero like MySQL rounds the value it is sent.
+    """
+    return int(Decimal(repr((damage or 0) * 100)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _check_session_type(session: SessionType):
+    """Raise when `session` cannot be used to select poms for removal."""
+    if (not isinstance(session, SessionType) or
+            session not in [SessionType.CURRENT, SessionType.BANKED]):
+        raise RuntimeError("Invalid session type for removal.")
+
+
+def _zone_str(zone: timezone) -> str:
+    """Return the form in which a user's timezone is stored."""
+    return time(tzinfo=zone).strftime('%z')
+
+
+class StorageBackend:
+    """A storage engine behind `Storage`.
+
+    Each method has the signature and semantics of the `Storage` method of
+    the same name, which documents it. `Storage` chooses the backend and
+    keeps the caches which are shared by every backend.
+    """
+    async def open(self):
+        """Prepare the backend ahead of the first query."""
+        raise NotImplementedError
+
+    async def close(self):
+        """Release the backend's resources."""
+        raise NotImplementedError
+
+    async def flush_writes(self):
+        """Commit every write which is queued to be committed in a group."""
+
+    async def create_tables_if_not_exists(self):
+        """See Storage.create_tables_if_not_exists."""
+        raise NotImplementedError
+
+    async def delete_all_rows_from_all_tables(self):
+        """See Storage.delete_all_rows_from_all_tables."""
+        raise NotImplementedError
+
+    async def add_poms_to_user_session(
+        self,
+        user: DiscordUser,
+        descript: Optional[Union[str, Iterable]],
+        count: int,
+        time_set: dt = None,
+    ) -> int:
+        """See Storage.add_poms_to_user_session. The poms, the daily pom
+        counts and the pom counts of events are written atomically.
+
+        @return Number of poms added.
+        """
+        raise NotImplementedError
+
+    async def bank_user_session_poms(self, user: DiscordUser) -> int:
+        """See Storage.bank_user_session_poms."""
+        raise NotImplementedError
+
+    async def delete_poms(
+        self,
+        *,
+        user: DiscordUser,
+        time_set: dt = None,
+        session: SessionType = None,
+    ) -> Dict[dt, int]:
+        """See Storage.delete_poms. The poms, the daily pom counts and the pom
+        counts of events are written atomically.
+
+        @return Number of poms deleted with each time_set, so that the daily
+            pom counts index and the event calendar can be kept current.
+        """
+        raise NotImplementedError
+
+    async def get_daily_pom_counts(self) -> Dict[date, int]:
+        """Return the daily pom counts table, as the number of poms logged
+        on each day which has any.
+        """
+        raise NotImplementedError
+
+    async def backfill_daily_pom_counts(self):
+        """See Storage.backfill_daily_pom_counts."""
+        raise NotImplementedError
+
+    async def get_poms(
+        self,
+        *,
+        user: DiscordUser = None,
+        descript = None,
+        date_range: DateRange = None,
+        limit: int = None
+    ) -> List[Pom]:
+        """See Storage.get_poms."""
+        raise NotImplementedError
+
+    async def get_pom_summary(
+        self,
+        user: DiscordUser,
+        descript: Optional[str] = None,
+    ) -> List[PomSummary]:
+        """See Storage.get_pom_summary."""
+        raise NotImplementedError
+
+    async def add_new_event(self, name: str, goal: int, date_range: DateRange) -> Event:
+        """See Storage.add_new_event.
+
+        @return The new event.
+        """
+        raise NotImplementedError
+
+    async def get_all_events(self) -> List[Event]:
+        """See Storage.get_all_events."""
+        raise NotImplementedError
+
+    async def mark_event_goal_reached(self, event: Event) -> bool:
+        """See Storage.mark_event_goal_reached."""
+        raise NotImplementedError
+
+    async def delete_event(self, name: str) -> Optional[int]:
+        """See Storage.delete_event.
+
+        @return The id of the deleted event, if any.
+        """
+        raise NotImplementedError
+
+    async def add_user(self, user_id: str, zone: timezone, team: str):
+        """See Storage.add_user."""
+        raise NotImplementedError
+
+    async def set_user_timezone(self, user_id: str, zone: timezone):
+        """See Storage.set_user_timezone."""
+        raise NotImplementedError
+
+    async def update_user_team(self, user_id: str, team: str):
+        """See Storage.update_user_team."""
+        raise NotImplementedError
+
+    async def update_user_poms_descriptions(
+        self,
+        user: DiscordUser,
+        old_description: str,
+        new_description: str,
+        banked_poms_only: bool = False,
+        session_poms_only: bool = False,
+    ) -> int:
+        """See Storage.update_user_poms_descriptions."""
+        raise NotImplementedError
+
+    async def get_user_by_id(self, user_id: int) -> Optional[PombotUser]:
+        """See Storage.get_user_by_id."""
+        raise NotImplementedError
+
+    async def get_users_by_id(self, user_ids: Iterable[int]) -> Dict[int, PombotUser]:
+        """See Storage.get_users_by_id."""
+        raise NotImplementedError
+
+    async def get_all_users(self) -> List[PombotUser]:
+        """Return every user, to load the user directory."""
+        raise NotImplementedError
+
+    async def add_pom_war_action(
+        self,
+        user: DiscordUser,
+        team: str,
+        action_type: ActionType,
+        was_successful: bool,
+        was_critical: bool,
+        items_dropped: str,
+        damage: int,
+        time_set: dt,
+    ):
+        """See Storage.add_pom_war_action. The action, the team stats, the
+        user's daily actions and the user's streak are written atomically.
+        """
+        raise NotImplementedError
+
+    async def get_actions(
+        self,
+        *,
+        action_type: ActionType = None,
+        user: DiscordUser = None,
+        team: str = None,
+        was_successful = None,
+        date_range: DateRange = None,
+    ) -> List[Action]:
+        """See Storage.get_actions."""
+        raise NotImplementedError
+
+    async def get_action_context_rows(
+        self,
+        user: DiscordUser,
+        *,
+        actions_range: DateRange,
+        daily_actions_since: Optional[date],
+        include_streak: bool,
+    ) -> ActionContextRows:
+        """Return the rows for Storage.get_action_context in one round trip.
+
+        @param user The user taking the action.
+        @param actions_range Only match the user's actions within this range.
+        @param daily_actions_since The first day of daily counts to include,
+            or None to skip them.
+        @param include_streak Whether to include the user's streak.
+        @return ActionContextRows, with None in place of skipped parts.
+        """
+        raise NotImplementedError
+
+    async def count_rows_in_table(
+        self,
+        table: str,
+        *,
+        action_type: ActionType = None,
+        team: str = None,
+    ) -> int:
+        """See Storage.count_rows_in_table."""
+        raise NotImplementedError
+
+    async def sum_team_damage(self, team: str) -> int:
+        """See Storage.sum_team_damage."""
+        raise NotImplementedError
+
+    async def get_team_stats(self) -> Dict[str, TeamStats]:
+        """See Storage.get_team_stats."""
+        raise NotImplementedError
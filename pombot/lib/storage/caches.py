@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from pombot.config import Config
+from pombot.lib.types import ActionStreak, DailyActions
+
+
+class _UserCache:
+    """Per-user state of the most recently active users, kept current by
+    applying actions as they are committed, so that a hit needs no query at
+    all. At most `Config.USER_CACHE_SIZE` users are kept, evicting the least
+    recently used.
+    """
+    def __init__(self) -> None:
+        self._entries: OrderedDict = OrderedDict()
+        self._generation = 0
+        self._user_generations: Dict[int, int] = {}
+
+    def generation(self, user_id: int) -> Tuple[int, int]:
+        """Return a token which changes whenever an action of the user is
+        applied, or the cache is cleared.
+
+        Read it before querying storage and pass it to `put`, so that a
+        result which raced with one of the user's writes is not cached,
+        while writes by other users do not keep it from being cached.
+        """
+        return self._generation, self._user_generations.get(user_id, 0)
+
+    def clear(self) -> None:
+        """Forget every cached user."""
+        self._entries.clear()
+        self._user_generations.clear()
+        self._generation += 1
+
+    def _get(self, user_id: int):
+        if (entry := self._entries.get(user_id)) is not None:
+            self._entries.move_to_end(user_id)
+
+        return entry
+
+    def _put(self, user_id: int, entry, generation: Tuple[int, int]) -> None:
+        if generation != self.generation(user_id) or Config.USER_CACHE_SIZE <= 0:
+            return
+
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+
+        while len(self._entries) > Config.USER_CACHE_SIZE:
+            self._entries.popitem(last=False)
+
+    def _bump(self, user_id: int) -> None:
+        """Mark results read before the user's latest action as stale."""
+        self._user_generations[user_id] = self._user_generations.get(user_id, 0) + 1
+
+
+class _UserDailyActionsCache(_UserCache):
+    """The recent daily action counts of the most recently active users.
+
+    Each entry holds every day from its `since` date onward.
+    """
+    def get(self, user_id: int, since: date) -> Optional[Dict[date, DailyActions]]:
+        """Return the user's counts from `since` onward, or None on a miss."""
+        if (entry := self._get(user_id)) is None or entry[0] > since:
+            return None
+
+        entry_since, daily_actions = entry
+
+        if entry_since < since:
+            # Days before the averaging period will never be asked for again.
+            daily_actions = {day: daily for day, daily in daily_actions.items()
+                             if day >= since}
+            self._entries[user_id] = since, daily_actions
+
+        return dict(daily_actions)
+
+    def put(
+        self,
+        user_id: int,
+        since: date,
+        daily_actions: Dict[date, DailyActions],
+        generation: Tuple[int, int],
+    ) -> None:
+        """Cache the user's counts from `since` onward, as read from storage
+        when `generation` was current.
+        """
+        self._put(user_id, (since, dict(daily_actions)), generation)
+
+    def add(self, user_id: int, action_date: date, was_successful: bool) -> None:
+        """Count a committed action toward the user's cached totals."""
+        self._bump(user_id)
+
+        if (entry := self._entries.get(user_id)) is None or entry[0] > action_date:
+            return
+
+        daily_actions = entry[1]
+        daily_actions[action_date] = daily_actions.get(
+            action_date, DailyActions(action_date)).add(was_successful)
+
+
+class _UserStreaksCache(_UserCache):
+    """The streaks of unsuccessful actions of the most recently active users."""
+    def get(self, user_id: int) -> Optional[ActionStreak]:
+        """Return the user's streak, or None on a miss."""
+        return self._get(user_id)
+
+    def put(self, user_id: int, streak: ActionStreak, generation: Tuple[int, int]) -> None:
+        """Cache the user's streak, as read from storage when `generation`
+        was current.
+        """
+        self._put(user_id, streak, generation)
+
+    def add(self, user_id: int, action_date: date, was_successful: bool) -> None:
+        """Apply a committed action to the user's cached streak."""
+        self._bump(user_id)
+
+        if (streak := self._entries.get(user_id)) is not None:
+            self._entries[user_id] = streak.add(action_date, was_successful)
+
+
+# Exports
+UserDailyActionsCache = _UserDailyActionsCache()
+UserStreaksCache = _UserStreaksCache()
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+from pombot.config import Config
+
+
+class _GroupCommit:
+    """Writes which are queued for a moment and then committed together, in
+    one transaction.
+
+    A group is committed `Config.WRITE_BATCH_DELAY_MS` after its first write
+    was queued, or as soon as it holds `Config.WRITE_BATCH_MAX_ROWS` rows.
+    Each write resolves only once the transaction holding it has committed,
+    so a write which returned is as durable as one committed on its own.
+    When a group fails, its writes are retried one at a time, so that a bad
+    write fails only its own caller.
+
+    @param commit Coroutine function which commits a list of writes in one
+        transaction, returning the result of each write.
+    """
+    def __init__(self, commit: Callable[[List[Any]], Awaitable[List[Any]]]) -> None:
+        self._commit = commit
+        self._queue: List[Tuple[Any, asyncio.Future]] = []
+        self._num_rows = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def submit(self, write: Any, rows: int = 1) -> Any:
+        """Queue `write`, which holds `rows` rows, and return its result once
+        it is committed.
+
+        Cancelling the caller does not withdraw the write.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((write, future))
+        self._num_rows += rows
+
+        if self._num_rows >= Config.WRITE_BATCH_MAX_ROWS:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(Config.WRITE_BATCH_DELAY_MS / 1000, self._flush)
+
+        return await asyncio.shield(future)
+
+    async def drain(self) -> None:
+        """Commit the queued writes now, and wait for every group in flight."""
+        self._flush()
+
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _flush(self) -> None:
+        """Start committing the queued writes as one group."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._queue:
+            return
+
+        group, self._queue, self._num_rows = self._queue, [], 0
+        task = asyncio.ensure_future(self._commit_group(group))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _commit_group(self, group: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            results = await self._commit([write for write, _ in group])
+        except Exception as exc:  # pylint: disable=broad-except
+            if len(group) == 1:
+                _resolve(group[0][1], exception=exc)
+                return
+
+            for write, future in group:
+                try:
+                    result, = await self._commit([write])
+                except Exception as write_exc:  # pylint: disable=broad-except
+                    _resolve(future, exception=write_exc)
+                else:
+                    _resolve(future, result)
+        else:
+            for (_, future), result in zip(group, results):
+                _resolve(future, result)
+
+
+def _resolve(future: asyncio.Future, result: Any = None, *, exception: Exception = None):
+    """Settle a write's future, unless it was already settled."""
+    if future.done():
+        return
+
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
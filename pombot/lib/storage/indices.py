@@ -0,0 +1,338 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import replace
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from pombot.lib.types import DateRange, Event, User
+
+
+class _FenwickTree:
+    """Prefix sums of a list of counts, where both updating a count and
+    summing a prefix take O(log n).
+    """
+    def __init__(self, counts: List[int]) -> None:
+        self._tree = [0, *counts]
+
+        for index in range(1, len(self._tree)):
+            if (parent := index + (index & -index)) < len(self._tree):
+                self._tree[parent] += self._tree[index]
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def add(self, index: int, value: int) -> None:
+        """Add `value` to the count at `index`."""
+        index += 1
+
+        while index < len(self._tree):
+            self._tree[index] += value
+            index += index & -index
+
+    def prefix_sum(self, end: int) -> int:
+        """Return the sum of the counts before `end`."""
+        total = 0
+        end = min(end, len(self))
+
+        while end > 0:
+            total += self._tree[end]
+            end -= end & -end
+
+        return total
+
+
+class _DailyPomCounts:
+    """The number of poms logged on each day, indexed so that the poms in
+    any range of days are counted in O(log days).
+
+    The counts mirror the daily pom counts table. They are loaded once and
+    then kept current by applying poms as they are added and deleted.
+    """
+    def __init__(self) -> None:
+        self._counts: Dict[date, int] = {}
+        self._first_day: Optional[date] = None
+        self._tree = _FenwickTree([])
+        self._generation = 0
+        self.is_loaded = False
+
+    @property
+    def generation(self) -> int:
+        """A number which changes whenever poms are applied.
+
+        Read it before querying storage and pass it to `load`, so that counts
+        which raced with a write are not loaded.
+        """
+        return self._generation
+
+    def load(self, counts: Dict[date, int], generation: int) -> None:
+        """Replace every count with those in `counts`."""
+        if generation != self._generation:
+            return
+
+        self._counts = {day: count for day, count in counts.items() if count}
+        self._rebuild()
+        self.is_loaded = True
+
+    def clear(self) -> None:
+        """Forget every count, until counts are next loaded."""
+        self._counts = {}
+        self._rebuild()
+        self._generation += 1
+        self.is_loaded = False
+
+    def add(self, day: date, count: int) -> None:
+        """Apply `count` poms logged (or, when negative, deleted) on `day`."""
+        self._generation += 1
+
+        if not self.is_loaded or not count:
+            return
+
+        self._counts[day] = self._counts.get(day, 0) + count
+
+        if not self._counts[day]:
+            del self._counts[day]
+
+        if self._first_day is None or not 0 <= (day - self._first_day).days < len(self._tree):
+            self._rebuild(day)
+        else:
+            self._tree.add((day - self._first_day).days, count)
+
+    def count(self, first_day: date = None, last_day: date = None) -> int:
+        """Return the number of poms logged from `first_day` to `last_day`,
+        inclusive. Either end may be omitted to leave it unbounded.
+        """
+        if self._first_day is None:
+            return 0
+
+        end = len(self._tree) if last_day is None else (last_day - self._first_day).days + 1
+        start = 0 if first_day is None else (first_day - self._first_day).days
+
+        if end <= start:
+            return 0
+
+        return self._tree.prefix_sum(end) - self._tree.prefix_sum(max(start, 0))
+
+    def _rebuild(self, new_day: date = None) -> None:
+        """Rebuild the tree over every day with a count, leaving room for as
+        many days again after the last one so that new days rarely need a
+        rebuild.
+        """
+        days = [*self._counts, *([new_day] if new_day else [])]
+
+        if not days:
+            self._first_day, self._tree = None, _FenwickTree([])
+            return
+
+        self._first_day = min(days)
+        num_days = (max(days) - self._first_day).days + 1
+        counts = [0] * (2 * num_days)
+
+        for day, count in self._counts.items():
+            counts[(day - self._first_day).days] = count
+
+        self._tree = _FenwickTree(counts)
+
+
+class _EventCalendar:
+    """Every event, with its pom count, sorted by start date so that the
+    events around any moment or range are found with a binary search.
+
+    The calendar is loaded once and then kept current by applying event and
+    pom changes as they are committed, so reading it needs no query at all.
+    """
+    def __init__(self) -> None:
+        self._events: List[Event] = []
+        self._start_dates: List[datetime] = []
+        self._listeners: List[Callable[[], None]] = []
+        self._generation = 0
+        self.is_loaded = False
+
+    @property
+    def generation(self) -> int:
+        """A number which changes whenever events or poms are applied.
+
+        Read it before querying storage and pass it to `load`, so that
+        events which raced with a write are not loaded.
+        """
+        return self._generation
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Call `listener` whenever events are loaded, added or removed."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], None]) -> None:
+        """Stop calling a listener added with `add_listener`."""
+        self._listeners.remove(listener)
+
+    def load(self, events: List[Event], generation: int) -> None:
+        """Replace every event with those in `events`."""
+        if generation != self._generation:
+            return
+
+        self._events = sorted((replace(event) for event in events),
+                              key=lambda event: (event.start_date, event.event_id))
+        self._start_dates = [event.start_date for event in self._events]
+        self.is_loaded = True
+        self._changed()
+
+    def clear(self) -> None:
+        """Forget every event, until events are next loaded."""
+        self._events, self._start_dates = [], []
+        self._generation += 1
+        self.is_loaded = False
+        self._changed()
+
+    def add(self, event: Event) -> None:
+        """Apply a committed new event."""
+        self._generation += 1
+
+        if not self.is_loaded:
+            return
+
+        index = bisect_right(self._start_dates, event.start_date)
+        self._events.insert(index, replace(event))
+        self._start_dates.insert(index, event.start_date)
+        self._changed()
+
+    def remove(self, event_id: int) -> None:
+        """Apply a committed event deletion."""
+        self._generation += 1
+
+        for index, event in enumerate(self._events):
+            if event.event_id == event_id:
+                del self._events[index], self._start_dates[index]
+                self._changed()
+                break
+
+    def add_poms(self, time_set: datetime, count: int) -> None:
+        """Count committed poms (or, when negative, deleted poms) toward the
+        events they were logged in.
+        """
+        self._generation += 1
+
+        for event in self._events_started_by(time_set):
+            if event.contains(time_set):
+                event.pom_count += count
+
+    def mark_goal_reached(self, event_id: int) -> None:
+        """Apply a committed goal to the event."""
+        self._generation += 1
+
+        for event in self._events:
+            if event.event_id == event_id:
+                event.goal_reached = True
+
+    def get_all(self) -> List[Event]:
+        """Return every event, in order of start date."""
+        return [replace(event) for event in self._events]
+
+    def get_ongoing(self, moment: datetime) -> List[Event]:
+        """Return the events which are ongoing at `moment`."""
+        return [replace(event) for event in self._events_started_by(moment)
+                if event.contains(moment)]
+
+    def get_overlapping(self, date_range: DateRange) -> List[Event]:
+        """Return the events which overlap with `date_range`."""
+        events = self._events[:bisect_left(self._start_dates, date_range.end_date)]
+
+        return [replace(event) for event in events if date_range.start_date < event.end_date]
+
+    def get_transitions(self, after: datetime, until: datetime) -> List[Tuple[datetime, Event]]:
+        """Return each start and end of an event which falls after `after`,
+        and no later than `until`, in order, along with its event.
+        """
+        transitions = [
+            (moment, replace(event)) for event in self._events
+            for moment in (event.start_date, event.end_date)
+            if after < moment <= until
+        ]
+
+        return sorted(transitions, key=lambda transition: transition[0])
+
+    def get_next_transition(self, after: datetime) -> Optional[datetime]:
+        """Return the first start or end of an event after `after`."""
+        return min((moment for event in self._events
+                    for moment in (event.start_date, event.end_date)
+                    if moment > after), default=None)
+
+    def _events_started_by(self, moment: datetime) -> List[Event]:
+        """Return the events which start no later than `moment`."""
+        return self._events[:bisect_right(self._start_dates, moment)]
+
+    def _changed(self) -> None:
+        """Tell the listeners that events have changed."""
+        for listener in self._listeners:
+            listener()
+
+
+class _UserDirectory:
+    """Every user, by user ID, so that users are looked up without a query.
+
+    The directory is loaded once and then kept current by invalidating a
+    user whenever their row is written. An invalidated user is read from
+    storage again on their next lookup.
+    """
+    def __init__(self) -> None:
+        self._users: Dict[int, User] = {}
+        self._stale: Set[int] = set()
+        self._generation = 0
+        self.is_loaded = False
+
+    @property
+    def generation(self) -> int:
+        """A number which changes whenever a user is invalidated.
+
+        Read it before querying storage and pass it to `load` or `put`, so
+        that users which raced with a write are not loaded.
+        """
+        return self._generation
+
+    def load(self, users: Iterable[User], generation: int) -> None:
+        """Replace every user with those in `users`."""
+        if generation != self._generation:
+            return
+
+        self._users = {user.user_id: user for user in users}
+        self._stale = set()
+        self.is_loaded = True
+
+    def clear(self) -> None:
+        """Forget every user, until users are next loaded."""
+        self._users, self._stale = {}, set()
+        self._generation += 1
+        self.is_loaded = False
+
+    def invalidate(self, user_id: int) -> None:
+        """Apply a committed write to the user's row."""
+        self._generation += 1
+
+        if self.is_loaded:
+            self._users.pop(int(user_id), None)
+            self._stale.add(int(user_id))
+
+    def has(self, user_id: int) -> bool:
+        """Return whether the user is known to the directory, either as a
+        user or as not being one.
+        """
+        return self.is_loaded and int(user_id) not in self._stale
+
+    def get(self, user_id: int) -> Optional[User]:
+        """Return the user, or None when there is no such user."""
+        return self._users.get(int(user_id))
+
+    def put(self, user_id: int, user: Optional[User], generation: int) -> None:
+        """Replace an invalidated user with their row (or None, when they
+        have no row) as read from storage when `generation` was current.
+        """
+        if generation != self._generation or not self.is_loaded:
+            return
+
+        self._stale.discard(int(user_id))
+
+        if user is not None:
+            self._users[int(user_id)] = user
+
+
+# Exports
+DailyPomCounts = _DailyPomCounts()
+EventCalendar = _EventCalendar()
+UserDirectory = _UserDirectory()
@@ -0,0 +1,110 @@
+import asyncio
+from typing import (Awaitable, Callable, Dict, Hashable, Iterable, List,
+                    Optional, Set, TypeVar)
+
+_Key = TypeVar("_Key", bound=Hashable)
+_Value = TypeVar("_Value")
+
+
+class _SingleFlight:
+    """Identical reads which are in flight at the same time, sharing one
+    query between them.
+
+    A read joins another only while that one is in flight, and every write
+    calls `forget`, so a caller never receives a result which was read
+    before its own write was committed.
+    """
+    def __init__(self) -> None:
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    async def load(self, key: Hashable, read: Callable[[], Awaitable[_Value]]) -> _Value:
+        """Return the result of `read()`, sharing it with every other call
+        made with the same `key` while it is in flight.
+
+        Cancelling one caller does not cancel the read for the others.
+        """
+        if (task := self._in_flight.get(key)) is None:
+            task = self._in_flight[key] = asyncio.ensure_future(read())
+            task.add_done_callback(lambda _: self._discard(key, task))
+
+        return await asyncio.shield(task)
+
+    def forget(self) -> None:
+        """Let reads made from now on start their own query."""
+        self._in_flight.clear()
+
+    def _discard(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+
+class _BatchLoader:
+    """Lookups of single keys, merged with every other lookup made in the
+    same tick of the event loop into one batched read.
+
+    @param read_many Coroutine function which reads many keys at once,
+        returning the value of each key found.
+    """
+    def __init__(self, read_many: Callable[[List[_Key]], Awaitable[Dict[_Key, _Value]]]) -> None:
+        self._read_many = read_many
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[_Key, asyncio.Future] = {}
+        self._reads: Set[asyncio.Task] = set()
+
+    async def load(self, key: _Key) -> Optional[_Value]:
+        """Return the value of `key`, or None when it was not found."""
+        return (await self.load_many([key])).get(key)
+
+    async def load_many(self, keys: Iterable[_Key]) -> Dict[_Key, _Value]:
+        """Return the value of each key which was found."""
+        if not (keys := list(keys)):
+            return {}
+
+        loop = asyncio.get_running_loop()
+
+        if loop is not self._loop:
+            # A batch left by a loop which closed before dispatching it will
+            # never be read.
+            self._loop, self._pending = loop, {}
+
+        if not self._pending:
+            loop.call_soon(self._dispatch)
+
+        futures = {key: self._pending.setdefault(key, loop.create_future()) for key in keys}
+        values = {}
+
+        for key, future in futures.items():
+            if (value := await asyncio.shield(future)) is not None:
+                values[key] = value
+
+        return values
+
+    def _dispatch(self) -> None:
+        """Read every key looked up since the last dispatch."""
+        batch, self._pending = self._pending, {}
+
+        # The event loop only keeps weak references to tasks.
+        task = asyncio.ensure_future(self._read(batch))
+        self._reads.add(task)
+        task.add_done_callback(self._reads.discard)
+
+    async def _read(self, batch: Dict[_Key, asyncio.Future]) -> None:
+        try:
+            values = await self._read_many(list(batch))
+        except Exception as exc:  # pylint: disable=broad-except
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(values.get(key))
+        finally:
+            # A cancelled read settles nothing above, so cancel its lookups
+            # rather than leave them waiting forever.
+            for future in batch.values():
+                future.cancel()
+
+
+# Exports
+SharedReads = _SingleFlight()
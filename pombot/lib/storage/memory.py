@@ -0,0 +1,440 @@
+import itertools
+from collections import Counter, defaultdict
+from dataclasses import replace
+from datetime import date
+from datetime import datetime as dt
+from datetime import timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from discord.user import User as DiscordUser
+
+import pombot.lib.pom_wars.errors as war_crimes
+from pombot.config import Config
+from pombot.lib.storage.backend import (_TEAM_STATS_ACTION_COLUMNS,
+                                        ActionContextRows, StorageBackend,
+                                        _check_description, _check_new_event,
+                                        _check_session_type, _pom_rows,
+                                        _raw_damage, _zone_str)
+from pombot.lib.types import (AVERAGED_ACTION_TYPES, Action, ActionStreak,
+                              ActionType, DailyActions, DateRange, Event, Pom,
+                              PomSummary, SessionType, TeamStats)
+from pombot.lib.types import User as PombotUser
+
+
+class MemoryBackend(StorageBackend):
+    """Storage in dicts inside the bot process, for unit tests and
+    benchmarks.
+
+    Rows are kept by their primary key and indexed by the columns which the
+    queries filter on, so every query is a dict lookup rather than a round
+    trip. Nothing survives the process.
+
+    Each method runs without awaiting, so it is a transaction of its own.
+    Rows are copied on the way out, so that callers can no more change the
+    stored rows than they could change a database.
+    """
+    def __init__(self) -> None:
+        # Like AUTO_INCREMENT, ids are not reused after rows are deleted.
+        self._pom_ids = itertools.count(1)
+        self._event_ids = itertools.count(1)
+        self._action_ids = itertools.count(1)
+
+        self._poms: Dict[int, Pom] = {}
+        self._poms_by_user: Dict[int, Dict[int, Pom]] = defaultdict(dict)
+
+        self._events: Dict[int, Event] = {}
+        self._events_by_name: Dict[str, Dict[int, Event]] = defaultdict(dict)
+
+        self._users: Dict[int, PombotUser] = {}
+        self._users_by_team: Dict[str, Set[int]] = defaultdict(set)
+
+        self._actions: Dict[int, Action] = {}
+        self._actions_by_user: Dict[int, List[Action]] = defaultdict(list)
+        self._actions_by_type: Dict[str, List[Action]] = defaultdict(list)
+
+        self._daily_pom_counts: Dict[date, int] = {}
+        self._team_stats: Dict[str, TeamStats] = {}
+        self._daily_actions: Dict[int, Dict[date, DailyActions]] = defaultdict(dict)
+        self._streaks: Dict[int, ActionStreak] = {}
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def create_tables_if_not_exists(self):
+        pass
+
+    async def delete_all_rows_from_all_tables(self):
+        for rows in (self._poms, self._poms_by_user, self._events,
+                     self._events_by_name, self._users, self._users_by_team,
+                     self._actions, self._actions_by_user,
+                     self._actions_by_type, self._daily_pom_counts, self._team_stats,
+                     self._daily_actions, self._streaks):
+            rows.clear()
+
+    def _increment_team_stats(self, team: str, **increments):
+        """Add to a team's running totals, keyed by TeamStats field name."""
+        stats = self._team_stats.setdefault(team, TeamStats(team))
+
+        for field, increment in increments.items():
+            setattr(stats, field, getattr(stats, field) + increment)
+
+    def _increment_daily_pom_counts(self, poms: Iterable[Pom], increment: int):
+        """Add `increment` to the count of each pom's day."""
+        for pom in poms:
+            day = pom.time_set.date()
+            self._daily_pom_counts[day] = self._daily_pom_counts.get(day, 0) + increment
+
+    def _increment_event_pom_counts(self, poms: Iterable[Pom], increment: int):
+        """Add `increment` to the pom count of each event for each of `poms`
+        which counts toward it.
+        """
+        for event in self._events.values():
+            event.pom_count += increment * sum(1 for pom in poms if event.contains(pom.time_set))
+
+    def _user_poms(
+        self,
+        user: DiscordUser,
+        *,
+        session: Optional[SessionType] = None,
+    ) -> List[Pom]:
+        """Return the user's poms, optionally only those of one session."""
+        poms = self._poms_by_user.get(user.id, {}).values()
+
+        if session:
+            current_session = int(session == SessionType.CURRENT)
+            return [pom for pom in poms if pom.session == current_session]
+
+        return list(poms)
+
+    async def add_poms_to_user_session(
+        self,
+        user: DiscordUser,
+        descript: Optional[Union[str, Iterable]],
+        count: int,
+        time_set: dt = None,
+    ) -> int:
+        poms = [Pom(next(self._pom_ids), user_id, pom_descript, pom_time_set, 1)
+                for user_id, pom_descript, pom_time_set
+                in _pom_rows(user, descript, count, time_set)]
+
+        for pom in poms:
+            self._poms[pom.pom_id] = self._poms_by_user[pom.user_id][pom.pom_id] = pom
+
+        self._increment_daily_pom_counts(poms, 1)
+        self._increment_event_pom_counts(poms, 1)
+
+        return len(poms)
+
+    async def bank_user_session_poms(self, user: DiscordUser) -> int:
+        poms = self._user_poms(user, session=SessionType.CURRENT)
+
+        for pom in poms:
+            pom.session = 0
+
+        return len(poms)
+
+    async def delete_poms(
+        self,
+        *,
+        user: DiscordUser,
+        time_set: dt = None,
+        session: SessionType = None,
+     ) -> Dict[dt, int]:
+        if session:
+            _check_session_type(session)
+
+        poms = [pom for pom in self._user_poms(user, session=session)
+                if not time_set or pom.time_set == time_set]
+
+        for pom in poms:
+            del self._poms[pom.pom_id]
+            del self._poms_by_user[user.id][pom.pom_id]
+
+        self._increment_daily_pom_counts(poms, -1)
+        self._increment_event_pom_counts(poms, -1)
+
+        return dict(Counter(pom.time_set for pom in poms))
+
+    async def get_daily_pom_counts(self) -> Dict[date, int]:
+        return {day: count for day, count in self._daily_pom_counts.items() if count}
+
+    async def backfill_daily_pom_counts(self):
+        self._daily_pom_counts.clear()
+        self._increment_daily_pom_counts(self._poms.values(), 1)
+
+    async def get_poms(
+        self,
+        *,
+        user: DiscordUser = None,
+        descript = None,
+        date_range: DateRange = None,
+        limit: int = None
+    ) -> List[Pom]:
+        poms = self._user_poms(user) if user else self._poms.values()
+
+        if descript:
+            poms = [pom for pom in poms if pom.descript == descript]
+
+        if date_range:
+            poms = [pom for pom in poms
+                    if date_range.start_date <= pom.time_set <= date_range.end_date]
+
+        if limit:
+            poms = sorted(poms, key=lambda pom: pom.time_set, reverse=True)[:limit]
+
+        return [replace(pom) for pom in poms]
+
+    async def get_pom_summary(
+        self,
+        user: DiscordUser,
+        descript: Optional[str] = None,
+    ) -> List[PomSummary]:
+        # Poms are kept in id order, so groups are met in order of their
+        # first pom.
+        summary: Dict[Tuple[Optional[str], int], PomSummary] = {}
+
+        for pom in self._user_poms(user):
+            if descript and pom.descript != descript:
+                continue
+
+            key = pom.descript, pom.session
+
+            if (group := summary.get(key)) is None:
+                summary[key] = PomSummary(pom.descript, pom.session, 1, pom.time_set)
+            else:
+                summary[key] = replace(group, count=group.count + 1,
+                                       first_time_set=min(group.first_time_set, pom.time_set))
+
+        return list(summary.values())
+
+    async def add_new_event(self, name: str, goal: int, date_range: DateRange) -> Event:
+        _check_new_event(name, goal)
+        event = Event(next(self._event_ids), name, goal, date_range.start_date,
+                      date_range.end_date)
+
+        # Events can start before they are created, so the poms already
+        # logged in the event are counted as it is added.
+        event.pom_count = sum(1 for pom in self._poms.values() if event.contains(pom.time_set))
+        self._events[event.event_id] = self._events_by_name[name][event.event_id] = event
+
+        return replace(event)
+
+    async def get_all_events(self) -> List[Event]:
+        # Tech debt: merge this function into `get_events`.
+        return [replace(event) for event in
+                sorted(self._events.values(), key=lambda event: event.start_date)]
+
+    async def mark_event_goal_reached(self, event: Event) -> bool:
+        stored_event = self._events.get(event.event_id)
+
+        if stored_event is None or stored_event.goal_reached:
+            return False
+
+        stored_event.goal_reached = True
+        return True
+
+    async def delete_event(self, name: str) -> Optional[int]:
+        events = self._events_by_name.get(name)
+
+        if not events:
+            return None
+
+        event = min(events.values(), key=lambda event: event.start_date)
+        del self._events[event.event_id]
+        del events[event.event_id]
+
+        return event.event_id
+
+    async def add_user(self, user_id: str, zone: timezone, team: str):
+        user_id = int(user_id)
+
+        if (user := self._users.get(user_id)) is not None:
+            raise war_crimes.UserAlreadyExistsError(user.team)
+
+        self._users[user_id] = PombotUser(user_id, _zone_str(zone), team, None, 1, 1, 1, 1)
+        self._users_by_team[team].add(user_id)
+        self._increment_team_stats(team, population=1)
+
+    async def set_user_timezone(self, user_id: str, zone: timezone):
+        user_id = int(user_id)
+
+        if (user := self._users.get(user_id)) is not None:
+            self._users[user_id] = replace(user, timezone=_zone_str(zone))
+
+    async def update_user_team(self, user_id: str, team: str):
+        user_id = int(user_id)
+        user = self._users.get(user_id)
+
+        if user is None or user.team == team:
+            return
+
+        self._users[user_id] = replace(user, team=team)
+        self._users_by_team[user.team].discard(user_id)
+        self._users_by_team[team].add(user_id)
+        self._increment_team_stats(user.team, population=-1)
+        self._increment_team_stats(team, population=1)
+
+    async def update_user_poms_descriptions(
+        self,
+        user: DiscordUser,
+        old_description: str,
+        new_description: str,
+        banked_poms_only: bool = False,
+        session_poms_only: bool = False,
+    ) -> int:
+        if banked_poms_only and session_poms_only:
+            raise RuntimeError("Only one of banked_poms_only or session_poms_only allowed.")
+
+        _check_description(new_description)
+        session = (SessionType.BANKED if banked_poms_only else
+                   SessionType.CURRENT if session_poms_only else None)
+
+        # Like the SQL `descript = NULL`, a missing description matches
+        # nothing.
+        poms = [pom for pom in self._user_poms(user, session=session)
+                if old_description is not None and pom.descript == old_description]
+
+        for pom in poms:
+            pom.descript = new_description
+
+        return len(poms)
+
+    async def get_user_by_id(self, user_id: int) -> Optional[PombotUser]:
+        try:
+            return self._users[int(user_id)]
+        except KeyError as exc:
+            raise war_crimes.UserDoesNotExistError() from exc
+
+    async def get_users_by_id(self, user_ids: Iterable[int]) -> Dict[int, PombotUser]:
+        return {user_id: self._users[user_id] for user_id in map(int, user_ids)
+                if user_id in self._users}
+
+    async def get_all_users(self) -> List[PombotUser]:
+        return list(self._users.values())
+
+    async def add_pom_war_action(
+        self,
+        user: DiscordUser,
+        team: str,
+        action_type: ActionType,
+        was_successful: bool,
+        was_critical: bool,
+        items_dropped: str,
+        damage: int,
+        time_set: dt,
+    ):
+        raw_damage = _raw_damage(damage)
+        action = Action(next(self._action_ids), user.id, team, action_type.value,
+                        int(bool(was_successful)),
+                        None if was_critical is None else int(bool(was_critical)),
+                        items_dropped, raw_damage, time_set)
+
+        self._actions[action.action_id] = action
+        self._actions_by_user[user.id].append(action)
+        self._actions_by_type[action.type].append(action)
+
+        self._increment_team_stats(team, **{
+            "raw_damage": raw_damage,
+            _TEAM_STATS_ACTION_COLUMNS[action_type]: 1,
+        })
+
+        action_date = time_set.date()
+
+        if action_type in AVERAGED_ACTION_TYPES:
+            daily_actions = self._daily_actions[user.id]
+            daily_actions[action_date] = daily_actions.get(
+                action_date, DailyActions(action_date)).add(was_successful)
+
+        self._streaks[user.id] = self._streaks.get(
+            user.id, ActionStreak()).add(action_date, was_successful)
+
+    async def get_actions(
+        self,
+        *,
+        action_type: ActionType = None,
+        user: DiscordUser = None,
+        team: str = None,
+        was_successful = None,
+        date_range: DateRange = None,
+    ) -> List[Action]:
+        if user:
+            actions = self._actions_by_user.get(user.id, [])
+        elif action_type:
+            actions = self._actions_by_type.get(action_type.value, [])
+        else:
+            actions = self._actions.values()
+
+        return [
+            replace(action) for action in actions
+            if (not action_type or action.type == action_type.value)
+            and (not team or action.team == team)
+            and (was_successful is None or bool(action.was_successful) == bool(was_successful))
+            and (not date_range
+                 or date_range.start_date <= action.timestamp <= date_range.end_date)
+        ]
+
+    async def get_action_context_rows(
+        self,
+        user: DiscordUser,
+        *,
+        actions_range: DateRange,
+        daily_actions_since: Optional[date],
+        include_streak: bool,
+    ) -> ActionContextRows:
+        actions = sorted(
+            (action for action in self._actions_by_user.get(user.id, [])
+             if actions_range.start_date <= action.timestamp <= actions_range.end_date),
+            key=lambda action: (action.timestamp, action.action_id),
+        )
+
+        daily_actions = streak = None
+
+        if daily_actions_since is not None:
+            daily_actions = {
+                action_date: daily
+                for action_date, daily in self._daily_actions.get(user.id, {}).items()
+                if action_date >= daily_actions_since
+            }
+
+        if include_streak:
+            streak = self._streaks.get(user.id, ActionStreak())
+
+        return (
+            self._users.get(user.id),
+            [replace(action) for action in actions],
+            daily_actions,
+            streak,
+        )
+
+    async def count_rows_in_table(
+        self,
+        table: str,
+        *,
+        action_type: ActionType = None,
+        team: str = None,
+    ) -> int:
+        if table == Config.USERS_TABLE and not action_type:
+            if team:
+                return len(self._users_by_team.get(team, ()))
+
+            return len(self._users)
+
+        if table != Config.ACTIONS_TABLE:
+            raise RuntimeError(f"Cannot count the rows of table: {table}")
+
+        if action_type:
+            actions = self._actions_by_type.get(action_type.value, [])
+        else:
+            actions = self._actions.values()
+
+        return sum(1 for action in actions if not team or action.team == team)
+
+    async def sum_team_damage(self, team: str) -> int:
+        return sum(action.raw_damage for action in self._actions.values()
+                   if action.team == team and action.raw_damage is not None)
+
+    async def get_team_stats(self) -> Dict[str, TeamStats]:
+        return {team: replace(stats) for team, stats in self._team_stats.items()}
@@ -0,0 +1,476 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Optional, Sequence, Set, Tuple
+
+import aiomysql
+
+from pombot.config import Config, Secrets
+from pombot.lib.storage.backend import _TEAM_STATS_ACTION_COLUMNS
+from pombot.lib.storage.sql import SQLBackend
+from pombot.lib.types import AVERAGED_ACTION_TYPES
+
+_log = logging.getLogger(__name__)
+
+
+class _ConnectionPool:
+    """A pool of reusable MySQL connections shared by every Storage method.
+
+    Opening a connection costs a TCP and authentication handshake, which is
+    often more expensive than the query itself. The pool keeps between
+    `Config.MYSQL_POOL_MIN_SIZE` and `Config.MYSQL_POOL_MAX_SIZE`
+    connections open and hands them out to callers.
+
+    The pool is normally opened in `on_ready`, but it is also opened lazily
+    on first use so that unit tests and scripts need no setup.
+    """
+    def __init__(self) -> None:
+        self._pool: Optional[aiomysql.Pool] = None
+        self._opening: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def open(self) -> aiomysql.Pool:
+        """Return the running pool, starting it first if necessary."""
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop:
+            # Connections are bound to the loop which opened them. Unit tests
+            # run each case in a fresh loop, so the old pool is unusable.
+            self._pool, self._opening, self._loop = None, None, loop
+
+        if self._pool is not None:
+            return self._pool
+
+        if self._opening is None:
+            self._opening = loop.create_task(aiomysql.create_pool(
+                minsize=Config.MYSQL_POOL_MIN_SIZE,
+                maxsize=Config.MYSQL_POOL_MAX_SIZE,
+                pool_recycle=Config.MYSQL_POOL_RECYCLE_SECONDS,
+                db=Secrets.MYSQL_DATABASE,
+                host=Secrets.MYSQL_HOST,
+                user=Secrets.MYSQL_USER,
+                password=Secrets.MYSQL_PASSWORD,
+                loop=loop,
+                charset="utf8",
+            ))
+
+        try:
+            self._pool = await asyncio.shield(self._opening)
+        except Exception:
+            self._opening = None
+            raise
+
+        _log.info("Opened MySQL connection pool (min %s, max %s)",
+                  self._pool.minsize, self._pool.maxsize)
+
+        return self._pool
+
+    async def close(self) -> None:
+        """Stop handing out connections and wait for the ones in use to be
+        returned before closing them all.
+        """
+        pool, loop = self._pool, self._loop
+        self._pool, self._opening, self._loop = None, None, None
+
+        if pool is None or loop is not asyncio.get_running_loop():
+            return
+
+        pool.close()
+        await pool.wait_closed()
+        _log.info("Closed MySQL connection pool")
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Check out a healthy connection for the duration of the context."""
+        pool = await self.open()
+
+        async with pool.acquire() as connection:
+            idle_seconds = self._loop.time() - connection.last_usage
+
+            if idle_seconds > Config.MYSQL_POOL_IDLE_PING_SECONDS:
+                # The server may have dropped the connection while it sat in
+                # the pool; reconnect transparently if so.
+                await connection.ping(reconnect=True)
+
+            yield connection
+
+
+_pool = _ConnectionPool()
+
+
+def _create_index(table: str, index: str, columns: Sequence[str]) -> dict:
+    """Return a migration step which creates an index, unless it exists."""
+    return {
+        "query": f"CREATE INDEX {index} ON {table} ({', '.join(columns)});",
+        "exists_query": ("""
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE()
+            AND table_name = %s
+            AND index_name = %s
+            LIMIT 1;
+        """, (table, index)),
+    }
+
+
+def _add_column(table: str, column: str, definition: str) -> dict:
+    """Return a migration step which adds a column, unless it exists."""
+    return {
+        "query": f"ALTER TABLE {table} ADD COLUMN {column} {definition};",
+        "exists_query": ("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = DATABASE()
+            AND table_name = %s
+            AND column_name = %s
+            LIMIT 1;
+        """, (table, column)),
+    }
+
+
+class MySQLBackend(SQLBackend):
+    """Storage in a MySQL server, reached through a connection pool."""
+    TABLES = [
+        {
+            "name": Config.POMS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.POMS_TABLE} (
+                    id INT(11) NOT NULL AUTO_INCREMENT,
+                    userID BIGINT(20),
+                    descript VARCHAR(30),
+                    time_set TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    current_session TINYINT(1),
+                    PRIMARY KEY(id)
+                );
+            """
+        },
+        {
+            "name": Config.EVENTS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.EVENTS_TABLE} (
+                    id INT(11) NOT NULL AUTO_INCREMENT,
+                    event_name VARCHAR(100) NOT NULL,
+                    pom_goal INT(11),
+                    start_date TIMESTAMP NOT NULL,
+                    end_date TIMESTAMP NOT NULL,
+                    PRIMARY KEY(id)
+                );
+            """
+        },
+        {
+            "name": Config.USERS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.USERS_TABLE} (
+                    userID BIGINT(20) NOT NULL UNIQUE,
+                    timezone VARCHAR(8) NOT NULL,
+                    team VARCHAR(10) NOT NULL,
+                    inventory_string TEXT(30000),
+                    player_level TINYINT(1) NOT NULL DEFAULT 1,
+                    attack_level TINYINT(1) NOT NULL DEFAULT 1,
+                    heavy_attack_level TINYINT(1) NOT NULL DEFAULT 1,
+                    defend_level TINYINT(1) NOT NULL DEFAULT 1,
+                    PRIMARY KEY(userID)
+                );
+            """
+        },
+        {
+            "name": Config.ACTIONS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.ACTIONS_TABLE} (
+                    id INT(11) NOT NULL AUTO_INCREMENT,
+                    userID BIGINT(20),
+                    team VARCHAR(10) NOT NULL,
+                    type VARCHAR(20) NOT NULL,
+                    was_successful TINYINT(1) NOT NULL,
+                    was_critical TINYINT(1),
+                    items_dropped VARCHAR(30),
+                    damage INT(4),
+                    time_set TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY(id)
+                );
+            """
+        },
+        {
+            "name": Config.TEAM_STATS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.TEAM_STATS_TABLE} (
+                    team VARCHAR(10) NOT NULL,
+                    damage BIGINT(20) NOT NULL DEFAULT 0,
+                    normal_attacks INT(11) NOT NULL DEFAULT 0,
+                    heavy_attacks INT(11) NOT NULL DEFAULT 0,
+                    defends INT(11) NOT NULL DEFAULT 0,
+                    bribes INT(11) NOT NULL DEFAULT 0,
+                    population INT(11) NOT NULL DEFAULT 0,
+                    PRIMARY KEY(team)
+                );
+            """
+        },
+        {
+            "name": Config.USER_DAILY_ACTIONS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.USER_DAILY_ACTIONS_TABLE} (
+                    userID BIGINT(20) NOT NULL,
+                    action_date DATE NOT NULL,
+                    actions INT(11) NOT NULL DEFAULT 0,
+                    successful_actions INT(11) NOT NULL DEFAULT 0,
+                    PRIMARY KEY(userID, action_date)
+                );
+            """
+        },
+        {
+            "name": Config.USER_STREAKS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.USER_STREAKS_TABLE} (
+                    userID BIGINT(20) NOT NULL,
+                    streak_date DATE NOT NULL,
+                    consecutive_misses INT(11) NOT NULL DEFAULT 0,
+                    PRIMARY KEY(userID)
+                );
+            """
+        },
+        {
+            "name": Config.DAILY_POM_COUNTS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.DAILY_POM_COUNTS_TABLE} (
+                    pom_date DATE NOT NULL,
+                    poms INT(11) NOT NULL DEFAULT 0,
+                    PRIMARY KEY(pom_date)
+                );
+            """
+        },
+    ]
+
+    MIGRATIONS = [
+        {
+            "version": 1,
+            "description": "Index poms by user, session and time",
+            "queries": [
+                _create_index(Config.POMS_TABLE, "poms_user_session_time",
+                              ["userID", "current_session", "time_set"]),
+                _create_index(Config.POMS_TABLE, "poms_time", ["time_set"]),
+            ],
+        },
+        {
+            "version": 2,
+            "description": "Index actions by user and time, and by team and type",
+            "queries": [
+                _create_index(Config.ACTIONS_TABLE, "actions_user_time",
+                              ["userID", "time_set"]),
+                _create_index(Config.ACTIONS_TABLE, "actions_team_type", ["team", "type"]),
+            ],
+        },
+        {
+            "version": 3,
+            "description": "Index users by team",
+            "queries": [
+                _create_index(Config.USERS_TABLE, "users_team", ["team"]),
+            ],
+        },
+        {
+            "version": 4,
+            "description": "Backfill team stats from actions and users",
+            "queries": [
+                f"""
+                    INSERT INTO {Config.TEAM_STATS_TABLE} (
+                        team,
+                        damage,
+                        {", ".join(_TEAM_STATS_ACTION_COLUMNS.values())}
+                    )
+                    SELECT
+                        team,
+                        COALESCE(SUM(damage), 0),
+                        {", ".join(
+                            f"SUM(type = '{action_type.value}')"
+                            for action_type in _TEAM_STATS_ACTION_COLUMNS)}
+                    FROM {Config.ACTIONS_TABLE}
+                    GROUP BY team
+                    ON DUPLICATE KEY UPDATE
+                        damage = VALUES(damage),
+                        {", ".join(
+                            f"{column} = VALUES({column})"
+                            for column in _TEAM_STATS_ACTION_COLUMNS.values())};
+                """,
+                f"""
+                    INSERT INTO {Config.TEAM_STATS_TABLE} (team, population)
+                    SELECT team, COUNT(1)
+                    FROM {Config.USERS_TABLE}
+                    GROUP BY team
+                    ON DUPLICATE KEY UPDATE
+                        population = VALUES(population);
+                """,
+            ],
+        },
+        {
+            "version": 5,
+            "description": "Backfill user daily actions from actions",
+            "queries": [
+                f"""
+                    INSERT INTO {Config.USER_DAILY_ACTIONS_TABLE} (
+                        userID,
+                        action_date,
+                        actions,
+                        successful_actions
+                    )
+                    SELECT
+                        userID,
+                        DATE(time_set),
+                        COUNT(1),
+                        SUM(was_successful)
+                    FROM {Config.ACTIONS_TABLE}
+                    WHERE type IN ({", ".join(
+                        f"'{action_type.value}'"
+                        for action_type in AVERAGED_ACTION_TYPES)})
+                    GROUP BY userID, DATE(time_set)
+                    ON DUPLICATE KEY UPDATE
+                        actions = VALUES(actions),
+                        successful_actions = VALUES(successful_actions);
+                """,
+            ],
+        },
+        {
+            "version": 6,
+            "description": "Backfill today's user streaks from actions",
+            "queries": [
+                # Streaks only matter on the day they are made, so only the
+                # streaks of users who have already acted today are needed.
+                f"""
+                    INSERT INTO {Config.USER_STREAKS_TABLE} (
+                        userID,
+                        streak_date,
+                        consecutive_misses
+                    )
+                    SELECT userID, CURDATE(), SUM(
+                        was_successful = 0 AND id > COALESCE((
+                            SELECT MAX(latest.id)
+                            FROM {Config.ACTIONS_TABLE} latest
+                            WHERE latest.userID = actions.userID
+                            AND latest.time_set >= CURDATE()
+                            AND latest.was_successful = 1
+                        ), 0)
+                    )
+                    FROM {Config.ACTIONS_TABLE} actions
+                    WHERE time_set >= CURDATE()
+                    GROUP BY userID
+                    ON DUPLICATE KEY UPDATE
+                        streak_date = VALUES(streak_date),
+                        consecutive_misses = VALUES(consecutive_misses);
+                """,
+            ],
+        },
+        {
+            "version": 7,
+            "description": "Backfill daily pom counts from poms",
+            "queries": [
+                f"""
+                    INSERT INTO {Config.DAILY_POM_COUNTS_TABLE} (pom_date, poms)
+                    SELECT DATE(time_set), COUNT(1)
+                    FROM {Config.POMS_TABLE}
+                    GROUP BY DATE(time_set)
+                    ON DUPLICATE KEY UPDATE poms = VALUES(poms);
+                """,
+            ],
+        },
+        {
+            "version": 8,
+            "description": "Track the pom count and goal of each event",
+            "queries": [
+                _add_column(Config.EVENTS_TABLE, "pom_count", "INT(11) NOT NULL DEFAULT 0"),
+                _add_column(Config.EVENTS_TABLE, "goal_reached", "TINYINT(1) NOT NULL DEFAULT 0"),
+                f"""
+                    UPDATE {Config.EVENTS_TABLE} SET pom_count = (
+                        SELECT COUNT(1) FROM {Config.POMS_TABLE}
+                        WHERE time_set >= {Config.EVENTS_TABLE}.start_date
+                        AND time_set <= {Config.EVENTS_TABLE}.end_date
+                    );
+                """,
+                # Goals which were already reached have been announced.
+                f"""
+                    UPDATE {Config.EVENTS_TABLE}
+                    SET goal_reached = goal_reached OR COALESCE(pom_count >= pom_goal, 0);
+                """,
+            ],
+        },
+    ]
+
+    _LOCK_ROWS = "FOR UPDATE"
+    _INTEGRITY_ERRORS = (aiomysql.IntegrityError, )
+    _DATA_ERRORS = (aiomysql.DataError, )
+
+    async def open(self):
+        await _pool.open()
+
+    async def close(self):
+        await _pool.close()
+
+    @asynccontextmanager
+    async def _cursor(self):
+        async with _pool.acquire() as connection:
+            try:
+                cursor: aiomysql.Cursor = await connection.cursor()
+
+                try:
+                    yield cursor
+                finally:
+                    await cursor.close()
+            except Exception:
+                # Return the connection to the pool without a half-finished
+                # transaction. Handle error at callsite.
+                await connection.rollback()
+                raise
+            else:
+                await connection.commit()
+
+    async def _select_all(self, cursor, statements: Sequence[Tuple[str, tuple]]) -> List[list]:
+        # Send every statement at once to save round trips to the server.
+        await cursor.execute("".join(query for query, _ in statements),
+                             tuple(value for _, values in statements for value in values))
+        results = [await cursor.fetchall()]
+
+        for _ in statements[1:]:
+            await cursor.nextset()
+            results.append(await cursor.fetchall())
+
+        return results
+
+    def _on_conflict(self, keys: Sequence[str]) -> str:
+        return "ON DUPLICATE KEY UPDATE"
+
+    def _inserted(self, column: str) -> str:
+        return f"VALUES({column})"
+
+    async def create_tables_if_not_exists(self):
+        # Tables are read first instead of purely relying on the "IF NOT
+        # EXISTS" SQL syntax to avoid an unnecessary warning from aiomysql.
+        async with self._cursor() as cursor:
+            await cursor.execute("SHOW TABLES")
+            existing_tables = await cursor.fetchall()
+
+        existing_table_names = set(row[0] for row in existing_tables)
+        required_table_names = set(table["name"] for table in self.TABLES)
+        names_of_tables_to_create = required_table_names - existing_table_names
+
+        for table_to_create in names_of_tables_to_create:
+            _log.info('Creating table: %s', table_to_create)
+            create_query = next(table["create_query"] for table in self.TABLES
+                                if table["name"] == table_to_create)
+
+            async with self._cursor() as cursor:
+                await cursor.execute(create_query)
+
+        await self._create_schema_version_table(existing_table_names)
+        await self._apply_migrations()
+
+    async def _create_schema_version_table(self, existing_table_names: Set[str]):
+        """Create the table recording which migrations have been applied."""
+        if Config.SCHEMA_VERSION_TABLE in existing_table_names:
+            return
+
+        _log.info('Creating table: %s', Config.SCHEMA_VERSION_TABLE)
+
+        async with self._cursor() as cursor:
+            await cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {Config.SCHEMA_VERSION_TABLE} (
+                    version INT(11) NOT NULL,
+                    description VARCHAR(100) NOT NULL,
+                    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY(version)
+                );
+            """)
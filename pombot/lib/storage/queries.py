@@ -0,0 +1,110 @@
+"""Statements with optional filters, compiled to SQL once for each
+combination of filters which is used.
+
+See `pombot.lib.storage.query_benchmark` for the cost of binding a query.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class Filter:
+    """An optional part of a statement, included only when it is given a
+    value other than None.
+
+    @param sql The SQL of the filter, with a %s for each parameter.
+    @param params Function returning the parameters of the filter from its
+        value. When omitted, the value is the only parameter.
+    """
+    sql: str
+    params: Optional[Callable[[Any], Sequence]] = None
+
+
+def user_filter(column: str = "userID") -> Filter:
+    """Return a filter matching the rows of a Discord user."""
+    return Filter(f"{column}=%s", lambda user: (user.id,))
+
+
+def date_range_filter(column: str = "time_set") -> Filter:
+    """Return a filter matching the rows within a DateRange, inclusive."""
+    return Filter(f"{column} >= %s AND {column} <= %s",
+                  lambda date_range: (date_range.start_date, date_range.end_date))
+
+
+class Query:
+    """A statement whose WHERE clause holds the filters which are given a
+    value when the query is bound.
+
+    The SQL of each combination of filters is compiled on first use and then
+    cached, so that binding a query only collects its parameters. Filters
+    are placed in the order they are bound.
+
+    @param head The statement before its WHERE clause.
+    @param where Filters joined with AND into the WHERE clause, by name.
+    @param conditions SQL conditions which are always in the WHERE clause.
+    @param tail Filters placed after the WHERE clause, by name, eg. a LIMIT.
+    @param end SQL which ends every statement, eg. a GROUP BY.
+    """
+    def __init__(
+        self,
+        head: str,
+        *,
+        where: Dict[str, Filter] = None,
+        conditions: Sequence[str] = (),
+        tail: Dict[str, Filter] = None,
+        end: str = "",
+    ) -> None:
+        self._head = " ".join(head.split())
+        self._where = dict(where or {})
+        self._conditions = list(conditions)
+        self._filters = {**self._where, **(tail or {})}
+        self._end = " ".join(end.split())
+        self._compiled: Dict[Tuple[str, ...], Tuple[str, Optional[List]]] = {}
+
+    def bind(self, **values) -> Tuple[str, List]:
+        """Return the SQL and parameters of the statement filtered by every
+        filter given a value other than None.
+
+        @raises TypeError When given a value for an unknown filter.
+        """
+        shape = tuple(name for name, value in values.items() if value is not None)
+
+        if (compiled := self._compiled.get(shape)) is None:
+            compiled = self._compiled[shape] = self._compile(shape)
+
+        sql, to_params = compiled
+
+        if to_params is None:
+            return sql, [values[name] for name in shape]
+
+        params = []
+
+        for name, to_param in zip(shape, to_params):
+            if to_param is None:
+                params.append(values[name])
+            else:
+                params.extend(to_param(values[name]))
+
+        return sql, params
+
+    def _compile(self, shape: Tuple[str, ...]) -> Tuple[str, Optional[List]]:
+        """Return the SQL of the statement with the filters in `shape`, and
+        the params function of each filter, or None when every filter takes
+        its value as its only parameter.
+        """
+        if unknown := [name for name in shape if name not in self._filters]:
+            raise TypeError(f"Unknown filters: {', '.join(unknown)}")
+
+        where = [*self._conditions,
+                 *(self._where[name].sql for name in shape if name in self._where)]
+        tail = [self._filters[name].sql for name in shape if name not in self._where]
+        to_params = [self._filters[name].params for name in shape]
+
+        sql = " ".join([
+            self._head,
+            *(["WHERE " + " AND ".join(where)] if where else []),
+            *tail,
+            *([self._end] if self._end else []),
+        ])
+
+        return sql, to_params if any(to_params) else None
@@ -0,0 +1,92 @@
+"""Micro-benchmark of the Python side of preparing a statement for the
+database driver.
+
+The `get_actions` statement is prepared both with the compiled query the
+SQL backends use and the way it was built before queries were compiled,
+from WHERE fragments rewritten on every call. Neither way touches a
+database, so the timings are the per-query overhead of Python alone:
+
+    python -m pombot.lib.storage.query_benchmark --calls 100000
+"""
+import argparse
+import timeit
+from datetime import datetime
+from typing import List, Tuple
+
+from pombot.config import Config, Pomwars
+from pombot.lib.storage.sql import _GET_ACTIONS
+from pombot.lib.storage.sqlite import _qmark
+from pombot.lib.types import ActionType, DateRange
+
+
+def _rewritten_get_actions(
+    action_type=None, user=None, team=None, was_successful=None, date_range=None,
+) -> Tuple[str, List]:
+    """Build the statement of `get_actions` as it was built before queries
+    were compiled: append a WHERE fragment for each filter, then rewrite
+    every WHERE after the first into an AND.
+    """
+    query = [f"SELECT * FROM {Config.ACTIONS_TABLE}"]
+    values = []
+
+    if action_type:
+        query += ["WHERE type=%s"]
+        values += [action_type.value]
+
+    if user:
+        query += ["WHERE userID=%s"]
+        values += [user.id]
+
+    if team:
+        query += ["WHERE team=%s"]
+        values += [team]
+
+    if was_successful:
+        query += ["WHERE was_successful=%s"]
+        values += [1]
+
+    if date_range:
+        query += ["WHERE time_set >= %s", "AND time_set <= %s"]
+        values += [date_range.start_date, date_range.end_date]
+
+    query_str = " ".join(query)
+
+    try:
+        offset = query_str.index("WHERE") + 1
+    except ValueError:
+        return query_str, values
+
+    return query_str[:offset] + query_str[offset:].replace("WHERE", "AND"), values
+
+
+def main():
+    """Time the Python side of preparing a `get_actions` statement for the
+    SQLite driver, both ways.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    filters = {
+        "action_type": ActionType.DEFEND,
+        "team": Pomwars.KNIGHT_ROLE,
+        "was_successful": True,
+        "date_range": DateRange(datetime(2021, 8, 2), datetime(2021, 8, 3)),
+    }
+
+    def rewritten():
+        query, values = _rewritten_get_actions(**filters)
+        return query.replace("%s", "?"), values
+
+    def compiled():
+        query, values = _GET_ACTIONS.bind(**filters)
+        return _qmark(query), values
+
+    for name, prepare in (("rewritten", rewritten), ("compiled", compiled)):
+        seconds = min(timeit.repeat(prepare, number=args.calls, repeat=args.repeat))
+        print(f"{name:>10}: {seconds / args.calls * 1e6:.2f} µs per statement")
+
+
+if __name__ == "__main__":
+    main()
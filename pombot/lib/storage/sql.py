@@ -0,0 +1,864 @@
+import asyncio
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager
+from functools import cached_property, lru_cache
+from datetime import date
+from datetime import datetime as dt
+from datetime import timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from discord.user import User as DiscordUser
+
+import pombot.lib.pom_wars.errors as war_crimes
+from pombot.config import Config
+from pombot.lib import errors
+from pombot.lib.storage.backend import (_TEAM_STATS_ACTION_COLUMNS,
+                                        ActionContextRows, StorageBackend,
+                                        _check_description, _check_new_event,
+                                        _check_session_type, _pom_rows,
+                                        _raw_damage, _zone_str)
+from pombot.lib.storage.group_commit import _GroupCommit
+from pombot.lib.storage.queries import (Filter, Query, date_range_filter,
+                                        user_filter)
+from pombot.lib.types import (AVERAGED_ACTION_TYPES, Action, ActionStreak,
+                              ActionType, DailyActions, DateRange, Event, Pom,
+                              PomSummary, SessionType, TeamStats)
+from pombot.lib.types import User as PombotUser
+
+_log = logging.getLogger(__name__)
+
+_SESSION_FILTER = Filter("current_session=%s",
+                         lambda session: (int(session == SessionType.CURRENT),))
+
+_GET_POMS = Query(f"SELECT * FROM {Config.POMS_TABLE}", where={
+    "user":       user_filter(),
+    "descript":   Filter("descript=%s"),
+    "date_range": date_range_filter(),
+}, tail={
+    "limit":      Filter("ORDER BY time_set DESC LIMIT %s"),
+})
+
+_GET_POM_SUMMARY = Query(f"""
+    SELECT descript, current_session, COUNT(1), MIN(time_set)
+    FROM {Config.POMS_TABLE}
+""", where={
+    "user":     user_filter(),
+    "descript": Filter("descript=%s"),
+}, end="GROUP BY descript, current_session ORDER BY MIN(id)")
+
+_DELETED_POMS_FILTERS = {
+    "user":     user_filter(),
+    "time_set": Filter("time_set=%s"),
+    "session":  _SESSION_FILTER,
+}
+
+_DELETE_POMS = Query(f"DELETE FROM {Config.POMS_TABLE}", where=_DELETED_POMS_FILTERS)
+
+_UNCOUNT_DELETED_POMS = Query(f"""
+    UPDATE {Config.EVENTS_TABLE}
+    SET pom_count = pom_count - (
+        SELECT COUNT(1) FROM {Config.POMS_TABLE}
+""", where=_DELETED_POMS_FILTERS, conditions=[
+    f"time_set >= {Config.EVENTS_TABLE}.start_date",
+    f"time_set <= {Config.EVENTS_TABLE}.end_date",
+], end=")")
+
+_UPDATE_POMS_DESCRIPTIONS = Query(f"UPDATE {Config.POMS_TABLE} SET descript=%s", where={
+    "user":     user_filter(),
+    "descript": Filter("descript=%s"),
+    "session":  _SESSION_FILTER,
+})
+
+_GET_ACTIONS = Query(f"SELECT * FROM {Config.ACTIONS_TABLE}", where={
+    "action_type":    Filter("type=%s", lambda action_type: (action_type.value,)),
+    "user":           user_filter(),
+    "team":           Filter("team=%s"),
+    "was_successful": Filter("was_successful=%s", lambda was_successful: (int(was_successful),)),
+    "date_range":     date_range_filter(),
+})
+
+
+@lru_cache(maxsize=None)
+def _count_rows_query(table: str) -> Query:
+    """Return the query counting the rows of `table`."""
+    return Query(f"SELECT COUNT(1) FROM {table}", where={
+        "action_type": Filter("type=%s", lambda action_type: (action_type.value,)),
+        "team":        Filter("team=%s"),
+    })
+
+
+class SQLBackend(StorageBackend):
+    """The queries shared by the SQL backends.
+
+    Queries are written with "%s" placeholders, and subclasses provide a
+    transactional cursor and the few pieces of syntax which differ between
+    SQL dialects.
+    """
+    # Tables in the order they are created.
+    TABLES: List[dict] = []
+
+    # Ordered schema changes applied on top of TABLES. Each migration runs
+    # once and is recorded in the schema version table; never edit or reorder
+    # a migration which has shipped, append a new one instead.
+    #
+    # A query is either SQL, or a step which cannot be repeated, eg. adding a
+    # column, as a dict of its "query" and an "exists_query" of SQL and
+    # values which returns a row once the step has been applied.
+    MIGRATIONS: List[dict] = []
+
+    # Suffix of a SELECT which locks the selected rows until commit.
+    _LOCK_ROWS = ""
+
+    # Most values bound in one IN list, which keeps statements well within
+    # the size and variable limits of every dialect.
+    _MAX_IN_LIST_SIZE = 500
+
+    # Exceptions raised by the driver for constraint and data violations.
+    _INTEGRITY_ERRORS: Tuple[type, ...] = ()
+    _DATA_ERRORS: Tuple[type, ...] = ()
+
+    @cached_property
+    def _select_deleted_poms(self) -> Query:
+        """Query of the poms which `delete_poms` will delete, by time_set,
+        locked until commit.
+        """
+        return Query(f"SELECT time_set, COUNT(1) FROM {Config.POMS_TABLE}",
+                     where=_DELETED_POMS_FILTERS, end=f"GROUP BY time_set {self._LOCK_ROWS}")
+
+    @asynccontextmanager
+    async def _cursor(self):
+        """Yield a cursor whose statements are committed together when the
+        context exits, or rolled back on error.
+        """
+        raise NotImplementedError
+        yield  # pylint: disable=unreachable
+
+    async def _apply_migrations(self, transaction=None):
+        """Bring the schema up to the latest version in MIGRATIONS. The
+        schema version table must already exist.
+
+        @param transaction Function returning a context which yields a cursor
+            and commits on exit, or `_cursor` when omitted.
+        """
+        transaction = transaction or self._cursor
+
+        async with transaction() as cursor:
+            await cursor.execute(
+                f"SELECT MAX(version) FROM {Config.SCHEMA_VERSION_TABLE};")
+            current_version, = await cursor.fetchone()
+
+        current_version = current_version or 0
+
+        for migration in sorted(self.MIGRATIONS, key=lambda m: m["version"]):
+            if migration["version"] <= current_version:
+                continue
+
+            _log.info("Applying schema migration %s: %s",
+                      migration["version"], migration["description"])
+
+            # MySQL commits DDL implicitly, so the version is recorded only
+            # after every statement in the migration has succeeded, and steps
+            # already applied by an earlier, failed attempt are skipped.
+            async with transaction() as cursor:
+                for step in migration["queries"]:
+                    if isinstance(step, str):
+                        await cursor.execute(step)
+                        continue
+
+                    await cursor.execute(*step["exists_query"])
+
+                    if await cursor.fetchone() is None:
+                        await cursor.execute(step["query"])
+
+                await cursor.execute(f"""
+                    INSERT INTO {Config.SCHEMA_VERSION_TABLE} (
+                        version,
+                        description
+                    )
+                    VALUES (%s, %s);
+                """, (migration["version"], migration["description"]))
+
+    async def _select_all(self, cursor, statements: Sequence[Tuple[str, tuple]]) -> List[list]:
+        """Run several SELECT statements and return the rows of each."""
+        results = []
+
+        for query, values in statements:
+            await cursor.execute(query, values)
+            results.append(await cursor.fetchall())
+
+        return results
+
+    def _on_conflict(self, keys: Sequence[str]) -> str:
+        """Return the clause which turns an INSERT into an update of the row
+        with the same `keys`.
+        """
+        raise NotImplementedError
+
+    def _inserted(self, column: str) -> str:
+        """Return how to refer to the value which would have been inserted
+        into `column` in the update clause of an upsert.
+        """
+        raise NotImplementedError
+
+    def _computed_value(self, value, value_type: type):  # pylint: disable=unused-argument
+        """Return a value computed by an SQL function, like MIN or DATE, as
+        `value_type`.
+        """
+        return value
+
+    def _upsert_query(
+        self,
+        table: str,
+        columns: Sequence[str],
+        keys: Sequence[str],
+        assignments: Iterable[str],
+    ) -> str:
+        """Return an INSERT of `columns` into `table` which instead applies
+        `assignments` when a row with the same `keys` already exists.
+        """
+        return f"""
+            INSERT INTO {table} ({", ".join(columns)})
+            VALUES ({", ".join(["%s"] * len(columns))})
+            {self._on_conflict(keys)} {", ".join(assignments)};
+        """
+
+    async def _increment_team_stats(self, cursor, team: str, **increments):
+        """Add to a team's running totals using the caller's cursor, so that
+        the totals are committed in the same transaction as the change they
+        count.
+        """
+        query = self._upsert_query(
+            Config.TEAM_STATS_TABLE,
+            ["team", *increments],
+            ["team"],
+            (f"{column} = {column} + {self._inserted(column)}" for column in increments),
+        )
+
+        await cursor.execute(query, (team, *increments.values()))
+
+    async def _increment_user_daily_actions(
+        self,
+        cursor,
+        user_id: int,
+        action_date: date,
+        was_successful: bool,
+    ):
+        """Count an action toward a user's daily totals using the caller's
+        cursor, so that the totals are committed in the same transaction as
+        the action.
+        """
+        query = self._upsert_query(
+            Config.USER_DAILY_ACTIONS_TABLE,
+            ["userID", "action_date", "actions", "successful_actions"],
+            ["userID", "action_date"],
+            (f"{column} = {column} + {self._inserted(column)}"
+             for column in ("actions", "successful_actions")),
+        )
+
+        await cursor.execute(query, (user_id, action_date, 1, int(bool(was_successful))))
+
+    async def _update_user_streak(
+        self,
+        cursor,
+        user_id: int,
+        action_date: date,
+        was_successful: bool,
+    ):
+        """Extend or reset a user's streak of unsuccessful actions using the
+        caller's cursor, so that the streak is committed in the same
+        transaction as the action.
+        """
+        # Assignments are evaluated left to right in MySQL, so
+        # consecutive_misses is computed against the previous streak_date.
+        query = self._upsert_query(
+            Config.USER_STREAKS_TABLE,
+            ["userID", "streak_date", "consecutive_misses"],
+            ["userID"],
+            [
+                f"""consecutive_misses = CASE
+                    WHEN {self._inserted("consecutive_misses")} = 0 THEN 0
+                    WHEN streak_date = {self._inserted("streak_date")}
+                        THEN consecutive_misses + 1
+                    ELSE 1
+                END""",
+                f"streak_date = {self._inserted('streak_date')}",
+            ],
+        )
+
+        await cursor.execute(query, (user_id, action_date, 0 if was_successful else 1))
+
+    async def _increment_daily_pom_counts(self, cursor, counts: Dict[date, int]):
+        """Add to the number of poms logged on each day using the caller's
+        cursor, so that the counts are committed in the same transaction as
+        the poms they count.
+        """
+        query = self._upsert_query(
+            Config.DAILY_POM_COUNTS_TABLE,
+            ["pom_date", "poms"],
+            ["pom_date"],
+            [f"poms = poms + {self._inserted('poms')}"],
+        )
+
+        await cursor.executemany(query, list(counts.items()))
+
+    async def flush_writes(self):
+        await asyncio.gather(self._pom_writes.drain(), self._action_writes.drain())
+
+    async def delete_all_rows_from_all_tables(self):
+        async with self._cursor() as cursor:
+            for table_name in (table["name"] for table in self.TABLES):
+                await cursor.execute(f"DELETE FROM {table_name};")
+
+    async def add_poms_to_user_session(
+        self,
+        user: DiscordUser,
+        descript: Optional[Union[str, Iterable]],
+        count: int,
+        time_set: dt = None,
+    ):
+        poms = [(*pom, True) for pom in _pom_rows(user, descript, count, time_set)]
+
+        if Config.WRITE_BATCH_DELAY_MS > 0:
+            await self._pom_writes.submit(poms, rows=len(poms))
+        else:
+            await self._insert_poms([poms])
+
+        return len(poms)
+
+    @cached_property
+    def _pom_writes(self) -> _GroupCommit:
+        """Pom inserts which are committed in groups."""
+        return _GroupCommit(self._insert_poms)
+
+    async def _insert_poms(self, writes: List[List[tuple]]) -> List[None]:
+        """Insert the poms of every write, and count them toward the daily
+        and event totals, in one transaction.
+        """
+        query = f"""
+            INSERT INTO {Config.POMS_TABLE} (
+                userID,
+                descript,
+                time_set,
+                current_session
+            )
+            VALUES (%s, %s, %s, %s);
+        """
+
+        poms = [pom for poms in writes for pom in poms]
+        daily_counts = Counter(time_set.date() for _, _, time_set, _ in poms)
+
+        events_query = f"""
+            UPDATE {Config.EVENTS_TABLE}
+            SET pom_count = pom_count + %s
+            WHERE start_date <= %s
+            AND end_date >= %s;
+        """
+        event_counts = Counter(time_set for _, _, time_set, _ in poms)
+
+        async with self._cursor() as cursor:
+            await cursor.executemany(query, poms)
+            await self._increment_daily_pom_counts(cursor, daily_counts)
+            await cursor.executemany(events_query, [
+                (count, time_set, time_set) for time_set, count in event_counts.items()])
+
+        return [None] * len(writes)
+
+    async def bank_user_session_poms(self, user: DiscordUser) -> int:
+        query = f"""
+            UPDATE {Config.POMS_TABLE}
+            SET current_session = 0
+            WHERE userID = %s
+            AND current_session = 1;
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query, (user.id, ))
+            rows_affected = cursor.rowcount
+
+        return rows_affected
+
+    async def delete_poms(
+        self,
+        *,
+        user: DiscordUser,
+        time_set: dt = None,
+        session: SessionType = None,
+     ) -> Dict[dt, int]:
+        if session:
+            _check_session_type(session)
+
+        filters = {"user": user, "time_set": time_set or None, "session": session or None}
+        decrement_query = f"""
+            UPDATE {Config.DAILY_POM_COUNTS_TABLE}
+            SET poms = poms - %s
+            WHERE pom_date = %s;
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(*self._select_deleted_poms.bind(**filters))
+            deleted = {time_set: int(count) for time_set, count in await cursor.fetchall()}
+            daily_counts = Counter()
+
+            for moment, count in deleted.items():
+                daily_counts[moment.date()] += count
+
+            await cursor.execute(*_UNCOUNT_DELETED_POMS.bind(**filters))
+            await cursor.execute(*_DELETE_POMS.bind(**filters))
+            await cursor.executemany(decrement_query,
+                                     [(count, day) for day, count in daily_counts.items()])
+
+        return deleted
+
+    async def get_daily_pom_counts(self) -> Dict[date, int]:
+        query = f"""
+            SELECT pom_date, poms FROM {Config.DAILY_POM_COUNTS_TABLE}
+            WHERE poms != 0;
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query)
+            rows = await cursor.fetchall()
+
+        return {pom_date: int(poms) for pom_date, poms in rows}
+
+    async def backfill_daily_pom_counts(self):
+        insert_query = f"""
+            INSERT INTO {Config.DAILY_POM_COUNTS_TABLE} (pom_date, poms)
+            SELECT DATE(time_set), COUNT(1) FROM {Config.POMS_TABLE}
+            GROUP BY DATE(time_set);
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(f"DELETE FROM {Config.DAILY_POM_COUNTS_TABLE};")
+            await cursor.execute(insert_query)
+
+    async def get_poms(
+        self,
+        *,
+        user: DiscordUser = None,
+        descript = None,
+        date_range: DateRange = None,
+        limit: int = None
+    ) -> List[Pom]:
+        query, args = _GET_POMS.bind(user=user, descript=descript or None,
+                                     date_range=date_range, limit=limit or None)
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query, args)
+            rows = await cursor.fetchall()
+
+        return [Pom(*row) for row in rows]
+
+    async def get_pom_summary(
+        self,
+        user: DiscordUser,
+        descript: Optional[str] = None,
+    ) -> List[PomSummary]:
+        query, args = _GET_POM_SUMMARY.bind(user=user, descript=descript or None)
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query, args)
+            rows = await cursor.fetchall()
+
+        return [
+            PomSummary(descript, session, count, self._computed_value(first_time_set, dt))
+            for descript, session, count, first_time_set in rows
+        ]
+
+    async def add_new_event(self, name: str, goal: int, date_range: DateRange) -> Event:
+        # Events can start before they are created, so the poms already
+        # logged in the event are counted as it is added.
+        query = f"""
+            INSERT INTO {Config.EVENTS_TABLE} (
+                event_name,
+                pom_goal,
+                start_date,
+                end_date,
+                pom_count
+            )
+            SELECT %s, %s, %s, %s, COUNT(1) FROM {Config.POMS_TABLE}
+            WHERE time_set >= %s
+            AND time_set <= %s;
+        """
+        args = (name, goal, date_range.start_date, date_range.end_date,
+                date_range.start_date, date_range.end_date)
+
+        # SQLite does not enforce column sizes, so they are checked here.
+        _check_new_event(name, goal)
+
+        async with self._cursor() as cursor:
+            try:
+                await cursor.execute(query, args)
+            except self._DATA_ERRORS as exc:
+                # Give a nicer error message than the database default. This
+                # has been tested to handle "event name too long" and
+                # "pom_goal" out of range.
+                raise errors.EventCreationError(exc.args[-1]) from exc
+
+            await cursor.execute(f"SELECT * FROM {Config.EVENTS_TABLE} WHERE id=%s;",
+                                 (cursor.lastrowid, ))
+            row = await cursor.fetchone()
+
+        return Event(*row)
+
+    async def get_all_events(self) -> List[Event]:
+        # Tech debt: merge this function into `get_events`.
+        query = f"""
+            SELECT * FROM {Config.EVENTS_TABLE}
+            ORDER BY start_date;
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query)
+            rows = await cursor.fetchall()
+
+        return [Event(*row) for row in rows]
+
+    async def mark_event_goal_reached(self, event: Event) -> bool:
+        query = f"""
+            UPDATE {Config.EVENTS_TABLE}
+            SET goal_reached = 1
+            WHERE id=%s
+            AND goal_reached = 0;
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query, (event.event_id, ))
+            rows_affected = cursor.rowcount
+
+        return rows_affected == 1
+
+    async def delete_event(self, name: str) -> Optional[int]:
+        # Not every dialect supports DELETE with ORDER BY and LIMIT.
+        select_query = f"""
+            SELECT id FROM {Config.EVENTS_TABLE}
+            WHERE event_name=%s
+            ORDER BY start_date
+            LIMIT 1
+            {self._LOCK_ROWS};
+        """
+        delete_query = f"""
+            DELETE FROM {Config.EVENTS_TABLE}
+            WHERE id=%s;
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(select_query, (name, ))
+
+            if not (row := await cursor.fetchone()):
+                return None
+
+            await cursor.execute(delete_query, row)
+
+        event_id, = row
+        return event_id
+
+    async def add_user(self, user_id: str, zone: timezone, team: str):
+        query = f"""
+            INSERT INTO {Config.USERS_TABLE} (
+                userID,
+                timezone,
+                team
+            )
+            VALUES (%s, %s, %s);
+        """
+
+        try:
+            async with self._cursor() as cursor:
+                await cursor.execute(query, (user_id, _zone_str(zone), team))
+                await self._increment_team_stats(cursor, team, population=1)
+        except self._INTEGRITY_ERRORS as exc:
+            # Look the user up only after the failed transaction is over.
+            user = await self.get_user_by_id(user_id)
+            raise war_crimes.UserAlreadyExistsError(user.team) from exc
+
+    async def set_user_timezone(self, user_id: str, zone: timezone):
+        query = f"""
+            UPDATE {Config.USERS_TABLE}
+            SET timezone=%s
+            WHERE userID=%s
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query, (_zone_str(zone), user_id))
+
+    async def update_user_team(self, user_id: str, team: str):
+        select_query = f"""
+            SELECT team FROM {Config.USERS_TABLE}
+            WHERE userID=%s
+            {self._LOCK_ROWS};
+        """
+        update_query = f"""
+            UPDATE {Config.USERS_TABLE}
+            SET team=%s
+            WHERE userID=%s
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(select_query, (user_id, ))
+            row = await cursor.fetchone()
+
+            if not row or row[0] == team:
+                return
+
+            old_team, = row
+            await cursor.execute(update_query, (team, user_id))
+            await self._increment_team_stats(cursor, old_team, population=-1)
+            await self._increment_team_stats(cursor, team, population=1)
+
+    async def update_user_poms_descriptions(
+        self,
+        user: DiscordUser,
+        old_description: str,
+        new_description: str,
+        banked_poms_only: bool = False,
+        session_poms_only: bool = False,
+    ) -> int:
+        if banked_poms_only and session_poms_only:
+            raise RuntimeError("Only one of banked_poms_only or session_poms_only allowed.")
+
+        _check_description(new_description)
+        query, args = _UPDATE_POMS_DESCRIPTIONS.bind(
+            user=user,
+            descript=old_description,
+            session=(SessionType.BANKED if banked_poms_only else
+                     SessionType.CURRENT if session_poms_only else None),
+        )
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query, [new_description, *args])
+            rows_affected = cursor.rowcount
+
+        return rows_affected
+
+    async def get_user_by_id(self, user_id: int) -> Optional[PombotUser]:
+        query = f"""
+            SELECT * FROM {Config.USERS_TABLE}
+            WHERE userID=%s;
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query, (user_id,))
+            row = await cursor.fetchone()
+
+        if not row:
+            raise war_crimes.UserDoesNotExistError()
+
+        return PombotUser(*row)
+
+    async def get_users_by_id(self, user_ids: Iterable[int]) -> Dict[int, PombotUser]:
+        user_ids = list(dict.fromkeys(map(int, user_ids)))
+        chunks = [user_ids[start:start + self._MAX_IN_LIST_SIZE]
+                  for start in range(0, len(user_ids), self._MAX_IN_LIST_SIZE)]
+
+        return {user.user_id: user
+                for users in await asyncio.gather(*map(self._get_users_in, chunks))
+                for user in users}
+
+    async def _get_users_in(self, user_ids: List[int]) -> List[PombotUser]:
+        """Return the users in one IN list of `get_users_by_id`."""
+        query = f"""
+            SELECT * FROM {Config.USERS_TABLE}
+            WHERE userID IN ({", ".join(["%s"] * len(user_ids))});
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query, user_ids)
+            rows = await cursor.fetchall()
+
+        return [PombotUser(*row) for row in rows]
+
+    async def get_all_users(self) -> List[PombotUser]:
+        query = f"SELECT * FROM {Config.USERS_TABLE};"
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query)
+            rows = await cursor.fetchall()
+
+        return [PombotUser(*row) for row in rows]
+
+    async def add_pom_war_action(
+        self,
+        user: DiscordUser,
+        team: str,
+        action_type: ActionType,
+        was_successful: bool,
+        was_critical: bool,
+        items_dropped: str,
+        damage: int,
+        time_set: dt,
+    ):
+        action = (user.id, team, action_type, was_successful, was_critical,
+                  items_dropped, _raw_damage(damage), time_set)
+
+        if Config.WRITE_BATCH_DELAY_MS > 0:
+            await self._action_writes.submit(action)
+        else:
+            await self._insert_actions([action])
+
+    @cached_property
+    def _action_writes(self) -> _GroupCommit:
+        """Action inserts which are committed in groups."""
+        return _GroupCommit(self._insert_actions)
+
+    async def _insert_actions(self, actions: List[tuple]) -> List[None]:
+        """Insert every action, and count them toward the team, daily and
+        streak totals, in one transaction.
+
+        Team totals are added once per team, while streaks are updated once
+        per action, in order, since each depends on the one before.
+        """
+        query = f"""
+            INSERT INTO {Config.ACTIONS_TABLE} (
+                userID,
+                team,
+                type,
+                was_successful,
+                was_critical,
+                items_dropped,
+                damage,
+                time_set
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+        """
+        team_increments: Dict[str, Counter] = {}
+
+        for _, team, action_type, _, _, _, raw_damage, _ in actions:
+            increments = team_increments.setdefault(team, Counter())
+            increments["damage"] += raw_damage
+            increments[_TEAM_STATS_ACTION_COLUMNS[action_type]] += 1
+
+        async with self._cursor() as cursor:
+            await cursor.executemany(query, [
+                (user_id, team, action_type.value, *values)
+                for user_id, team, action_type, *values in actions])
+
+            for team, increments in team_increments.items():
+                await self._increment_team_stats(cursor, team, **increments)
+
+            for user_id, _, action_type, was_successful, _, _, _, time_set in actions:
+                if action_type in AVERAGED_ACTION_TYPES:
+                    await self._increment_user_daily_actions(
+                        cursor, user_id, time_set.date(), was_successful)
+
+                await self._update_user_streak(cursor, user_id, time_set.date(), was_successful)
+
+        return [None] * len(actions)
+
+    async def get_actions(
+        self,
+        *,
+        action_type: ActionType = None,
+        user: DiscordUser = None,
+        team: str = None,
+        was_successful = None,
+        date_range: DateRange = None,
+    ) -> List[Action]:
+        query, values = _GET_ACTIONS.bind(
+            action_type=action_type or None,
+            user=user,
+            team=team or None,
+            was_successful=was_successful,
+            date_range=date_range,
+        )
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query, values)
+            rows = await cursor.fetchall()
+
+        return [Action(*row) for row in rows]
+
+    async def get_action_context_rows(
+        self,
+        user: DiscordUser,
+        *,
+        actions_range: DateRange,
+        daily_actions_since: Optional[date],
+        include_streak: bool,
+    ) -> ActionContextRows:
+        statements = [
+            (f"""
+                SELECT * FROM {Config.USERS_TABLE}
+                WHERE userID=%s;
+            """, (user.id,)),
+            (f"""
+                SELECT * FROM {Config.ACTIONS_TABLE}
+                WHERE userID=%s
+                AND time_set >= %s
+                AND time_set <= %s
+                ORDER BY time_set, id;
+            """, (user.id, actions_range.start_date, actions_range.end_date)),
+        ]
+
+        if daily_actions_since is not None:
+            statements += [(f"""
+                SELECT * FROM {Config.USER_DAILY_ACTIONS_TABLE}
+                WHERE userID=%s
+                AND action_date >= %s;
+            """, (user.id, daily_actions_since))]
+
+        if include_streak:
+            statements += [(f"""
+                SELECT * FROM {Config.USER_STREAKS_TABLE}
+                WHERE userID=%s;
+            """, (user.id,))]
+
+        async with self._cursor() as cursor:
+            user_rows, action_rows, *optional_rows = await self._select_all(cursor, statements)
+
+        daily_actions = streak = None
+
+        if daily_actions_since is not None:
+            daily_actions = {
+                daily.action_date: daily
+                for daily in (DailyActions(*row[1:]) for row in optional_rows.pop(0))
+            }
+
+        if include_streak:
+            streak_rows = optional_rows.pop(0)
+            streak = ActionStreak(*streak_rows[0][1:]) if streak_rows else ActionStreak()
+
+        return (
+            PombotUser(*user_rows[0]) if user_rows else None,
+            [Action(*row) for row in action_rows],
+            daily_actions,
+            streak,
+        )
+
+    async def count_rows_in_table(
+        self,
+        table: str,
+        *,
+        action_type: ActionType = None,
+        team: str = None,
+    ) -> int:
+        query, values = _count_rows_query(table).bind(action_type=action_type or None,
+                                                      team=team or None)
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query, values)
+            row, = await cursor.fetchone()
+
+        return int(row)
+
+    async def sum_team_damage(self, team: str) -> int:
+        query = f"""
+            SELECT SUM(damage) FROM {Config.ACTIONS_TABLE}
+            WHERE team=%s;
+        """
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query, (team,))
+            row, = await cursor.fetchone()
+
+        return int(row or 0)
+
+    async def get_team_stats(self) -> Dict[str, TeamStats]:
+        query = f"SELECT * FROM {Config.TEAM_STATS_TABLE};"
+
+        async with self._cursor() as cursor:
+            await cursor.execute(query)
+            rows = await cursor.fetchall()
+
+        return {row[0]: TeamStats(*row) for row in rows}
@@ -0,0 +1,337 @@
+import asyncio
+import logging
+import sqlite3
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from datetime import date
+from datetime import datetime as dt
+from typing import Optional, Sequence
+
+import aiosqlite
+
+from pombot.config import Config, Secrets
+from pombot.lib.storage.sql import SQLBackend
+
+_log = logging.getLogger(__name__)
+
+
+def _add_column(table: str, column: str, definition: str) -> dict:
+    """Return a migration step which adds a column, unless it exists."""
+    return {
+        "query": f"ALTER TABLE {table} ADD COLUMN {column} {definition};",
+        "exists_query": ("SELECT 1 FROM pragma_table_info(%s) WHERE name = %s;",
+                         (table, column)),
+    }
+
+
+@lru_cache(maxsize=1024)
+def _qmark(query: str) -> str:
+    """Return `query` with SQLite's "?" placeholders in place of "%s"."""
+    return query.replace("%s", "?")
+
+
+class _SQLiteCursor:
+    """An aiosqlite cursor which accepts the "%s" placeholders used by the
+    shared queries.
+    """
+    def __init__(self, cursor: aiosqlite.Cursor) -> None:
+        self._cursor = cursor
+
+    @property
+    def rowcount(self) -> int:
+        """Number of rows changed by the last statement."""
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        """Id of the row inserted by the last statement."""
+        return self._cursor.lastrowid
+
+    async def execute(self, query: str, values=()):
+        """Execute a single statement."""
+        await self._cursor.execute(_qmark(query), tuple(values or ()))
+
+    async def executemany(self, query: str, values):
+        """Execute a single statement once for each set of values."""
+        await self._cursor.executemany(_qmark(query), values)
+
+    async def fetchone(self):
+        """Return the next row of the last query."""
+        return await self._cursor.fetchone()
+
+    async def fetchall(self):
+        """Return the remaining rows of the last query."""
+        return await self._cursor.fetchall()
+
+
+class SQLiteBackend(SQLBackend):
+    """Storage in a SQLite database file embedded in the bot process.
+
+    There is no server to talk to, so every query is a function call rather
+    than a network round trip. The database runs in WAL mode, so other
+    processes (eg. backups and benchmarks) can read it while the bot writes.
+
+    The bot's queries share one connection and take turns, which is cheap
+    because each transaction is short and entirely local.
+    """
+    TABLES = [
+        {
+            "name": Config.POMS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.POMS_TABLE} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    userID BIGINT,
+                    descript VARCHAR(30),
+                    time_set TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    current_session TINYINT
+                );
+            """
+        },
+        {
+            "name": Config.EVENTS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.EVENTS_TABLE} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event_name VARCHAR(100) NOT NULL,
+                    pom_goal INT,
+                    start_date TIMESTAMP NOT NULL,
+                    end_date TIMESTAMP NOT NULL,
+                    pom_count INT NOT NULL DEFAULT 0,
+                    goal_reached TINYINT NOT NULL DEFAULT 0
+                );
+            """
+        },
+        {
+            "name": Config.USERS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.USERS_TABLE} (
+                    userID BIGINT NOT NULL PRIMARY KEY,
+                    timezone VARCHAR(8) NOT NULL,
+                    team VARCHAR(10) NOT NULL,
+                    inventory_string TEXT,
+                    player_level TINYINT NOT NULL DEFAULT 1,
+                    attack_level TINYINT NOT NULL DEFAULT 1,
+                    heavy_attack_level TINYINT NOT NULL DEFAULT 1,
+                    defend_level TINYINT NOT NULL DEFAULT 1
+                );
+            """
+        },
+        {
+            "name": Config.ACTIONS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.ACTIONS_TABLE} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    userID BIGINT,
+                    team VARCHAR(10) NOT NULL,
+                    type VARCHAR(20) NOT NULL,
+                    was_successful TINYINT NOT NULL,
+                    was_critical TINYINT,
+                    items_dropped VARCHAR(30),
+                    damage INT,
+                    time_set TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+            """
+        },
+        {
+            "name": Config.TEAM_STATS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.TEAM_STATS_TABLE} (
+                    team VARCHAR(10) NOT NULL PRIMARY KEY,
+                    damage BIGINT NOT NULL DEFAULT 0,
+                    normal_attacks INT NOT NULL DEFAULT 0,
+                    heavy_attacks INT NOT NULL DEFAULT 0,
+                    defends INT NOT NULL DEFAULT 0,
+                    bribes INT NOT NULL DEFAULT 0,
+                    population INT NOT NULL DEFAULT 0
+                );
+            """
+        },
+        {
+            "name": Config.USER_DAILY_ACTIONS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.USER_DAILY_ACTIONS_TABLE} (
+                    userID BIGINT NOT NULL,
+                    action_date DATE NOT NULL,
+                    actions INT NOT NULL DEFAULT 0,
+                    successful_actions INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY(userID, action_date)
+                );
+            """
+        },
+        {
+            "name": Config.USER_STREAKS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.USER_STREAKS_TABLE} (
+                    userID BIGINT NOT NULL PRIMARY KEY,
+                    streak_date DATE NOT NULL,
+                    consecutive_misses INT NOT NULL DEFAULT 0
+                );
+            """
+        },
+        {
+            "name": Config.DAILY_POM_COUNTS_TABLE,
+            "create_query": f"""
+                CREATE TABLE IF NOT EXISTS {Config.DAILY_POM_COUNTS_TABLE} (
+                    pom_date DATE NOT NULL PRIMARY KEY,
+                    poms INT NOT NULL DEFAULT 0
+                );
+            """
+        },
+    ]
+
+    # Changes to tables which already exist in older databases. New databases
+    # are created with the latest TABLES, so steps they already have are
+    # skipped. SQLite versions are independent of the MySQL ones.
+    MIGRATIONS = [
+        {
+            "version": 1,
+            "description": "Track the pom count and goal of each event",
+            "queries": [
+                _add_column(Config.EVENTS_TABLE, "pom_count", "INT NOT NULL DEFAULT 0"),
+                _add_column(Config.EVENTS_TABLE, "goal_reached", "TINYINT NOT NULL DEFAULT 0"),
+                f"""
+                    UPDATE {Config.EVENTS_TABLE} SET pom_count = (
+                        SELECT COUNT(1) FROM {Config.POMS_TABLE}
+                        WHERE time_set >= {Config.EVENTS_TABLE}.start_date
+                        AND time_set <= {Config.EVENTS_TABLE}.end_date
+                    );
+                """,
+                # Goals which were already reached have been announced.
+                f"""
+                    UPDATE {Config.EVENTS_TABLE}
+                    SET goal_reached = goal_reached OR COALESCE(pom_count >= pom_goal, 0);
+                """,
+            ],
+        },
+    ]
+
+    # The same indices as the MySQL migrations, which are created with the
+    # tables rather than migrated, since they can be created if not exists.
+    INDICES = [
+        f"""
+            CREATE INDEX IF NOT EXISTS poms_user_session_time
+            ON {Config.POMS_TABLE} (userID, current_session, time_set);
+        """,
+        f"""
+            CREATE INDEX IF NOT EXISTS poms_time
+            ON {Config.POMS_TABLE} (time_set);
+        """,
+        f"""
+            CREATE INDEX IF NOT EXISTS actions_user_time
+            ON {Config.ACTIONS_TABLE} (userID, time_set);
+        """,
+        f"""
+            CREATE INDEX IF NOT EXISTS actions_team_type
+            ON {Config.ACTIONS_TABLE} (team, type);
+        """,
+        f"""
+            CREATE INDEX IF NOT EXISTS users_team
+            ON {Config.USERS_TABLE} (team);
+        """,
+    ]
+
+    # SQLite does not enforce column sizes, so there are no data errors; the
+    # limits are checked before writing instead.
+    _INTEGRITY_ERRORS = (sqlite3.IntegrityError, )
+
+    def __init__(self) -> None:
+        self._connection: Optional[aiosqlite.Connection] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop:
+            # Locks are bound to the loop which created them. Unit tests run
+            # each case in a fresh loop. The connection itself is not bound
+            # to a loop, so it is kept.
+            self._lock, self._loop = asyncio.Lock(), loop
+
+        async with self._lock:
+            if self._connection is None:
+                self._connection = await self._connect()
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Open the database, creating its tables and migrating them if
+        necessary.
+        """
+        database = Secrets.SQLITE_DATABASE
+        connection = await aiosqlite.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
+        await connection.execute("PRAGMA journal_mode=WAL;")
+        await connection.execute("PRAGMA synchronous=NORMAL;")
+
+        for query in [table["create_query"] for table in self.TABLES] + self.INDICES:
+            await connection.execute(query)
+
+        await connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {Config.SCHEMA_VERSION_TABLE} (
+                version INTEGER NOT NULL PRIMARY KEY,
+                description VARCHAR(100) NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        await connection.commit()
+
+        # The connection is not shared until it is returned, so migrations
+        # need not take the lock.
+        try:
+            await self._apply_migrations(lambda: self._transaction(connection))
+        except Exception:
+            await connection.close()
+            raise
+
+        _log.info("Opened SQLite database: %s", database)
+
+        return connection
+
+    async def close(self):
+        connection, self._connection = self._connection, None
+
+        if connection is not None:
+            await connection.close()
+            _log.info("Closed SQLite database")
+
+    @asynccontextmanager
+    async def _cursor(self):
+        await self.open()
+
+        async with self._lock:
+            async with self._transaction(self._connection) as cursor:
+                yield cursor
+
+    @staticmethod
+    @asynccontextmanager
+    async def _transaction(connection: aiosqlite.Connection):
+        """Yield a cursor of `connection` whose statements are committed
+        together when the context exits, or rolled back on error.
+        """
+        cursor = await connection.cursor()
+
+        try:
+            yield _SQLiteCursor(cursor)
+        except Exception:
+            await connection.rollback()
+            raise
+        else:
+            await connection.commit()
+        finally:
+            await cursor.close()
+
+    def _computed_value(self, value, value_type: type):
+        # Computed columns have no declared type, so their dates and
+        # timestamps are not converted from text.
+        if isinstance(value, str) and value_type in (date, dt):
+            return value_type.fromisoformat(value)
+
+        return value
+
+    def _on_conflict(self, keys: Sequence[str]) -> str:
+        return f"ON CONFLICT({', '.join(keys)}) DO UPDATE SET"
+
+    def _inserted(self, column: str) -> str:
+        return f"excluded.{column}"
+
+    async def create_tables_if_not_exists(self):
+        # Tables are created as the database is opened.
+        await self.open()
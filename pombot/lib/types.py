@@ -1,6 +1,7 @@
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from enum import Enum
+from typing import Dict, Iterable, List, Optional
 
 
 @dataclass
@@ -104,6 +105,21 @@ class Pom:
         return bool(self.session)
 
 
+@dataclass(frozen=True)
+class PomSummary:
+    """A user's poms of one description in one session, as described, in
+    order, from `Storage.get_pom_summary`.
+    """
+    descript: Optional[str]
+    session: int
+    count: int
+    first_time_set: datetime
+
+    def is_current_session(self) -> bool:
+        """Return whether these poms are in the user's current session."""
+        return bool(self.session)
+
+
 @dataclass
 class Event:
     """An event, as described, in order, from the database."""
@@ -112,6 +128,14 @@ class Event:
     pom_goal: int
     start_date: datetime
     end_date: datetime
+    pom_count: int = 0
+    goal_reached: bool = False
+
+    def contains(self, time_set: datetime) -> bool:
+        """Return whether a pom logged at `time_set` counts toward this
+        event.
+        """
+        return self.start_date <= time_set <= self.end_date
 
 
 class ActionType(str, Enum):
@@ -122,8 +146,13 @@ class ActionType(str, Enum):
     DEFEND = "defend"
     BRIBE = "bribe"
 
-    # PlaceHolder used in averaging.
-    PLACEHOLDER = "__placeholder_action__"
+
+# Action types which count toward a user's average daily actions.
+AVERAGED_ACTION_TYPES = (
+    ActionType.NORMAL_ATTACK,
+    ActionType.HEAVY_ATTACK,
+    ActionType.DEFEND,
+)
 
 
 @dataclass(frozen=True)
@@ -178,6 +207,180 @@ class Action:
         return self.type == ActionType.NORMAL_ATTACK
 
 
+@dataclass
+class TeamStats:
+    """A team's running totals, as described, in order, from the database."""
+    # Tech debt: This should be moved to pombot.lib.pom_wars.types.
+    team: str
+    raw_damage: int = 0
+    normal_attacks: int = 0
+    heavy_attacks: int = 0
+    defends: int = 0
+    bribes: int = 0
+    population: int = 0
+
+    @property
+    def damage(self) -> int:
+        """The team's total real damage."""
+        return int(self.raw_damage / 100.0)
+
+    @property
+    def action_counts(self) -> dict:
+        """Number of actions the team has taken, by ActionType."""
+        return {
+            ActionType.NORMAL_ATTACK: self.normal_attacks,
+            ActionType.HEAVY_ATTACK:  self.heavy_attacks,
+            ActionType.DEFEND:        self.defends,
+            ActionType.BRIBE:         self.bribes,
+        }
+
+    @property
+    def action_count(self) -> int:
+        """The team's total number of actions."""
+        return sum(self.action_counts.values())
+
+    @property
+    def favorite_action(self) -> ActionType:
+        """The team's most-used action."""
+        counts = self.action_counts
+        return max(counts, key=counts.get)
+
+
+@dataclass(frozen=True)
+class DailyActions:
+    """A user's attacks and defends on one day, as described, in order, from
+    the user daily actions table.
+    """
+    # Tech debt: This should be moved to pombot.lib.pom_wars.types.
+    action_date: date
+    actions: int = 0
+    successful_actions: int = 0
+
+    def add(self, was_successful: bool) -> "DailyActions":
+        """Return a copy of these counts with one more action."""
+        return DailyActions(self.action_date, self.actions + 1,
+                            self.successful_actions + int(was_successful))
+
+    @staticmethod
+    def from_actions(
+        actions: Iterable["Action"],
+        daily_actions: Dict[date, "DailyActions"] = None,
+    ) -> Dict[date, "DailyActions"]:
+        """Roll up a list of actions into counts keyed by date, added to
+        `daily_actions` when given.
+        """
+        daily_actions = dict(daily_actions or {})
+
+        for action in actions:
+            if action.type in AVERAGED_ACTION_TYPES:
+                day = action.timestamp.date()
+                daily_actions[day] = daily_actions.get(day, DailyActions(day)).add(
+                    action.was_successful)
+
+        return daily_actions
+
+
+@dataclass(frozen=True)
+class ActionStreak:
+    """A user's streak of consecutive unsuccessful actions, as described, in
+    order, from the user streaks table. Streaks end with the day.
+    """
+    # Tech debt: This should be moved to pombot.lib.pom_wars.types.
+    streak_date: date = date.min
+    consecutive_misses: int = 0
+
+    def add(self, action_date: date, was_successful: bool) -> "ActionStreak":
+        """Return the streak following an action on `action_date`."""
+        if was_successful:
+            return ActionStreak(action_date, 0)
+
+        if action_date != self.streak_date:
+            return ActionStreak(action_date, 1)
+
+        return ActionStreak(action_date, self.consecutive_misses + 1)
+
+    def misses_on(self, day: date) -> int:
+        """Return the number of consecutive misses as of `day`."""
+        return self.consecutive_misses if day == self.streak_date else 0
+
+    @staticmethod
+    def from_actions(
+        actions: Iterable["Action"],
+        streak: "ActionStreak" = None,
+    ) -> "ActionStreak":
+        """Return the streak following a list of actions, oldest first, which
+        were taken after `streak` when given.
+        """
+        streak = streak or ActionStreak()
+
+        for action in actions:
+            streak = streak.add(action.timestamp.date(), action.was_successful)
+
+        return streak
+
+
+class ActionContext:
+    """Everything needed to resolve a Pom Wars action for one user, as
+    fetched from the database in a single round trip.
+
+    The daily action counts and the streak are read-only, and they follow
+    `actions`, including actions appended after construction.
+
+    @param timestamp The time the user issued the command.
+    @param user The user's row, if any.
+    @param actions The user's actions on the day of `timestamp`, oldest
+        first.
+    @param daily_actions The user's attack and defend counts per day since
+        the start of the averaging period, counting `actions`. Rolled up from
+        `actions` when not given.
+    @param streak The user's streak of unsuccessful actions following
+        `actions`. Derived from `actions` when not given.
+    """
+    # Tech debt: This should be moved to pombot.lib.pom_wars.types.
+    def __init__(
+        self,
+        timestamp: datetime,
+        user: Optional[User],
+        actions: List[Action] = None,
+        daily_actions: Optional[Dict[date, DailyActions]] = None,
+        streak: Optional[ActionStreak] = None,
+    ) -> None:
+        self.timestamp = timestamp
+        self.user = user
+        self.actions = [] if actions is None else actions
+
+        # The given counts and streak, and how many of `actions` they follow.
+        self._daily_actions = daily_actions
+        self._num_counted_actions = 0 if daily_actions is None else len(self.actions)
+        self._streak = streak
+        self._num_streaked_actions = 0 if streak is None else len(self.actions)
+
+    def __repr__(self) -> str:
+        return (f"{type(self).__name__}(timestamp={self.timestamp!r}, user={self.user!r}, "
+                f"actions={self.actions!r}, daily_actions={self.daily_actions!r}, "
+                f"streak={self.streak!r})")
+
+    @property
+    def daily_actions(self) -> Dict[date, DailyActions]:
+        """The user's attack and defend counts per day since the start of
+        the averaging period.
+        """
+        return DailyActions.from_actions(self.actions[self._num_counted_actions:],
+                                         self._daily_actions)
+
+    @property
+    def streak(self) -> ActionStreak:
+        """The user's streak of unsuccessful actions."""
+        return ActionStreak.from_actions(self.actions[self._num_streaked_actions:],
+                                         self._streak)
+
+    @property
+    def actions_today(self) -> List[Action]:
+        """The user's actions on the day of `timestamp`, oldest first."""
+        today = self.timestamp.date()
+        return [a for a in self.actions if a.timestamp.date() == today]
+
+
 class InstantItem(str, Enum):
     """Type of an instant-use item in the actions table of the database."""
     # Tech debt: This should be moved to pombot.lib.pom_wars.types.
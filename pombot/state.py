@@ -9,5 +9,11 @@ class State:
     # NOTE: The type is not imported to avoid a circular import.
     scoreboard = None
 
-    # Tech debt: This should be a column in the events table of the DB.
-    goal_reached: bool = False
+    # Background task which reloads Pom Wars stories when their XMLs change.
+    story_watcher = None
+
+    # Background task which announces events as they start and end.
+    event_scheduler = None
+
+    # Background task which reloads the user directory, when it is polled.
+    user_directory_watcher = None
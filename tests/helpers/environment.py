@@ -17,6 +17,8 @@ class Environment:
         cls.forgiven_days                 = Pomwars.MAX_FORGIVEN_DAYS
         cls.shadow_cap_limit              = Pomwars.SHADOW_CAP_LIMIT_PER_DAY
 
+        cls.scoreboard_refresh_interval   = Pomwars.SCOREBOARD_REFRESH_INTERVAL_SECONDS
+
     @classmethod
     def restore(cls):
         """Restore saved config variables."""
@@ -30,3 +32,5 @@ class Environment:
         Pomwars.CONSIDER_ONLY_SUCCESSFUL_ACTIONS = cls.consider_only_successful
         Pomwars.MAX_FORGIVEN_DAYS                = cls.forgiven_days
         Pomwars.SHADOW_CAP_LIMIT_PER_DAY         = cls.shadow_cap_limit
+
+        Pomwars.SCOREBOARD_REFRESH_INTERVAL_SECONDS = cls.scoreboard_refresh_interval
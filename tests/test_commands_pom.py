@@ -1,4 +1,5 @@
 import unittest
+from datetime import datetime, timedelta
 from unittest.async_case import IsolatedAsyncioTestCase
 
 from parameterized import parameterized
@@ -6,6 +7,7 @@ from parameterized import parameterized
 import pombot
 from pombot.config import Config
 from pombot.lib.storage import Storage
+from pombot.lib.types import DateRange
 from tests.helpers import mock_discord
 
 
@@ -22,6 +24,7 @@ class TestPomCommand(IsolatedAsyncioTestCase):
     async def asyncTearDown(self) -> None:
         """Cleanup the database."""
         await Storage.delete_all_rows_from_all_tables()
+        await Storage.close_connection_pool()
 
     async def test_pom_command_with_no_args(self):
         """Test the user typing `!pom`."""
@@ -80,6 +83,45 @@ class TestPomCommand(IsolatedAsyncioTestCase):
             self.assertTrue(
                 all(pom.descript == user_provided_description for pom in poms))
 
+    async def test_event_goal_is_announced_once(self):
+        """Test the `!pom` which reaches the goal of the ongoing event
+        announces it, and later poms do not.
+        """
+        now = datetime.now()
+        await Storage.add_poms_to_user_session(self.ctx.author, None, 2, now - timedelta(hours=1))
+        await Storage.add_new_event("The Best Event", 5, DateRange(
+            now - timedelta(days=1), now + timedelta(days=1)))
+
+        await pombot.commands.do_pom(self.ctx, "2")
+        self.assertFalse(self.ctx.send.called)
+
+        await pombot.commands.do_pom(self.ctx)
+        await pombot.commands.do_pom(self.ctx)
+
+        self.assertEqual(1, self.ctx.send.call_count)
+        self.assertIn("reached our goal of 5 poms",
+                      self.ctx.send.call_args.kwargs["embed"].description)
+
+        event, = await Storage.get_all_events()
+        self.assertEqual(6, event.pom_count)
+        self.assertTrue(event.goal_reached)
+
+    async def test_event_pom_count_follows_undo(self):
+        """Test poms removed with `!undo` no longer count toward the ongoing
+        event.
+        """
+        now = datetime.now()
+        await Storage.add_new_event("The Best Event", 5, DateRange(
+            now - timedelta(days=1), now + timedelta(days=1)))
+
+        await pombot.commands.do_pom(self.ctx, "3")
+        await pombot.commands.do_undo(self.ctx)
+        await pombot.commands.do_pom(self.ctx)
+
+        event, = await Storage.get_ongoing_events()
+        self.assertEqual(1, event.pom_count)
+        self.assertEqual(event, (await Storage.get_all_events())[0])
+
 
 if __name__ == "__main__":
     unittest.main()
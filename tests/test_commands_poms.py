@@ -30,6 +30,7 @@ class TestPomsCommand(IsolatedAsyncioTestCase):
     async def asyncTearDown(self) -> None:
         """Cleanup the database."""
         await Storage.delete_all_rows_from_all_tables()
+        await Storage.close_connection_pool()
 
     @parameterized.expand(["!poms", "!poms.show"])
     async def test_poms_command_with_no_args(self, invoked_with: str):
@@ -86,6 +87,51 @@ class TestPomsCommand(IsolatedAsyncioTestCase):
             self.assertEqual(expected["value"], actual.value)
             self.assertEqual(expected["inline"], actual.inline)
 
+    async def test_poms_command_counts_descriptions_per_session(self):
+        """Test the user typing `!poms` with poms in both their bank and
+        current session.
+        """
+        await Storage.add_poms_to_user_session(self.ctx.author, "reading", 2)
+        await Storage.add_poms_to_user_session(self.ctx.author, "writing", 1)
+        await Storage.add_poms_to_user_session(self.ctx.author, None, 1)
+        await Storage.bank_user_session_poms(self.ctx.author)
+        await Storage.add_poms_to_user_session(self.ctx.author, "reading", 1)
+        await Storage.add_poms_to_user_session(self.ctx.author, "writing", 3)
+
+        self.ctx.invoked_with = "poms"
+        await pombot.commands.do_poms(self.ctx)
+
+        embed_sent_to_user = self.ctx.author.send.call_args.kwargs["embed"]
+        banked, _, current = embed_sent_to_user.fields
+
+        self.assertEqual("\n".join([
+            "reading: *2*", "writing: *1*", "\u200b", "*Undesignated*: *1*",
+            "\u2500" * 12, "Total: *4*\n",
+        ]), banked.value)
+        self.assertEqual("\n".join([
+            "writing: *3*", "reading: *1*", "\u200b", "*Undesignated*: *0*",
+            "\u2500" * 12, "Total: *4*\n",
+        ]), current.value)
+        self.assertIn("Total time spent pomming: 3 hours, 20 minutes",
+                      embed_sent_to_user.footer.text)
+
+    @parameterized.expand(["reading", "writing"])
+    async def test_poms_command_with_description(self, description: str):
+        """Test the user typing `!poms` with a description counts only the
+        poms with that description.
+        """
+        await Storage.add_poms_to_user_session(self.ctx.author, "reading", 2)
+        await Storage.add_poms_to_user_session(self.ctx.author, "writing", 3)
+
+        self.ctx.invoked_with = "poms"
+        await pombot.commands.do_poms(self.ctx, description)
+
+        embed_sent_to_user = self.ctx.author.send.call_args.kwargs["embed"]
+        expected_count = {"reading": 2, "writing": 3}[description]
+
+        self.assertEqual(f"{description}: *{expected_count}*",
+                         embed_sent_to_user.fields[-1].value)
+
     async def test_too_many_pom_descripts_causes_detailed_direct_message(self):
         """Test the user typing `!poms` when the response of the message
         would exceed Discord limits.
@@ -1,13 +1,14 @@
 import unittest
 from datetime import timedelta, timezone
 from unittest.async_case import IsolatedAsyncioTestCase
-from unittest.mock import AsyncMock, patch
+from unittest.mock import patch
 
 from discord.ext.commands.context import Context
 from parameterized import parameterized
 
 from pombot.commands.pom_wars import attack, defend
 from pombot.config import Pomwars
+from pombot.lib.pom_wars.active_defends import ActiveDefends
 from pombot.lib.pom_wars.team import Team
 from pombot.lib.storage import Storage
 from pombot.lib.types import ActionType
@@ -33,6 +34,7 @@ class TestCommandsPomwarsAttack(IsolatedAsyncioTestCase):
         self.ctx = mock_discord.MockContext()
         await Storage.create_tables_if_not_exists()
         await Storage.delete_all_rows_from_all_tables()
+        ActiveDefends.clear()
 
         for patcher in (
             patch.object(attack,  "is_action_successful"),
@@ -44,6 +46,7 @@ class TestCommandsPomwarsAttack(IsolatedAsyncioTestCase):
 
     async def asyncTearDown(self) -> None:
         await Storage.delete_all_rows_from_all_tables()
+        await Storage.close_connection_pool()
         return await super().asyncTearDown()
 
     @classmethod
@@ -67,7 +70,6 @@ class TestCommandsPomwarsAttack(IsolatedAsyncioTestCase):
         the DB.
         """
         attack.is_action_successful.return_value = is_action_successful_return_value
-        State.scoreboard.update = AsyncMock()
 
         expected_team = Team.KNIGHTS
         role = mock_discord.MockRole(name=expected_team)
@@ -89,7 +91,7 @@ class TestCommandsPomwarsAttack(IsolatedAsyncioTestCase):
         self.assertEqual(1, self.ctx.reply.call_count)
         self.assertIsNotNone(self.ctx.reply.call_args_list[0].kwargs.get("embed"))
 
-        self.assertEqual(1, State.scoreboard.update.call_count)
+        self.assertEqual(1, State.scoreboard.request_update.call_count)
 
         actual_actions = await Storage.get_actions()
         self.assertEqual(1, len(actual_actions))
@@ -133,7 +135,6 @@ class TestCommandsPomwarsAttack(IsolatedAsyncioTestCase):
         Pomwars.DEFEND_LEVEL_MULTIPLIERS = {1: 0.05}
 
         attack.is_action_successful.return_value = True
-        State.scoreboard.update = AsyncMock()
 
         async def add_player(ctx: Context, team: Team):
             await Storage.add_user(user_id=ctx.author.id,
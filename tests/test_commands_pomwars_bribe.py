@@ -22,6 +22,7 @@ class TestCommandsPomwarsBribe(IsolatedAsyncioTestCase):
 
     async def asyncTearDown(self) -> None:
         await Storage.delete_all_rows_from_all_tables()
+        await Storage.close_connection_pool()
         return await super().asyncTearDown()
 
     async def test_do_bribe_happy_day(self):
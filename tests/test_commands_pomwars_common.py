@@ -3,15 +3,13 @@ import unittest
 from collections import ChainMap
 from datetime import datetime, timedelta
 from unittest.async_case import IsolatedAsyncioTestCase
-from unittest.mock import patch
 
 from parameterized import parameterized
 
 from pombot.config import Pomwars
 from pombot.lib.pom_wars.common import get_average_poms
-from pombot.lib.storage import Storage
 from pombot.lib.tiny_tools import flatten
-from pombot.lib.types import ActionType, Action
+from pombot.lib.types import ActionContext, ActionType, Action, DailyActions
 from pombot.lib.pom_wars.team import Team
 from tests.helpers import mock_discord
 from tests.helpers.environment import Environment
@@ -32,10 +30,6 @@ class TestAveragingActions(IsolatedAsyncioTestCase):
         self.ctx = mock_discord.MockContext()
         self.action_id = itertools.count(start=1000)
 
-        patcher = patch.object(Storage, "get_actions")
-        patcher.start()
-        self.addAsyncCleanup(patcher.stop)
-
     @classmethod
     def tearDownClass(cls):
         Environment.restore()
@@ -167,20 +161,14 @@ class TestAveragingActions(IsolatedAsyncioTestCase):
                     timestamp=timestamp - timedelta(days=offset),
                 ) for _ in range(poms))
 
-        # As an implementation detail in the SUT, `Storage.get_actions` will
-        # return all actions if `was_successful` is not specified, otherwise
-        # it will return only the actions matching the criteria. Therefore we
-        # need to modify our behavior to simulate that of the Storage object.
-        if Pomwars.CONSIDER_ONLY_SUCCESSFUL_ACTIONS:
-            actions_from_db = [a for a in actions_from_db if a.was_successful]
-
-        Storage.get_actions.return_value = actions_from_db
-
-        actual_average = await get_average_poms(
-            user=self.ctx.author,
+        context = ActionContext(
             timestamp=timestamp,
+            user=None,
+            actions=actions_from_db,
         )
 
+        actual_average = get_average_poms(context)
+
         self.assertEqual(expected_average, actual_average, f"{test_name=}")
 
     async def test_get_average_poms_does_not_consider_bribes(self):
@@ -199,13 +187,14 @@ class TestAveragingActions(IsolatedAsyncioTestCase):
                 )))
         ]
 
-        Storage.get_actions.return_value = actions_from_db
-
-        actual_average = await get_average_poms(
-            user=self.ctx.author,
+        context = ActionContext(
             timestamp=datetime.now(),
+            user=None,
+            actions=actions_from_db,
         )
 
+        actual_average = get_average_poms(context)
+
         # The SUT will add one placeholder action to the list to be averaged
         # which represents the action currently being processed as it won't
         # yet be in the DB.
@@ -213,6 +202,40 @@ class TestAveragingActions(IsolatedAsyncioTestCase):
 
         self.assertEqual(expected_average, actual_average)
 
+    async def test_get_average_poms_from_daily_actions(self):
+        """Test get_average_poms averages prefetched daily counts, ignoring
+        days outside the averaging period.
+        """
+        Pomwars.AVERAGING_PERIOD_DAYS = 3
+        Pomwars.CONSIDER_ONLY_SUCCESSFUL_ACTIONS = True
+        Pomwars.MAX_FORGIVEN_DAYS = 1
+
+        timestamp = datetime(2021, 8, 10, 12)
+        daily_actions = {
+            day: DailyActions(day, actions, successful_actions)
+            for day, actions, successful_actions in (
+                (datetime(2021, 8, 6).date(),  50, 50),
+                (datetime(2021, 8, 7).date(),  9,  6),
+                (datetime(2021, 8, 8).date(),  1,  1),
+                (datetime(2021, 8, 9).date(),  5,  4),
+                (datetime(2021, 8, 10).date(), 3,  3),
+            )
+        }
+
+        context = ActionContext(
+            timestamp=timestamp,
+            user=None,
+            daily_actions=daily_actions,
+        )
+
+        actual_average = get_average_poms(context)
+
+        # The best two days of Aug 7-10 are 6 and 3 + 1 for the action being
+        # processed.
+        expected_average = 5
+
+        self.assertEqual(expected_average, actual_average)
+
 
 if __name__ == "__main__":
     unittest.main()
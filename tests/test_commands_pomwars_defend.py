@@ -6,6 +6,7 @@ from unittest.mock import patch
 from parameterized import parameterized
 
 from pombot.commands.pom_wars import defend
+from pombot.lib.pom_wars.active_defends import ActiveDefends
 from pombot.lib.pom_wars.team import Team
 from pombot.lib.storage import Storage
 from pombot.lib.types import ActionType
@@ -23,6 +24,7 @@ class TestCommandsPomwarsDefend(IsolatedAsyncioTestCase):
         self.ctx = mock_discord.MockContext()
         await Storage.create_tables_if_not_exists()
         await Storage.delete_all_rows_from_all_tables()
+        ActiveDefends.clear()
 
         patcher = patch.object(defend, "is_action_successful")
         patcher.start()
@@ -32,6 +34,7 @@ class TestCommandsPomwarsDefend(IsolatedAsyncioTestCase):
 
     async def asyncTearDown(self) -> None:
         await Storage.delete_all_rows_from_all_tables()
+        await Storage.close_connection_pool()
         return await super().asyncTearDown()
 
     @parameterized.expand([
@@ -0,0 +1,68 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.async_case import IsolatedAsyncioTestCase
+
+import pombot
+from pombot.lib.storage import Storage
+from tests.helpers import mock_discord
+
+THIS_YEAR = datetime.today().year
+
+
+class TestTotalCommand(IsolatedAsyncioTestCase):
+    """Test the !total command."""
+    ctx = None
+
+    async def asyncSetUp(self) -> None:
+        """Ensure database tables exist and create contexts for the tests."""
+        self.ctx = mock_discord.MockContext()
+        await Storage.create_tables_if_not_exists()
+        await Storage.delete_all_rows_from_all_tables()
+
+        for day, count in ((1, 2), (15, 3), (31, 5)):
+            await Storage.add_poms_to_user_session(
+                self.ctx.author, None, count, datetime(THIS_YEAR, 1, day, 12))
+
+        await Storage.add_poms_to_user_session(
+            mock_discord.MockUser(), "other user", 7, datetime(THIS_YEAR, 2, 1, 23, 59))
+
+    async def asyncTearDown(self) -> None:
+        """Cleanup the database."""
+        await Storage.delete_all_rows_from_all_tables()
+        await Storage.close_connection_pool()
+
+    async def test_total_command_with_no_args(self):
+        """Test the user typing `!total`."""
+        await pombot.commands.do_total(self.ctx)
+
+        self.ctx.reply.assert_called_once_with("Total amount of poms since ever: 17")
+
+    async def test_total_command_with_date_range(self):
+        """Test the user typing `!total january 15 january 31`."""
+        await pombot.commands.do_total(self.ctx, "january", "15", "january", "31")
+
+        self.ctx.reply.assert_called_once_with(
+            f"Total amount of poms in range January 15, {THIS_YEAR} - January 31, "
+            f"{THIS_YEAR}: 8")
+
+    async def test_total_follows_undo(self):
+        """Test poms removed with `!undo` are no longer counted."""
+        await Storage.load_daily_pom_counts()
+        await pombot.commands.do_undo(self.ctx)
+
+        self.assertEqual(12, await Storage.count_poms())
+
+    async def test_backfill_totals_counts_every_pom(self):
+        """Test the admin typing `!backfill_totals` after the daily pom
+        counts went missing.
+        """
+        await Storage.delete_poms(user=self.ctx.author, time_set=datetime(THIS_YEAR, 1, 1, 12))
+        await pombot.commands.do_backfill_totals(self.ctx)
+
+        self.ctx.reply.assert_called_once_with("Daily pom counts rebuilt from 15 poms.")
+        self.assertEqual(3, await Storage.count_poms(pombot.lib.types.DateRange(
+            datetime(THIS_YEAR, 1, 15), datetime(THIS_YEAR, 1, 15) + timedelta(days=1))))
+
+
+if __name__ == "__main__":
+    unittest.main()
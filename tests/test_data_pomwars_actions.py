@@ -1,10 +1,14 @@
+import asyncio
+import os
 import shutil
 import textwrap
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Tuple
+from unittest.mock import patch
 
+from lxml import etree
 from parameterized import parameterized
 
 from pombot.config import Pomwars
@@ -224,6 +228,117 @@ class TestActionsData(unittest.TestCase):
         self.assertEqual(tiered_stories[expected_tier]["hvy"], actual_hvy._story)
         self.assertEqual(tiered_stories[expected_tier]["dfn"], actual_dfn._story)
 
+    def test_actions_stories_are_normalized_once(self):
+        """Test stories are stripped and newline-normalized when loaded, so a
+        forced line break survives being sent.
+        """
+        self.write_actions_xml(textwrap.dedent(f"""\
+            <actions>
+                <team name="{Pomwars.KNIGHT_ROLE}">
+                    <tier level="1">
+                        <defend> first line&#10;joined line&#13;forced line </defend>
+                    </tier>
+                </team>
+                <bribe>  bribe  </bribe>
+            </actions>
+        """))
+
+        _, defends, bribes = self.instantiate_actions()
+
+        actual_dfn = defends.get_random(
+            user=DUMMY_USER,
+            team=Team.KNIGHTS,
+            average_daily_actions=1,
+            outcome=Outcome.REGULAR,
+        )
+
+        self.assertEqual("first line joined line\nforced line", actual_dfn._story)
+        self.assertEqual("bribe", bribes.get_random()._story)
+
+    def test_actions_index_is_read_only(self):
+        """Test the story index cannot be modified after loading."""
+        self.write_actions_xml("<actions><bribe>bribe</bribe></actions>")
+
+        _, _, bribes = self.instantiate_actions()
+
+        with self.assertRaises(TypeError):
+            bribes._stories[None] = ()
+
+        for stories in bribes._stories.values():
+            self.assertIsInstance(stories, tuple)
+
+    def test_actions_share_compiled_stories_until_xml_changes(self):
+        """Test the actions XMLs are only parsed again after they change."""
+        self.write_actions_xml("<actions><bribe>first bribe</bribe></actions>")
+        xml_path = Locations.POMWARS_ACTIONS_DIR / "actions.xml"
+
+        with patch.object(actions, "_parse_story_index",
+                          wraps=actions._parse_story_index) as parse_mock:
+            _, _, bribes = self.instantiate_actions()
+            self.assertEqual(1, parse_mock.call_count)
+            self.assertEqual("first bribe", bribes.get_random()._story)
+
+            # Touching a file without changing its contents is not a change.
+            mtime_ns = xml_path.stat().st_mtime_ns + 1_000_000_000
+            os.utime(xml_path, ns=(mtime_ns, mtime_ns))
+
+            _, _, bribes = self.instantiate_actions()
+            self.assertEqual(1, parse_mock.call_count)
+            self.assertEqual("first bribe", bribes.get_random()._story)
+
+            self.write_actions_xml("<actions><bribe>second bribe</bribe></actions>")
+
+            _, _, bribes = self.instantiate_actions()
+            self.assertEqual(2, parse_mock.call_count)
+            self.assertEqual("second bribe", bribes.get_random()._story)
+
+    def test_compiled_stories_are_readable_by_other_users(self):
+        """Test the compiled stories are not private to whoever wrote them."""
+        self.write_actions_xml("<actions><bribe>bribe</bribe></actions>")
+        self.instantiate_actions()
+
+        compiled_path = Locations.POMWARS_ACTIONS_DIR / actions.COMPILED_STORIES_FILENAME
+        self.assertEqual(0o644, compiled_path.stat().st_mode & 0o777)
+
+    def test_actions_ignore_corrupt_compiled_stories(self):
+        """Test an unreadable compiled stories file is rebuilt."""
+        self.write_actions_xml("<actions><bribe>bribe</bribe></actions>")
+        compiled_path = Locations.POMWARS_ACTIONS_DIR / actions.COMPILED_STORIES_FILENAME
+        compiled_path.write_bytes(b"not a pickle")
+
+        with self.assertLogs(actions.__name__, "WARNING"):
+            _, _, bribes = self.instantiate_actions()
+
+        self.assertEqual("bribe", bribes.get_random()._story)
+        self.assertNotEqual(b"not a pickle", compiled_path.read_bytes())
+
+    def test_reload_stories_swaps_stories_of_all_actions(self):
+        """Test reloading replaces the stories used by the live actions."""
+        live_actions = (actions.Attacks, actions.Defends, actions.Bribes)
+
+        for action in live_actions:
+            self.addCleanup(setattr, action, "_stories", action._stories)
+
+        self.write_actions_xml("<actions><bribe>new bribe</bribe></actions>")
+
+        stories = asyncio.run(actions.reload_stories())
+
+        for action in live_actions:
+            self.assertIs(stories, action._stories)
+
+        self.assertEqual("new bribe", actions.Bribes.get_random()._story)
+
+    def test_reload_stories_keeps_stories_when_xml_is_invalid(self):
+        """Test a failed reload raises and leaves the live stories alone."""
+        live_stories = actions.Bribes._stories
+
+        self.write_actions_xml("<actions><bribe>unclosed bribe</actions>")
+
+        with self.assertRaises(etree.LxmlError):
+            asyncio.run(actions.reload_stories())
+
+        self.assertIs(live_stories, actions.Bribes._stories)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from pombot.config import Config
+from pombot.lib.event_scheduler import EventScheduler
+from pombot.lib.storage import Storage
+from pombot.lib.types import DateRange
+from tests.helpers import mock_discord
+
+
+class TestEventScheduler(IsolatedAsyncioTestCase):
+    """Test events are announced as they start and end."""
+    channel = None
+    scheduler = None
+
+    async def asyncSetUp(self):
+        await Storage.create_tables_if_not_exists()
+        await Storage.delete_all_rows_from_all_tables()
+        await Storage.load_event_calendar()
+
+        self.channel = mock_discord.MockTextChannel(name="pom-channel")
+        guild = mock_discord.MockGuild(text_channels=[self.channel])
+        self.scheduler = EventScheduler(mock_discord.MockBot(guilds=[guild]))
+
+    async def asyncTearDown(self):
+        self.scheduler.stop()
+        await Storage.delete_all_rows_from_all_tables()
+        await Storage.close_connection_pool()
+
+    @patch.object(Config, "POM_CHANNEL_NAMES", ["pom-channel"])
+    async def test_event_start_and_end_are_announced(self):
+        """Test an event created after the scheduler started is announced
+        when it starts and again when it ends.
+        """
+        self.scheduler.start()
+
+        start = datetime.now() + timedelta(seconds=0.2)
+        await Storage.add_new_event("Soon", 10, DateRange(start, start + timedelta(seconds=0.2)))
+        await asyncio.sleep(0.1)
+        self.channel.send.assert_not_called()
+
+        await asyncio.sleep(0.5)
+
+        starting, ending = [call.kwargs["embed"] for call in self.channel.send.call_args_list]
+        self.assertIn("has started", starting.description)
+        self.assertIn("has ended with **0**", ending.description)
+
+    @patch.object(Config, "POM_CHANNEL_NAMES", ["pom-channel"])
+    async def test_deleted_event_is_not_announced(self):
+        """Test an event removed before it starts is never announced."""
+        self.scheduler.start()
+
+        start = datetime.now() + timedelta(seconds=0.2)
+        await Storage.add_new_event("Cancelled", 10, DateRange(start, start + timedelta(1)))
+        await Storage.delete_event("Cancelled")
+        await asyncio.sleep(0.4)
+
+        self.channel.send.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,30 +1,69 @@
+import itertools
 import unittest
+from dataclasses import replace
 from datetime import datetime, timedelta, timezone
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import Mock, patch
 
-from pombot.config import Debug
-from pombot.lib.pom_wars.action_chances import is_action_successful
+from parameterized import parameterized
+
+from pombot.config import Debug, Pomwars
+from pombot.lib.pom_wars.action_chances import (SuccessChances,
+                                                delayed_exponential_drop,
+                                                get_heavy_attack_base_chance,
+                                                is_action_successful)
+from pombot.lib.types import (Action, ActionContext, ActionStreak, ActionType,
+                              DailyActions)
 from pombot.lib.types import User as PombotUser
 
 # For vertical alignment.
 TRU = True
 FLS = False
 
+USER = PombotUser(
+    user_id=1234,
+    timezone=timezone(timedelta()),
+    team="Team",
+    inventory_string="inventory",
+    player_level=1,
+    attack_level=1,
+    heavy_attack_level=1,
+    defend_level=1,
+)
+
 
-class TestActionSuccessRates(unittest.IsolatedAsyncioTestCase):
+class TestActionSuccessRates(unittest.TestCase):
     """Generic tests for _is_attack_successful."""
+    action_id = None
+
     def setUp(self) -> None:
         """Set configuration objects for tests."""
         Debug.POMWARS_ACTIONS_ALWAYS_SUCCEED = False
+        self.action_id = itertools.count(start=1000)
         return super().setUp()
 
-    @patch("pombot.lib.storage.Storage.get_actions")
+    def create_action(self, timestamp: datetime) -> Action:
+        """Return a new successful action for USER at `timestamp`.
+
+        When gathering chances for heavy attacks, the previous heavy attack is
+        consulted. For each previous unsuccesful attack, there is a
+        configurable increase in the chance for the next attack. For these
+        tests, we expect the future chances to remain constant, so each
+        previous action must be successful.
+        """
+        return Action(
+            action_id=next(self.action_id),
+            user_id=USER.user_id,
+            team=USER.team,
+            type=ActionType.NORMAL_ATTACK,
+            was_successful=True,
+            was_critical=False,
+            items_dropped="",
+            raw_damage=1000,
+            timestamp=timestamp,
+        )
+
     @patch("random.random")
-    async def test_normal_attack_success_rate(
-        self,
-        random_mock: Mock,
-        get_actions_mock: Mock,
-    ):
+    def test_normal_attack_success_rate(self, random_mock: Mock):
         """Generically test is_action_successful when doing a normal attack."""
         dice_rolls_and_expected_results = {
             1: [(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
@@ -52,112 +91,130 @@ class TestActionSuccessRates(unittest.IsolatedAsyncioTestCase):
             12: [(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
                  (FLS, FLS, FLS, FLS, FLS, FLS, FLS, FLS, FLS, FLS)],
         }
-        user = MagicMock()
         is_heavy_attack = False
         timestamp = datetime.now()
-        actions = []
+        context = ActionContext(timestamp=timestamp, user=USER)
 
         for pom_number, settings in dice_rolls_and_expected_results.items():
-            actions.append(pom_number)
-            get_actions_mock.return_value = actions
-            print(f"len(actions) = {len(actions)}")
+            context.actions.append(self.create_action(timestamp))
+            print(f"len(actions) = {len(context.actions)}")
 
             for dice_roll, expected_result in zip(*settings):
                 random_mock.return_value = dice_roll
-                actual_result = await is_action_successful(
-                    user, timestamp, is_heavy_attack)
+                actual_result = is_action_successful(context, is_heavy_attack)
 
                 self.assertEqual(expected_result, actual_result,
                     f"pom_number: {pom_number}, dice_roll: {dice_roll}")
 
-    @patch("pombot.lib.storage.Storage.get_actions")
-    @patch("pombot.lib.storage.Storage.get_user_by_id")
     @patch("random.random")
-    async def test_heavy_attack_success_rate(
-        self,
-        random_mock: Mock,
-        get_user_by_id_mock: Mock,
-        get_actions_mock: Mock,
-    ):
+    def test_heavy_attack_success_rate(self, random_mock: Mock):
         """Generically test is_action_successful when doing a heavy attack."""
-        class MockPom(MagicMock):
-            """A fake Pom object.
-
-            When gathering chances for heavy attacks, the previous heavy
-            attack is consulted. For each previous unsuccesful attack, there
-            is a configurable increase in the chance for the next attack.
-
-            For this test, we expect the future chances to remain constant, so
-            each previous attack must be successful.
-            """
-            @staticmethod
-            def was_successful():
-                """Report this action to be successful."""
-                return True
-
-        get_user_by_id_mock.return_value = PombotUser(
-            user_id=1234,
-            timezone=timezone(timedelta()),
-            team="Team",
-            inventory_string="inventory",
-            player_level=1,
-            attack_level=1,
-            heavy_attack_level=1,
-            defend_level=1,
-        )
-
         dice_rolls_and_expected_results = {
-            MockPom(1):  [(0.1, 0.2, 0.3),
+            1:           [(0.1, 0.2, 0.3),
                           (TRU, TRU, FLS)],
-            MockPom(2):  [(0.1, 0.2, 0.3),
+            2:           [(0.1, 0.2, 0.3),
                           (TRU, TRU, FLS)],
-            MockPom(3):  [(0.1, 0.2, 0.3),
+            3:           [(0.1, 0.2, 0.3),
                           (TRU, TRU, FLS)],
-            MockPom(4):  [(0.1, 0.2, 0.3),
+            4:           [(0.1, 0.2, 0.3),
                           (TRU, TRU, FLS)],
-            MockPom(5):  [(0.1, 0.2, 0.3),
+            5:           [(0.1, 0.2, 0.3),
                           (TRU, TRU, FLS)],
-            MockPom(6):  [(0.1, 0.2, 0.3),
+            6:           [(0.1, 0.2, 0.3),
                           (TRU, TRU, FLS)],
-            MockPom(7):  [(0.1, 0.2, 0.3),
+            7:           [(0.1, 0.2, 0.3),
                           (TRU, TRU, FLS)],
-            MockPom(8):  [(0.1, 0.2, 0.3),
+            8:           [(0.1, 0.2, 0.3),
                           (TRU, TRU, FLS)],
-            MockPom(9):  [(0.1, 0.2, 0.3),
+            9:           [(0.1, 0.2, 0.3),
                           (TRU, FLS, FLS)],
-            MockPom(10): [(0.1, 0.2, 0.3),
+            10:          [(0.1, 0.2, 0.3),
                           (TRU, FLS, FLS)],
-            MockPom(11): [(0.1, 0.2, 0.3),
+            11:          [(0.1, 0.2, 0.3),
                           (FLS, FLS, FLS)],
-            MockPom(12): [(0.1, 0.2, 0.3),
+            12:          [(0.1, 0.2, 0.3),
                           (FLS, FLS, FLS)],
         }
-        user = MagicMock()
         is_heavy_attack = True
         timestamp = datetime.now()
-        actions = []
+        context = ActionContext(timestamp=timestamp, user=USER)
 
         for pom_number, settings in dice_rolls_and_expected_results.items():
-            actions.append(pom_number)
-            get_actions_mock.return_value = actions
-            print(f"len(actions) = {len(actions)}")
+            context.actions.append(self.create_action(timestamp))
+            print(f"len(actions) = {len(context.actions)}")
 
             for dice_roll, expected_result in zip(*settings):
                 random_mock.return_value = dice_roll
-                actual_result = await is_action_successful(
-                    user, timestamp, is_heavy_attack)
+                actual_result = is_action_successful(context, is_heavy_attack)
 
                 self.assertEqual(
                     expected_result, actual_result,
                     f"pom_number: {pom_number}, dice_roll: {dice_roll}")
 
-    @patch("pombot.lib.storage.Storage.get_actions")
     @patch("random.random")
-    async def test_defend_success_rate(
-        self,
-        random_mock: Mock,
-        get_actions_mock: Mock,
-    ):
+    def test_heavy_attack_success_rate_after_misses(self, random_mock: Mock):
+        """Test consecutive misses today raise the heavy attack chance."""
+        timestamp = datetime(2021, 8, 2, 12)
+
+        # Roll between the chances without and with one miss.
+        random_mock.return_value = sum(
+            SuccessChances.get(0, USER.heavy_attack_level, num_misses)
+            for num_misses in (0, 1)) / 2
+
+        for streak, expected_result in (
+            (ActionStreak(timestamp.date(), 0),                       FLS),
+            (ActionStreak(timestamp.date(), 1),                       TRU),
+            (ActionStreak((timestamp - timedelta(days=1)).date(), 1), FLS),
+        ):
+            context = ActionContext(timestamp=timestamp, user=USER, streak=streak)
+            actual_result = is_action_successful(context, is_heavy_attack=True)
+
+            self.assertEqual(expected_result, actual_result, f"{streak=}")
+
+    @patch("random.random")
+    def test_heavy_attack_success_rate_after_appended_miss(self, random_mock: Mock):
+        """Test a miss appended to the context's actions counts toward the
+        streak and the daily actions.
+        """
+        timestamp = datetime(2021, 8, 2, 12)
+        context = ActionContext(timestamp=timestamp, user=USER,
+                                actions=[self.create_action(timestamp)])
+
+        # Roll between the chances without and with one miss.
+        random_mock.return_value = sum(
+            SuccessChances.get(0, USER.heavy_attack_level, num_misses)
+            for num_misses in (0, 1)) / 2
+        self.assertFalse(is_action_successful(context, is_heavy_attack=True))
+
+        context.actions.append(replace(self.create_action(timestamp), was_successful=False))
+
+        self.assertEqual(ActionStreak(timestamp.date(), 1), context.streak)
+        self.assertEqual({timestamp.date(): DailyActions(timestamp.date(), 2, 1)},
+                         context.daily_actions)
+        self.assertTrue(is_action_successful(context, is_heavy_attack=True))
+
+    def test_appended_actions_follow_given_rollups(self):
+        """Test actions appended after the stored counts and streak were
+        read are added on top of them.
+        """
+        timestamp = datetime(2021, 8, 2, 12)
+        context = ActionContext(
+            timestamp=timestamp,
+            user=USER,
+            actions=[self.create_action(timestamp)],
+            daily_actions={timestamp.date(): DailyActions(timestamp.date(), 5, 3)},
+            streak=ActionStreak(timestamp.date(), 0),
+        )
+
+        for _ in range(2):
+            context.actions.append(replace(self.create_action(timestamp), was_successful=False))
+
+        self.assertEqual(ActionStreak(timestamp.date(), 2), context.streak)
+        self.assertEqual({timestamp.date(): DailyActions(timestamp.date(), 7, 3)},
+                         context.daily_actions)
+
+    @patch("random.random")
+    def test_defend_success_rate(self, random_mock: Mock):
         """Generically test is_action_successful when doing a defend."""
         dice_rolls_and_expected_results = {
             1: [(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
@@ -185,25 +242,69 @@ class TestActionSuccessRates(unittest.IsolatedAsyncioTestCase):
             12: [(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
                  (FLS, FLS, FLS, FLS, FLS, FLS, FLS, FLS, FLS, FLS)],
         }
-        user = MagicMock()
         is_heavy_attack = False
         timestamp = datetime.now()
-        actions = []
+        context = ActionContext(timestamp=timestamp, user=USER)
 
         for pom_number, settings in dice_rolls_and_expected_results.items():
-            actions.append(pom_number)
-            get_actions_mock.return_value = actions
-            print(f"len(actions) = {len(actions)}")
+            context.actions.append(self.create_action(timestamp))
+            print(f"len(actions) = {len(context.actions)}")
 
             for dice_roll, expected_result in zip(*settings):
                 random_mock.return_value = dice_roll
-                actual_result = await is_action_successful(
-                    user, timestamp, is_heavy_attack)
+                actual_result = is_action_successful(context, is_heavy_attack)
 
                 self.assertEqual(
                     expected_result, actual_result,
                     f"pom_number: {pom_number}, dice_roll: {dice_roll}")
 
 
+
+class TestSuccessChances(unittest.TestCase):
+    """Test the precomputed success chances match their formulas."""
+    def test_lookups_match_formulas(self):
+        """Test get() for normal and heavy attacks, including beyond the
+        tabulated number of actions and the pity ladder.
+        """
+        for num_actions in range(SuccessChances.MAX_TABULATED_ACTIONS + 5):
+            expected_drop = delayed_exponential_drop(num_actions)
+            self.assertEqual(expected_drop, SuccessChances.get(num_actions))
+
+            for level in Pomwars.HEAVY_ATTACK_LEVEL_VALIANT_ATTEMPT_CONDOLENCE_REWARDS:
+                for num_misses in range(10):
+                    expected = get_heavy_attack_base_chance(level, num_misses) * expected_drop
+                    actual = SuccessChances.get(num_actions, level, num_misses)
+
+                    self.assertEqual(expected, actual, f"{num_actions=} {level=} {num_misses=}")
+
+    @parameterized.expand([
+        ("short", 3),
+        ("tabulated", SuccessChances.MAX_TABULATED_ACTIONS),
+        ("beyond_tables", SuccessChances.MAX_TABULATED_ACTIONS + 5),
+    ])
+    def test_bulk_tables_match_lookups(self, _, size):
+        """Test the tables for bulk indexing hold the single lookups."""
+        self.assertEqual(tuple(SuccessChances.get_drop(num_actions)
+                               for num_actions in range(size + 1)),
+                         SuccessChances.get_drops(size))
+
+        for level in Pomwars.HEAVY_ATTACK_LEVEL_VALIANT_ATTEMPT_CONDOLENCE_REWARDS:
+            self.assertEqual(tuple(SuccessChances.get_heavy_attack_base_chance(level, num_misses)
+                                   for num_misses in range(size + 1)),
+                             SuccessChances.get_heavy_attack_base_chances(level, size))
+
+    def test_heavy_chances_follow_configuration(self):
+        """Test assigning new pity levels is picked up by the next lookup."""
+        pity_levels = Pomwars.HEAVY_ATTACK_LEVEL_VALIANT_ATTEMPT_CONDOLENCE_REWARDS
+        self.addCleanup(setattr, Pomwars,
+                        "HEAVY_ATTACK_LEVEL_VALIANT_ATTEMPT_CONDOLENCE_REWARDS", pity_levels)
+
+        Pomwars.HEAVY_ATTACK_LEVEL_VALIANT_ATTEMPT_CONDOLENCE_REWARDS = {1: (0.5, 0.6)}
+
+        self.assertEqual(0.5, SuccessChances.get(0, 1, 0))
+        self.assertEqual(0.6, SuccessChances.get(0, 1, 1))
+        self.assertEqual(0.6, SuccessChances.get(0, 1, 5))
+
+
 if __name__ == "__main__":
     unittest.main()
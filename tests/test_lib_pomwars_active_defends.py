@@ -0,0 +1,110 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+from pombot.config import Pomwars
+from pombot.lib.pom_wars.active_defends import ActiveDefends
+from pombot.lib.pom_wars.team import Team
+from pombot.lib.storage import Storage
+from pombot.lib.types import Action, ActionType, User
+from tests.helpers.environment import Environment
+
+KNIGHTS = Team.KNIGHTS.value
+VIKINGS = Team.VIKINGS.value
+NOW = datetime(2021, 8, 1, 12)
+
+
+class TestActiveDefends(IsolatedAsyncioTestCase):
+    """Test the in-memory windows of active defends."""
+    @classmethod
+    def setUpClass(cls):
+        Environment.preserve()
+
+    async def asyncSetUp(self):
+        Environment.restore()
+        Pomwars.DEFEND_LEVEL_MULTIPLIERS = {1: 0.05, 2: 0.5}
+        ActiveDefends.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        Environment.restore()
+        ActiveDefends.clear()
+
+    def test_defence_is_per_team(self):
+        """Test defends only count towards the defending team."""
+        ActiveDefends.add(VIKINGS, 1, 1, NOW)
+
+        self.assertAlmostEqual(0.05, ActiveDefends.get_defence(VIKINGS, NOW))
+        self.assertAlmostEqual(0.0, ActiveDefends.get_defence(KNIGHTS, NOW))
+
+    def test_defends_expire(self):
+        """Test defends stop counting after DEFEND_DURATION_MINUTES."""
+        ActiveDefends.add(VIKINGS, 1, 1, NOW)
+        ActiveDefends.add(VIKINGS, 2, 2, NOW + timedelta(minutes=10))
+
+        for minutes, expected_defence in (
+            (0,  0.55),
+            (30, 0.55),
+            (31, 0.5),
+            (40, 0.5),
+            (41, 0.0),
+        ):
+            actual_defence = ActiveDefends.get_defence(VIKINGS, NOW + timedelta(minutes=minutes))
+            self.assertAlmostEqual(expected_defence, actual_defence, msg=f"{minutes=}")
+
+    def test_defender_counts_once(self):
+        """Test several defends by one defender count once, until the last of
+        them expires.
+        """
+        ActiveDefends.add(VIKINGS, 1, 1, NOW)
+        ActiveDefends.add(VIKINGS, 1, 1, NOW + timedelta(minutes=20))
+
+        self.assertAlmostEqual(0.05,
+                               ActiveDefends.get_defence(VIKINGS, NOW + timedelta(minutes=20)))
+        self.assertAlmostEqual(0.05,
+                               ActiveDefends.get_defence(VIKINGS, NOW + timedelta(minutes=45)))
+        self.assertAlmostEqual(0.0, ActiveDefends.get_defence(VIKINGS, NOW + timedelta(minutes=51)))
+
+    def test_defender_level_is_their_latest(self):
+        """Test a defender who levelled up counts with their new level."""
+        ActiveDefends.add(VIKINGS, 1, 1, NOW)
+        ActiveDefends.add(VIKINGS, 1, 2, NOW + timedelta(minutes=1))
+
+        self.assertAlmostEqual(0.5, ActiveDefends.get_defence(VIKINGS, NOW + timedelta(minutes=1)))
+
+    def test_out_of_order_defends(self):
+        """Test a defend recorded after a later one still expires in time."""
+        ActiveDefends.add(VIKINGS, 1, 1, NOW + timedelta(minutes=10))
+        ActiveDefends.add(VIKINGS, 2, 2, NOW)
+
+        self.assertAlmostEqual(0.05,
+                               ActiveDefends.get_defence(VIKINGS, NOW + timedelta(minutes=35)))
+
+    async def test_warm_loads_active_defends_from_storage(self):
+        """Test warming replaces the known defends with the stored ones."""
+        ActiveDefends.add(KNIGHTS, 3, 1, NOW)
+
+        defend = Action(
+            action_id=1,
+            user_id=1,
+            team=VIKINGS,
+            type=ActionType.DEFEND,
+            was_successful=True,
+            was_critical=None,
+            items_dropped="",
+            raw_damage=None,
+            timestamp=NOW - timedelta(minutes=5),
+        )
+        defender = User(1, None, VIKINGS, "", 1, 1, 1, 2)
+
+        with patch.object(Storage, "get_actions", AsyncMock(return_value=[defend])), \
+             patch.object(Storage, "get_users_by_id", AsyncMock(return_value={1: defender})):
+            await ActiveDefends.warm(NOW)
+
+        self.assertAlmostEqual(0.0, ActiveDefends.get_defence(KNIGHTS, NOW))
+        self.assertAlmostEqual(0.5, ActiveDefends.get_defence(VIKINGS, NOW))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+import unittest
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import discord.errors
+
+from pombot.config import Pomwars
+from pombot.lib.pom_wars.scoreboard import Scoreboard
+from pombot.lib.storage import Storage
+from pombot.lib.types import TeamStats
+from tests.helpers.environment import Environment
+
+
+class TestScoreboardRefresh(IsolatedAsyncioTestCase):
+    """Test the background refresh scheduling of the scoreboard."""
+    scoreboard = None
+
+    @classmethod
+    def setUpClass(cls):
+        Environment.preserve()
+
+    async def asyncSetUp(self):
+        Environment.restore()
+        Pomwars.SCOREBOARD_REFRESH_INTERVAL_SECONDS = 0.05
+
+        self.scoreboard = Scoreboard(MagicMock(), [])
+        self.scoreboard.update = AsyncMock()
+        self.addCleanup(self.scoreboard.stop)
+
+    @classmethod
+    def tearDownClass(cls):
+        Environment.restore()
+
+    async def test_request_update_does_not_wait_for_redraw(self):
+        """Test request_update returns before the scoreboard is redrawn."""
+        self.scoreboard.request_update()
+
+        self.assertEqual(0, self.scoreboard.update.await_count)
+
+        await asyncio.sleep(0)
+        self.assertEqual(1, self.scoreboard.update.await_count)
+
+    async def test_burst_of_requests_is_coalesced(self):
+        """Test many requests within one interval cause at most one redraw at
+        the start and one at the end of the interval.
+        """
+        for _ in range(25):
+            self.scoreboard.request_update()
+            await asyncio.sleep(0)
+
+        await asyncio.sleep(Pomwars.SCOREBOARD_REFRESH_INTERVAL_SECONDS * 3)
+
+        self.assertEqual(2, self.scoreboard.update.await_count)
+
+    async def test_failed_redraw_does_not_stop_refreshing(self):
+        """Test an exception during a redraw is logged and later requests are
+        still served.
+        """
+        self.scoreboard.update.side_effect = [RuntimeError("boom"), None]
+
+        with self.assertLogs("pombot.lib.pom_wars.scoreboard", "ERROR"):
+            self.scoreboard.request_update()
+            await asyncio.sleep(0)
+
+        self.scoreboard.request_update()
+        await asyncio.sleep(Pomwars.SCOREBOARD_REFRESH_INTERVAL_SECONDS * 2)
+
+        self.assertEqual(2, self.scoreboard.update.await_count)
+
+
+class TestScoreboardUpdate(IsolatedAsyncioTestCase):
+    """Test the API calls made by Scoreboard.update."""
+    bot = None
+    channel = None
+    scoreboard = None
+    sent_messages = None
+
+    async def asyncSetUp(self):
+        self.bot = MagicMock()
+        self.sent_messages = []
+
+        self.channel = MagicMock(id=1)
+        self.channel.history.return_value.flatten = AsyncMock(return_value=[])
+        self.channel.send = AsyncMock(side_effect=self._create_message)
+
+        self.scoreboard = Scoreboard(self.bot, [self.channel])
+
+        patcher = patch.object(Storage, "get_team_stats", AsyncMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.set_damage(0)
+
+    def _create_message(self, **_kwargs) -> MagicMock:
+        message = MagicMock(author=self.bot.user)
+        message.edit = AsyncMock()
+        message.add_reaction = AsyncMock()
+        self.sent_messages.append(message)
+        return message
+
+    @staticmethod
+    def set_damage(damage: int):
+        """Make the Knights team report `damage`."""
+        Storage.get_team_stats.return_value = {
+            "Knight": TeamStats("Knight", raw_damage=damage),
+        }
+
+    async def test_unchanged_scoreboard_is_not_edited(self):
+        """Test the history is read once and identical redraws are skipped."""
+        await self.scoreboard.update()
+        await self.scoreboard.update()
+
+        self.assertEqual(1, self.channel.history.call_count)
+        self.assertEqual(1, self.channel.send.await_count)
+        self.assertEqual(0, self.sent_messages[0].edit.await_count)
+
+    async def test_changed_scoreboard_is_edited_without_history(self):
+        """Test a change in stats edits the remembered message."""
+        await self.scoreboard.update()
+
+        self.set_damage(100)
+        await self.scoreboard.update()
+
+        self.assertEqual(1, self.channel.history.call_count)
+        self.assertEqual(1, self.channel.send.await_count)
+        self.assertEqual(1, self.sent_messages[0].edit.await_count)
+
+    async def test_deleted_scoreboard_is_found_again(self):
+        """Test the history is read again after the scoreboard was deleted."""
+        await self.scoreboard.update()
+        self.sent_messages[0].edit.side_effect = discord.errors.NotFound(MagicMock(), "gone")
+
+        self.set_damage(100)
+        await self.scoreboard.update()
+
+        self.assertEqual(2, self.channel.history.call_count)
+        self.assertEqual(2, self.channel.send.await_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
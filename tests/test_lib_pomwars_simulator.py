@@ -0,0 +1,133 @@
+import itertools
+import random
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+from parameterized import parameterized
+
+from pombot.config import Pomwars
+from pombot.lib.pom_wars import simulator
+from pombot.lib.pom_wars.common import get_average_poms
+from pombot.lib.pom_wars.team import Team
+from pombot.lib.pom_wars.types import Attack, Outcome
+from pombot.lib.types import Action, ActionContext, ActionType
+from tests.helpers.environment import Environment
+
+
+class TestSimulatorFormulas(unittest.TestCase):
+    """Test the vectorized formulas agree with the ones used by the bot."""
+    @classmethod
+    def setUpClass(cls):
+        Environment.preserve()
+
+    def setUp(self):
+        Environment.restore()
+
+    @classmethod
+    def tearDownClass(cls):
+        Environment.restore()
+
+    def test_attack_damage_matches_attack(self):
+        """Test attack_damage against Attack.damage."""
+        for is_heavy, outcome, defend_levels in itertools.product(
+            (False, True),
+            (Outcome.REGULAR, Outcome.CRITICAL),
+            ((), (1, ), (1, 5), (5, 5, 5, 5, 5, 5)),
+        ):
+            enemy_defence = sum(Pomwars.DEFEND_LEVEL_MULTIPLIERS[level]
+                                for level in defend_levels)
+            attack = Attack(Team.KNIGHTS, None, "", outcome, is_heavy, enemy_defence)
+
+            actual_damage = simulator.attack_damage(
+                np.array([is_heavy]),
+                np.array([outcome == Outcome.CRITICAL]),
+                np.array([enemy_defence]),
+            )
+
+            self.assertAlmostEqual(attack.damage, actual_damage[0])
+
+    @parameterized.expand([
+        ("only successful", True,  None),
+        ("shadow cap",      False, 10),
+        ("no shadow cap",   False, 0),
+    ])
+    def test_average_daily_actions_matches_get_average_poms(
+        self,
+        test_name,
+        consider_only_successful,
+        shadow_cap_limit,
+    ):
+        """Test average_daily_actions against get_average_poms."""
+        Pomwars.CONSIDER_ONLY_SUCCESSFUL_ACTIONS = consider_only_successful
+        Pomwars.SHADOW_CAP_LIMIT_PER_DAY = shadow_cap_limit
+
+        rng = random.Random(1)
+        daily_counts = np.array([[rng.choice((0, 0, 1, 3, 7, 12, 25))
+                                  for _ in range(20)] for _ in range(5)])
+        first_day = datetime(2021, 1, 1, 12)
+
+        expected_averages = np.zeros(daily_counts.shape, dtype=int)
+
+        for player, counts in enumerate(daily_counts):
+            actions = []
+
+            for day, count in enumerate(counts):
+                timestamp = first_day + timedelta(days=day)
+                context = ActionContext(timestamp=timestamp, user=None, actions=actions)
+                expected_averages[player, day] = get_average_poms(context)
+
+                actions.extend(Action(
+                    action_id=0,
+                    user_id=player,
+                    team=Team.KNIGHTS,
+                    type=ActionType.NORMAL_ATTACK,
+                    was_successful=True,
+                    was_critical=False,
+                    items_dropped="",
+                    raw_damage=0,
+                    timestamp=timestamp + timedelta(minutes=1),
+                ) for _ in range(count))
+
+        actual_averages = simulator.average_daily_actions(daily_counts)
+
+        np.testing.assert_array_equal(expected_averages, actual_averages, test_name)
+
+
+class TestSimulation(unittest.TestCase):
+    """Test simulating whole seasons."""
+    def test_simulation_is_reproducible(self):
+        """Test the same seed gives the same results and the same players in
+        any batch size.
+        """
+        season = simulator.Season(players_per_team=50, days=10, max_level=5, seed=7)
+        expected = simulator.simulate(season)
+        repeated = simulator.simulate(season)
+
+        season.batch_size = 30
+        batched = simulator.simulate(season)
+
+        for team in Team:
+            self.assertEqual((50, 10), expected[team].actions.shape)
+            np.testing.assert_array_equal(expected[team].damage, repeated[team].damage)
+            np.testing.assert_array_equal(expected[team].actions, batched[team].actions)
+            self.assertTrue(np.isin(batched[team].tiers, (1, 2, 3)).all())
+
+    def test_simulation_without_defends_or_criticals(self):
+        """Test every damage is base damage when nothing modifies it."""
+        base_chance_for_critical = Pomwars.BASE_CHANCE_FOR_CRITICAL
+        self.addCleanup(setattr, Pomwars, "BASE_CHANCE_FOR_CRITICAL", base_chance_for_critical)
+        Pomwars.BASE_CHANCE_FOR_CRITICAL = 0
+
+        season = simulator.Season(
+            players_per_team=20, days=5, heavy_attack_ratio=0, defend_ratio=0, seed=3)
+
+        for result in simulator.simulate(season).values():
+            self.assertTrue(
+                (result.damage % Pomwars.BASE_DAMAGE_FOR_NORMAL_ATTACKS == 0).all())
+            self.assertTrue(
+                (result.damage <= result.actions * Pomwars.BASE_DAMAGE_FOR_NORMAL_ATTACKS).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import textwrap
+import unittest
+
+from parameterized import parameterized
+
+
+class TestBackendImports(unittest.TestCase):
+    """Test choosing a storage backend imports only that backend."""
+    @parameterized.expand([
+        ("mysql", "aiosqlite", "MySQLBackend"),
+        ("sqlite", "aiomysql", "SQLiteBackend"),
+        ("memory", "aiomysql", "MemoryBackend"),
+    ])
+    def test_other_drivers_are_not_needed(self, backend, missing_driver, expected_type):
+        """Test storage is usable when the driver of another backend is not
+        installed.
+        """
+        # A None entry makes importing the driver raise ImportError.
+        script = textwrap.dedent(f"""
+            import sys
+            sys.modules["{missing_driver}"] = None
+
+            from pombot.lib.storage import _backend
+            print(type(_backend()).__name__)
+        """)
+        env = dict(os.environ, STORAGE_BACKEND=backend, TEST_STORAGE_BACKEND=backend)
+
+        result = subprocess.run([sys.executable, "-c", script], env=env, check=True,
+                                capture_output=True, text=True)
+
+        self.assertEqual(expected_type, result.stdout.strip())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from pombot.config import Config
+from pombot.lib.storage.group_commit import _GroupCommit
+
+
+class TestGroupCommit(IsolatedAsyncioTestCase):
+    """Test concurrent writes are committed together."""
+    groups = None
+    writes = None
+    patchers = None
+
+    async def asyncSetUp(self):
+        self.groups = []
+        self.writes = _GroupCommit(self.commit)
+
+        self.patchers = [patch.object(Config, "WRITE_BATCH_DELAY_MS", 10),
+                         patch.object(Config, "WRITE_BATCH_MAX_ROWS", 4)]
+
+        for patcher in self.patchers:
+            patcher.start()
+
+    async def asyncTearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    async def commit(self, writes):
+        """Record the group, failing it when it holds a bad write."""
+        self.groups.append(list(writes))
+
+        if "bad" in writes:
+            raise ValueError("constraint violated")
+
+        return [write.upper() for write in writes]
+
+    async def test_concurrent_writes_are_committed_together(self):
+        """Test writes queued within the delay share one commit."""
+        results = await asyncio.gather(*[self.writes.submit(write) for write in "abc"])
+
+        self.assertEqual(["A", "B", "C"], results)
+        self.assertEqual([["a", "b", "c"]], self.groups)
+
+    async def test_full_group_is_committed_without_waiting(self):
+        """Test a group is committed once it holds the most rows."""
+        with patch.object(Config, "WRITE_BATCH_DELAY_MS", 60_000):
+            results = await asyncio.wait_for(asyncio.gather(
+                self.writes.submit("a", rows=3), self.writes.submit("b"),
+                self.writes.submit("c", rows=4),
+            ), timeout=1)
+
+        self.assertEqual(["A", "B", "C"], results)
+        self.assertEqual([["a", "b"], ["c"]], self.groups)
+
+    async def test_failed_write_fails_only_its_caller(self):
+        """Test a failed group is retried one write at a time."""
+        results = await asyncio.gather(*[self.writes.submit(write) for write in ("a", "bad", "c")],
+                                       return_exceptions=True)
+
+        self.assertEqual("A", results[0])
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual("C", results[2])
+        self.assertEqual([["a", "bad", "c"], ["a"], ["bad"], ["c"]], self.groups)
+
+    async def test_drain_commits_queued_writes(self):
+        """Test draining commits writes still waiting for the delay."""
+        with patch.object(Config, "WRITE_BATCH_DELAY_MS", 60_000):
+            write = asyncio.ensure_future(self.writes.submit("a"))
+            await asyncio.sleep(0)
+            await self.writes.drain()
+
+        self.assertEqual("A", await write)
+
+
+if __name__ == "__main__":
+    unittest.main()
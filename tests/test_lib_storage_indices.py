@@ -0,0 +1,205 @@
+import random
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from parameterized import parameterized
+
+import pombot.lib.pom_wars.errors as war_crimes
+from pombot.lib.pom_wars.team import Team
+from pombot.lib.storage import Storage, _backend
+from pombot.lib.storage.indices import (_DailyPomCounts, _EventCalendar,
+                                        _UserDirectory)
+from pombot.lib.types import DateRange, Event, User
+
+FIRST_DAY = date(2021, 8, 2)
+NOW = datetime(2021, 8, 2, 12)
+
+
+class TestDailyPomCounts(unittest.TestCase):
+    """Test the in-memory index of poms logged per day."""
+    def setUp(self):
+        self.counts = _DailyPomCounts()
+
+    def test_counts_are_applied_only_once_loaded(self):
+        """Test poms are not counted before the index is loaded."""
+        self.counts.add(FIRST_DAY, 3)
+        self.assertEqual(0, self.counts.count())
+
+        self.counts.load({FIRST_DAY: 2}, self.counts.generation)
+        self.counts.add(FIRST_DAY, 3)
+
+        self.assertEqual(5, self.counts.count())
+
+    def test_load_which_raced_with_a_write_is_refused(self):
+        """Test counts read before poms were added are not loaded."""
+        generation = self.counts.generation
+        self.counts.add(FIRST_DAY, 1)
+        self.counts.load({FIRST_DAY: 2}, generation)
+
+        self.assertFalse(self.counts.is_loaded)
+
+    @parameterized.expand([
+        ("whole range", None, None),
+        ("first day only", FIRST_DAY, FIRST_DAY),
+        ("before any poms", FIRST_DAY - timedelta(days=30), FIRST_DAY - timedelta(days=1)),
+        ("after every pom", FIRST_DAY + timedelta(days=400), None),
+        ("open start", None, FIRST_DAY + timedelta(days=45)),
+        ("open end", FIRST_DAY + timedelta(days=45), None),
+        ("inner range", FIRST_DAY + timedelta(days=10), FIRST_DAY + timedelta(days=20)),
+        ("empty range", FIRST_DAY + timedelta(days=20), FIRST_DAY + timedelta(days=10)),
+    ])
+    def test_count_matches_the_sum_of_days(self, _, first_day, last_day):
+        """Test ranges are counted like summing the counts of their days,
+        including days added, removed and added outside the loaded range.
+        """
+        random.seed(42)
+        expected = {FIRST_DAY + timedelta(days=d): random.randint(1, 5) for d in range(0, 90, 3)}
+        self.counts.load(expected, self.counts.generation)
+
+        for _ in range(200):
+            day = FIRST_DAY + timedelta(days=random.randint(-60, 300))
+            count = random.choice([1, 2, -expected.get(day, 0)])
+            expected[day] = expected.get(day, 0) + count
+            self.counts.add(day, count)
+
+        self.assertEqual(
+            sum(count for day, count in expected.items()
+                if (first_day is None or first_day <= day)
+                and (last_day is None or day <= last_day)),
+            self.counts.count(first_day, last_day),
+        )
+
+
+class TestEventCalendar(unittest.TestCase):
+    """Test the in-memory calendar of events."""
+    def setUp(self):
+        self.calendar = _EventCalendar()
+        self.calendar.load([
+            Event(2, "second", 10, NOW + timedelta(days=2), NOW + timedelta(days=3)),
+            Event(1, "first", 10, NOW, NOW + timedelta(days=1)),
+        ], self.calendar.generation)
+
+    def test_events_are_found_around_a_moment(self):
+        """Test ongoing and overlapping events are found by date."""
+        self.assertEqual(["first"], [event.event_name for event in
+                                     self.calendar.get_ongoing(NOW + timedelta(hours=1))])
+        self.assertEqual([], self.calendar.get_ongoing(NOW + timedelta(days=1, hours=1)))
+        self.assertEqual(["first", "second"], [event.event_name for event in
+                                               self.calendar.get_overlapping(DateRange(
+                                                   NOW + timedelta(hours=1),
+                                                   NOW + timedelta(days=2, hours=1)))])
+
+    def test_poms_are_counted_toward_ongoing_events(self):
+        """Test poms count toward the events they were logged in only."""
+        self.calendar.add_poms(NOW + timedelta(hours=1), 3)
+        self.calendar.add_poms(NOW + timedelta(days=1, hours=1), 5)
+        self.calendar.add_poms(NOW + timedelta(hours=2), -1)
+
+        self.assertEqual([2, 0], [event.pom_count for event in self.calendar.get_all()])
+
+    def test_returned_events_are_copies(self):
+        """Test changing a returned event does not change the calendar."""
+        event, _ = self.calendar.get_all()
+        event.pom_count = 100
+
+        self.assertEqual(0, self.calendar.get_all()[0].pom_count)
+
+    def test_transitions_are_in_order(self):
+        """Test starts and ends are listed in order, and the next one is
+        found after any moment.
+        """
+        self.calendar.add(Event(3, "third", 10, NOW + timedelta(hours=1), NOW + timedelta(days=4)))
+        self.calendar.remove(2)
+
+        self.assertEqual(
+            [(NOW + timedelta(hours=1), "third"), (NOW + timedelta(days=1), "first")],
+            [(moment, event.event_name) for moment, event in
+             self.calendar.get_transitions(NOW, NOW + timedelta(days=2, hours=1))])
+        self.assertEqual(NOW + timedelta(days=4),
+                         self.calendar.get_next_transition(NOW + timedelta(days=1)))
+        self.assertIsNone(self.calendar.get_next_transition(NOW + timedelta(days=4)))
+
+    def test_listeners_are_called_when_events_change(self):
+        """Test listeners hear about new and removed events."""
+        calls = []
+        self.calendar.add_listener(lambda: calls.append(None))
+
+        self.calendar.add(Event(3, "third", 10, NOW, NOW + timedelta(days=1)))
+        self.calendar.remove(3)
+        self.calendar.add_poms(NOW, 1)
+
+        self.assertEqual(2, len(calls))
+
+
+class TestUserDirectory(unittest.TestCase):
+    """Test the in-memory directory of users."""
+    def setUp(self):
+        self.directory = _UserDirectory()
+        self.user = User(1, "+00:00", Team.KNIGHTS.value, None, 1, 1, 1, 1)
+
+    def test_users_are_known_only_once_loaded(self):
+        """Test the directory answers for users and non-users once loaded."""
+        self.assertFalse(self.directory.has(1))
+
+        self.directory.load([self.user], self.directory.generation)
+
+        self.assertTrue(self.directory.has(1))
+        self.assertEqual(self.user, self.directory.get(1))
+        self.assertTrue(self.directory.has(2))
+        self.assertIsNone(self.directory.get(2))
+
+    def test_invalidated_user_is_read_again(self):
+        """Test a written user is unknown until put, and that a put which
+        raced with a write is discarded.
+        """
+        self.directory.load([self.user], self.directory.generation)
+        generation = self.directory.generation
+        self.directory.invalidate(1)
+
+        self.directory.put(1, self.user, generation)
+        self.assertFalse(self.directory.has(1))
+
+        self.directory.put(1, None, self.directory.generation)
+        self.assertTrue(self.directory.has(1))
+        self.assertIsNone(self.directory.get(1))
+
+
+class TestStorageUserDirectory(IsolatedAsyncioTestCase):
+    """Test user lookups through Storage are answered from the directory."""
+    async def asyncSetUp(self):
+        await Storage.create_tables_if_not_exists()
+        await Storage.delete_all_rows_from_all_tables()
+        await Storage.add_user(1, timezone(timedelta()), Team.KNIGHTS.value)
+        await Storage.load_user_directory()
+
+    async def asyncTearDown(self):
+        await Storage.delete_all_rows_from_all_tables()
+        await Storage.close_connection_pool()
+
+    async def test_lookups_need_no_query(self):
+        """Test loaded users, and users who do not exist, need no query."""
+        with patch.object(_backend(), "get_user_by_id") as get_user_by_id, \
+                patch.object(_backend(), "get_users_by_id") as get_users_by_id:
+            self.assertEqual(Team.KNIGHTS.value, (await Storage.get_user_by_id(1)).team)
+            self.assertEqual([1], list(await Storage.get_users_by_id([1, 1, 2])))
+
+            with self.assertRaises(war_crimes.UserDoesNotExistError):
+                await Storage.get_user_by_id(2)
+
+        get_user_by_id.assert_not_called()
+        get_users_by_id.assert_not_called()
+
+    async def test_writes_are_seen_by_lookups(self):
+        """Test new users, team swaps and timezone changes are read again."""
+        await Storage.add_user(2, timezone(timedelta()), Team.VIKINGS.value)
+        await Storage.update_user_team(1, Team.VIKINGS.value)
+        await Storage.set_user_timezone(2, timezone(timedelta(hours=-5)))
+
+        self.assertEqual(Team.VIKINGS.value, (await Storage.get_user_by_id(1)).team)
+        self.assertEqual("-0500", (await Storage.get_users_by_id([2]))[2].timezone)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import asyncio
+import unittest
+from datetime import timedelta, timezone
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from pombot.lib.pom_wars.team import Team
+from pombot.lib.storage import Storage, _backend
+from pombot.lib.storage.indices import UserDirectory
+from pombot.lib.storage.loaders import _BatchLoader, _SingleFlight
+
+
+class TestSingleFlight(IsolatedAsyncioTestCase):
+    """Test identical concurrent reads share one query."""
+    reads = None
+    num_queries = None
+
+    async def asyncSetUp(self):
+        self.reads = _SingleFlight()
+        self.num_queries = 0
+
+    async def read(self):
+        """Count a query, and return its number after a moment."""
+        self.num_queries += 1
+        await asyncio.sleep(0.01)
+        return self.num_queries
+
+    async def test_concurrent_reads_share_one_query(self):
+        """Test reads of one key share a query, and other keys do not."""
+        results = await asyncio.gather(*[self.reads.load("key", self.read) for _ in range(5)],
+                                       self.reads.load("other", self.read))
+
+        self.assertEqual(2, self.num_queries)
+        self.assertEqual(1, len(set(results[:5])))
+
+    async def test_reads_after_forget_query_again(self):
+        """Test a read made after a write does not join an earlier read."""
+        first = asyncio.ensure_future(self.reads.load("key", self.read))
+        await asyncio.sleep(0)
+        self.reads.forget()
+
+        self.assertEqual((1, 2), (await first, await self.reads.load("key", self.read)))
+
+    async def test_cancelled_caller_does_not_cancel_the_read(self):
+        """Test the other callers still receive the shared result."""
+        first = asyncio.ensure_future(self.reads.load("key", self.read))
+        second = asyncio.ensure_future(self.reads.load("key", self.read))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(1, await second)
+
+
+class TestBatchLoader(IsolatedAsyncioTestCase):
+    """Test lookups made in the same tick are read in one batch."""
+    batches = None
+    loader = None
+
+    async def asyncSetUp(self):
+        self.batches = []
+        self.loader = _BatchLoader(self.read_many)
+
+    async def read_many(self, keys):
+        """Record the batch, and find every key but 3."""
+        self.batches.append(sorted(keys))
+        return {key: key * 10 for key in keys if key != 3}
+
+    async def test_lookups_in_one_tick_are_batched(self):
+        """Test distinct keys are read once, and missing keys are None."""
+        results = await asyncio.gather(self.loader.load(1), self.loader.load(2),
+                                       self.loader.load(1), self.loader.load_many([2, 3]))
+
+        self.assertEqual([[1, 2, 3]], self.batches)
+        self.assertEqual([10, 20, 10, {2: 20}], results)
+
+    async def test_failed_read_raises_for_every_caller(self):
+        """Test an error reading the batch is raised to each lookup."""
+        async def read_many(_):
+            raise RuntimeError("query failed")
+
+        loader = _BatchLoader(read_many)
+        results = await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+    async def test_cancelled_read_cancels_every_caller(self):
+        """Test lookups do not wait forever on a read which was cancelled."""
+        async def read_many(_):
+            raise asyncio.CancelledError()
+
+        loader = _BatchLoader(read_many)
+        results = await asyncio.wait_for(asyncio.gather(loader.load(1), loader.load(2),
+                                                        return_exceptions=True), timeout=1)
+
+        self.assertTrue(all(isinstance(result, asyncio.CancelledError) for result in results))
+
+
+class TestBatchLoaderAcrossLoops(unittest.TestCase):
+    """Test a loader outlives the event loops it is used from."""
+    def test_batch_left_by_a_closed_loop_is_dropped(self):
+        """Test lookups are dispatched after a loop closed with a batch
+        still pending.
+        """
+        async def read_many(keys):
+            return {key: key * 10 for key in keys}
+
+        loader = _BatchLoader(read_many)
+        loop = asyncio.new_event_loop()
+
+        # Stop the loop after the lookup is queued but before its dispatch.
+        loop.call_soon(loop.stop)
+        loop.create_task(loader.load(1))
+        loop.run_forever()
+        loop.close()
+
+        self.assertEqual(20, asyncio.run(asyncio.wait_for(loader.load(2), timeout=1)))
+
+
+class TestStorageCoalescing(IsolatedAsyncioTestCase):
+    """Test bursts of Storage reads scale with distinct keys."""
+    async def asyncSetUp(self):
+        await Storage.create_tables_if_not_exists()
+        await Storage.delete_all_rows_from_all_tables()
+
+        for user_id in range(1, 4):
+            await Storage.add_user(user_id, timezone(timedelta()), Team.KNIGHTS.value)
+
+    async def asyncTearDown(self):
+        await Storage.delete_all_rows_from_all_tables()
+        await Storage.close_connection_pool()
+
+    async def test_identical_reads_share_one_query(self):
+        """Test a burst of identical reads makes one query."""
+        backend = _backend()
+
+        with patch.object(backend, "sum_team_damage",
+                          wraps=backend.sum_team_damage) as sum_team_damage:
+            totals = await asyncio.gather(*[Storage.sum_team_damage(Team.KNIGHTS.value)
+                                            for _ in range(10)])
+
+        self.assertEqual([0] * 10, totals)
+        sum_team_damage.assert_called_once()
+
+    async def test_user_lookups_are_merged(self):
+        """Test users missing from the directory are read in one query."""
+        backend = _backend()
+        await Storage.load_user_directory()
+
+        for user_id in range(1, 4):
+            UserDirectory.invalidate(user_id)
+
+        with patch.object(backend, "get_users_by_id",
+                          wraps=backend.get_users_by_id) as get_users_by_id:
+            users = await asyncio.gather(*[Storage.get_user_by_id(user_id)
+                                           for user_id in (1, 2, 3, 1)])
+
+        self.assertEqual([1, 2, 3, 1], [user.user_id for user in users])
+        get_users_by_id.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
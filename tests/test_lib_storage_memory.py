@@ -0,0 +1,123 @@
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from unittest.async_case import IsolatedAsyncioTestCase
+
+import pombot.lib.pom_wars.errors as war_crimes
+from pombot.config import Config
+from pombot.lib import errors
+from pombot.lib.pom_wars.team import Team
+from pombot.lib.storage.memory import MemoryBackend
+from pombot.lib.types import (ActionStreak, ActionType, DailyActions,
+                              DateRange, SessionType)
+from tests.helpers import mock_discord
+
+NOW = datetime(2021, 8, 2, 12)
+
+
+class TestMemoryBackend(IsolatedAsyncioTestCase):
+    """Test the in-memory storage backend."""
+    backend = None
+
+    async def asyncSetUp(self):
+        self.backend = MemoryBackend()
+
+    def test_unit_tests_use_the_memory_backend_by_default(self):
+        """Test unit tests need no database server unless configured to."""
+        self.assertEqual(Config.TEST_STORAGE_BACKEND, Config.STORAGE_BACKEND)
+
+    async def test_actions_update_rollups_atomically(self):
+        """Test adding actions updates the team stats, daily actions and
+        streak alongside the action.
+        """
+        user = mock_discord.MockUser()
+        await self.backend.add_user(user.id, timezone(timedelta()), Team.KNIGHTS.value)
+
+        for minutes, was_successful in ((0, True), (1, False), (2, False)):
+            await self.backend.add_pom_war_action(
+                user, Team.KNIGHTS.value, ActionType.NORMAL_ATTACK, was_successful,
+                False, "", 1.5, NOW + timedelta(minutes=minutes))
+
+        await self.backend.add_pom_war_action(
+            user, Team.KNIGHTS.value, ActionType.BRIBE, False, None, "", 0, NOW)
+
+        team_stats = (await self.backend.get_team_stats())[Team.KNIGHTS.value]
+        self.assertEqual((450, 3, 1, 1), (team_stats.raw_damage, team_stats.normal_attacks,
+                                          team_stats.bribes, team_stats.population))
+        self.assertEqual(450, await self.backend.sum_team_damage(Team.KNIGHTS.value))
+
+        user_row, actions, daily_actions, streak = await self.backend.get_action_context_rows(
+            user,
+            actions_range=DateRange(NOW, NOW + timedelta(hours=1)),
+            daily_actions_since=date(2021, 8, 1),
+            include_streak=True,
+        )
+
+        self.assertEqual(user.id, user_row.user_id)
+        self.assertEqual([ActionType.NORMAL_ATTACK, ActionType.BRIBE, ActionType.NORMAL_ATTACK,
+                          ActionType.NORMAL_ATTACK], [action.type for action in actions])
+        self.assertEqual({NOW.date(): DailyActions(NOW.date(), 3, 1)}, daily_actions)
+        self.assertEqual(ActionStreak(NOW.date(), 3), streak)
+
+    async def test_returned_rows_are_copies(self):
+        """Test changing a returned row does not change the stored row."""
+        user = mock_discord.MockUser()
+        await self.backend.add_poms_to_user_session(user, "descript", 1, NOW)
+
+        pom, = await self.backend.get_poms(user=user)
+        pom.descript = "changed"
+
+        pom, = await self.backend.get_poms(user=user)
+        self.assertEqual("descript", pom.descript)
+
+    async def test_delete_poms_by_session(self):
+        """Test only the poms of the requested session are deleted."""
+        user = mock_discord.MockUser()
+        await self.backend.add_poms_to_user_session(user, None, 2, NOW)
+        await self.backend.bank_user_session_poms(user)
+        await self.backend.add_poms_to_user_session(user, None, 3, NOW)
+
+        self.assertEqual({NOW: 3}, await self.backend.delete_poms(
+            user=user, session=SessionType.CURRENT))
+        self.assertEqual(2, len(await self.backend.get_poms(user=user)))
+        self.assertEqual({NOW.date(): 2}, await self.backend.get_daily_pom_counts())
+
+    async def test_get_unsuccessful_actions(self):
+        """Test asking for unsuccessful actions returns only those."""
+        user = mock_discord.MockUser()
+        await self.backend.add_user(user.id, timezone(timedelta()), Team.KNIGHTS.value)
+
+        for was_successful in (True, False, False):
+            await self.backend.add_pom_war_action(
+                user, Team.KNIGHTS.value, ActionType.NORMAL_ATTACK, was_successful,
+                False, "", 1, NOW)
+
+        self.assertEqual(2, len(await self.backend.get_actions(was_successful=False)))
+        self.assertEqual(1, len(await self.backend.get_actions(was_successful=True)))
+
+    async def test_duplicate_user_is_refused(self):
+        """Test adding a user twice raises rather than replacing them."""
+        await self.backend.add_user(1, timezone(timedelta()), Team.VIKINGS.value)
+
+        with self.assertRaises(war_crimes.UserAlreadyExistsError):
+            await self.backend.add_user(1, timezone(timedelta()), Team.KNIGHTS.value)
+
+        self.assertEqual(Team.VIKINGS.value, (await self.backend.get_user_by_id(1)).team)
+        self.assertEqual(1, (await self.backend.get_team_stats())[Team.VIKINGS.value].population)
+
+    async def test_event_columns_are_limited_like_sql(self):
+        """Test events which would not fit in the SQL events table are
+        refused.
+        """
+        date_range = DateRange(NOW, NOW + timedelta(days=1))
+
+        with self.assertRaises(errors.EventCreationError):
+            await self.backend.add_new_event("x" * 101, 10, date_range)
+
+        with self.assertRaises(errors.EventCreationError):
+            await self.backend.add_new_event("event", 2 ** 31, date_range)
+
+        self.assertEqual([], await self.backend.get_all_events())
+
+
+if __name__ == "__main__":
+    unittest.main()
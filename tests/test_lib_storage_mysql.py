@@ -0,0 +1,153 @@
+import sqlite3
+import unittest
+from contextlib import asynccontextmanager
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from pombot.config import Config
+from pombot.lib.storage.mysql import MySQLBackend
+
+
+class _FakeSchema:
+    """A MySQL schema as seen by the migration runner: its tables, indices,
+    columns and applied versions.
+
+    Updates are run against `rows`, a database holding the rows which the
+    migrations backfill, when one is given.
+    """
+    def __init__(self, version: int, existing: set = (),
+                 rows: sqlite3.Connection = None) -> None:
+        self.version = version
+        self.existing = set(existing)
+        self.rows = rows
+        self.queries = []
+
+    @asynccontextmanager
+    async def cursor(self):
+        """Yield a cursor which answers the runner's queries."""
+        yield _FakeCursor(self)
+
+
+class _FakeCursor:
+    """A cursor over a _FakeSchema which records every query."""
+    def __init__(self, schema: _FakeSchema) -> None:
+        self._schema = schema
+        self._rows = []
+
+    async def execute(self, query: str, values=()):
+        """Record the query and prepare its result."""
+        query = " ".join(query.split())
+        self._schema.queries.append(query)
+
+        if query.startswith("SHOW TABLES"):
+            self._rows = [(table["name"], ) for table in MySQLBackend.TABLES]
+            self._rows.append((Config.SCHEMA_VERSION_TABLE, ))
+        elif query.startswith("SELECT MAX(version)"):
+            self._rows = [(self._schema.version or None, )]
+        elif "information_schema" in query:
+            self._rows = [(1, )] if tuple(values) in self._schema.existing else []
+        elif query.startswith(f"INSERT INTO {Config.SCHEMA_VERSION_TABLE}"):
+            self._schema.version = values[0]
+        elif query.startswith("UPDATE") and self._schema.rows is not None:
+            self._schema.rows.execute(query)
+
+    async def fetchone(self):
+        """Return the first row of the last query."""
+        return self._rows[0] if self._rows else None
+
+    async def fetchall(self):
+        """Return every row of the last query."""
+        return self._rows
+
+    async def close(self):
+        """Nothing to release."""
+
+
+class TestMySQLMigrations(IsolatedAsyncioTestCase):
+    """Test the schema migrations run against a MySQL server."""
+    async def migrate(self, schema: _FakeSchema):
+        """Create the tables of a MySQL backend whose server holds `schema`."""
+        backend = MySQLBackend()
+
+        with patch.object(backend, "_cursor", schema.cursor):
+            await backend.create_tables_if_not_exists()
+
+    async def test_pending_migrations_are_applied_in_order(self):
+        """Test every migration newer than the schema version is applied,
+        and the others are skipped.
+        """
+        latest_version = max(migration["version"] for migration in MySQLBackend.MIGRATIONS)
+        schema = _FakeSchema(version=3)
+
+        await self.migrate(schema)
+
+        self.assertEqual(latest_version, schema.version)
+        self.assertFalse(any(query.startswith("CREATE INDEX") for query in schema.queries))
+        self.assertEqual(2, sum(query.startswith(f"ALTER TABLE {Config.EVENTS_TABLE}")
+                                for query in schema.queries))
+
+        schema.queries.clear()
+        await self.migrate(schema)
+
+        self.assertFalse(any(query.startswith(("INSERT", "UPDATE", "ALTER"))
+                             for query in schema.queries))
+
+    async def test_partly_applied_migration_is_completed(self):
+        """Test indices and columns left by a failed migration are skipped
+        rather than created again.
+        """
+        schema = _FakeSchema(version=0, existing={
+            (Config.POMS_TABLE, "poms_user_session_time"),
+            (Config.EVENTS_TABLE, "pom_count"),
+        })
+
+        await self.migrate(schema)
+
+        self.assertEqual([f"CREATE INDEX poms_time ON {Config.POMS_TABLE} (time_set);"],
+                         [query for query in schema.queries
+                          if query.startswith("CREATE INDEX poms_")])
+        self.assertEqual([f"ALTER TABLE {Config.EVENTS_TABLE} ADD COLUMN goal_reached "
+                          "TINYINT(1) NOT NULL DEFAULT 0;"],
+                         [query for query in schema.queries if query.startswith("ALTER")])
+
+    async def test_events_without_a_goal_are_backfilled(self):
+        """Test events created without a goal are left unreached, and goals
+        already reached stay reached, rather than failing the migration on
+        the NOT NULL goal_reached column.
+        """
+        rows = sqlite3.connect(":memory:")
+        self.addCleanup(rows.close)
+        rows.executescript(f"""
+            CREATE TABLE {Config.POMS_TABLE} (time_set DATETIME NOT NULL);
+            CREATE TABLE {Config.EVENTS_TABLE} (
+                event_name VARCHAR(100) NOT NULL,
+                pom_goal INT(11),
+                start_date DATETIME NOT NULL,
+                end_date DATETIME NOT NULL,
+                pom_count INT(11) NOT NULL DEFAULT 0,
+                goal_reached TINYINT(1) NOT NULL DEFAULT 0
+            );
+            INSERT INTO {Config.POMS_TABLE} VALUES
+                ('2021-08-02 12:00:00'), ('2021-08-02 13:00:00');
+            INSERT INTO {Config.EVENTS_TABLE} VALUES
+                ('No goal', NULL, '2021-08-02', '2021-08-03', 0, 0),
+                ('Reached', 2, '2021-08-02', '2021-08-03', 0, 0),
+                ('Announced', 5, '2021-08-02', '2021-08-03', 0, 1),
+                ('Unreached', 5, '2021-08-02', '2021-08-03', 0, 0);
+        """)
+        schema = _FakeSchema(version=7, rows=rows)
+
+        await self.migrate(schema)
+
+        self.assertEqual([
+            ("No goal", 2, 0),
+            ("Reached", 2, 1),
+            ("Announced", 2, 1),
+            ("Unreached", 2, 0),
+        ], rows.execute(f"""
+            SELECT event_name, pom_count, goal_reached FROM {Config.EVENTS_TABLE};
+        """).fetchall())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+from parameterized import parameterized
+
+from pombot.lib.storage.queries import (Filter, Query, date_range_filter,
+                                        user_filter)
+from pombot.lib.types import DateRange
+
+NOW = datetime(2021, 8, 2, 12)
+
+
+class TestQuery(unittest.TestCase):
+    """Test statements are compiled from the filters given a value."""
+    def setUp(self):
+        self.query = Query("SELECT * FROM poms", where={
+            "user": user_filter(),
+            "descript": Filter("descript=%s"),
+            "was_successful": Filter("was_successful=%s", lambda value: (int(value),)),
+            "date_range": date_range_filter(),
+        }, tail={
+            "limit": Filter("LIMIT %s"),
+        })
+
+    @parameterized.expand([
+        ("no filters", {}, "SELECT * FROM poms", []),
+        ("one filter", {"descript": "x"}, "SELECT * FROM poms WHERE descript=%s", ["x"]),
+        ("None is no filter", {"descript": None, "limit": 2},
+         "SELECT * FROM poms LIMIT %s", [2]),
+        ("False is a filter", {"was_successful": False},
+         "SELECT * FROM poms WHERE was_successful=%s", [0]),
+        ("several filters",
+         {"user": SimpleNamespace(id=7), "date_range": DateRange(NOW, NOW), "limit": 1},
+         "SELECT * FROM poms WHERE userID=%s AND time_set >= %s AND time_set <= %s LIMIT %s",
+         [7, NOW, NOW, 1]),
+    ])
+    def test_bind(self, _, values, expected_sql, expected_params):
+        """Test the SQL and parameters of each combination of filters."""
+        self.assertEqual((expected_sql, expected_params), self.query.bind(**values))
+
+    def test_each_combination_is_compiled_once(self):
+        """Test binding the same filters again reuses the compiled SQL."""
+        first, _ = self.query.bind(descript="a", limit=1)
+        second, params = self.query.bind(descript="b", limit=2)
+
+        self.assertIs(first, second)
+        self.assertEqual(["b", 2], params)
+
+    def test_conditions_and_end(self):
+        """Test fixed conditions and the end of the statement are kept."""
+        query = Query("SELECT COUNT(1) FROM poms", where={"descript": Filter("descript=%s")},
+                      conditions=["current_session=1"], end="GROUP BY descript")
+
+        self.assertEqual(
+            ("SELECT COUNT(1) FROM poms WHERE current_session=1 GROUP BY descript", []),
+            query.bind())
+        self.assertEqual(
+            "SELECT COUNT(1) FROM poms WHERE current_session=1 AND descript=%s GROUP BY descript",
+            query.bind(descript="x")[0])
+
+    def test_unknown_filter_is_refused(self):
+        """Test a misspelled filter raises rather than being ignored."""
+        with self.assertRaises(TypeError):
+            self.query.bind(descrpt="x")
+
+
+if __name__ == "__main__":
+    unittest.main()
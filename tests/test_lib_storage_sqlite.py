@@ -0,0 +1,244 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from datetime import date, datetime, timedelta, timezone
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import pombot.lib.pom_wars.errors as war_crimes
+from pombot.config import Config
+from pombot.lib import errors
+from pombot.lib.pom_wars.team import Team
+from pombot.lib.storage.sqlite import SQLiteBackend
+from pombot.lib.types import (ActionStreak, ActionType, DailyActions,
+                              DateRange, SessionType)
+from tests.helpers import mock_discord
+
+NOW = datetime(2021, 8, 2, 12)
+
+
+class TestSQLiteBackend(IsolatedAsyncioTestCase):
+    """Test the embedded SQLite storage backend against a database file."""
+    directory = None
+    database = None
+    patcher = None
+    backend = None
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.directory.name, "pombot.sqlite3")
+        self.patcher = patch.object(Config, "TEST_SQLITE_DATABASE", self.database)
+        self.patcher.start()
+
+        self.backend = SQLiteBackend()
+        await self.backend.create_tables_if_not_exists()
+
+    async def asyncTearDown(self):
+        await self.backend.close()
+        self.patcher.stop()
+        self.directory.cleanup()
+
+    async def test_database_uses_wal_mode(self):
+        """Test the database file is opened in write-ahead logging mode, so
+        that other processes can read it while the bot writes.
+        """
+        with closing(sqlite3.connect(self.database)) as reader:
+            journal_mode, = reader.execute("PRAGMA journal_mode;").fetchone()
+
+        self.assertEqual("wal", journal_mode)
+
+    async def test_database_from_before_event_progress_is_migrated(self):
+        """Test an events table created before it tracked its pom count is
+        migrated once, and its counts and goals are backfilled.
+        """
+        database = os.path.join(self.directory.name, "old.sqlite3")
+
+        with closing(sqlite3.connect(database)) as old:
+            old.executescript(f"""
+                CREATE TABLE {Config.POMS_TABLE} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    userID BIGINT,
+                    descript VARCHAR(30),
+                    time_set TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    current_session TINYINT
+                );
+                CREATE TABLE {Config.EVENTS_TABLE} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event_name VARCHAR(100) NOT NULL,
+                    pom_goal INT,
+                    start_date TIMESTAMP NOT NULL,
+                    end_date TIMESTAMP NOT NULL
+                );
+                INSERT INTO {Config.POMS_TABLE} (userID, time_set, current_session)
+                VALUES (1, '{NOW}', 1), (1, '{NOW}', 1);
+                INSERT INTO {Config.EVENTS_TABLE} (event_name, pom_goal, start_date, end_date)
+                VALUES ('reached', 2, '{NOW - timedelta(days=1)}', '{NOW + timedelta(days=1)}'),
+                       ('ongoing', 3, '{NOW - timedelta(days=1)}', '{NOW + timedelta(days=1)}');
+            """)
+
+        for _ in range(2):
+            backend = SQLiteBackend()
+
+            with patch.object(Config, "TEST_SQLITE_DATABASE", database):
+                events = await backend.get_all_events()
+                await backend.close()
+
+            self.assertEqual([("reached", 2, True), ("ongoing", 2, False)],
+                             [(event.event_name, event.pom_count, event.goal_reached)
+                              for event in events])
+
+        with closing(sqlite3.connect(database)) as migrated:
+            versions = migrated.execute(
+                f"SELECT version FROM {Config.SCHEMA_VERSION_TABLE};").fetchall()
+
+        self.assertEqual([(1, )], versions)
+
+    async def test_actions_update_rollups_atomically(self):
+        """Test adding actions upserts the team stats, daily actions and
+        streak rows alongside the action.
+        """
+        user = mock_discord.MockUser()
+        await self.backend.add_user(user.id, timezone(timedelta()), Team.KNIGHTS.value)
+
+        for minutes, was_successful in ((0, True), (1, False), (2, False)):
+            await self.backend.add_pom_war_action(
+                user, Team.KNIGHTS.value, ActionType.NORMAL_ATTACK, was_successful,
+                False, "", 1.5, NOW + timedelta(minutes=minutes))
+
+        await self.backend.add_pom_war_action(
+            user, Team.KNIGHTS.value, ActionType.BRIBE, False, None, "", 0, NOW)
+
+        team_stats = (await self.backend.get_team_stats())[Team.KNIGHTS.value]
+        self.assertEqual((450, 3, 1, 1), (team_stats.raw_damage, team_stats.normal_attacks,
+                                          team_stats.bribes, team_stats.population))
+
+        user_row, actions, daily_actions, streak = await self.backend.get_action_context_rows(
+            user,
+            actions_range=DateRange(NOW, NOW + timedelta(hours=1)),
+            daily_actions_since=date(2021, 8, 1),
+            include_streak=True,
+        )
+
+        self.assertEqual(user.id, user_row.user_id)
+        self.assertEqual(4, len(actions))
+        self.assertEqual({NOW.date(): DailyActions(NOW.date(), 3, 1)}, daily_actions)
+        self.assertEqual(ActionStreak(NOW.date(), 3), streak)
+
+    async def test_grouped_writes_resolve_once_committed(self):
+        """Test concurrent poms and actions are held until their group is
+        committed, with the same rollups as when committed one at a time.
+        """
+        user = mock_discord.MockUser()
+        await self.backend.add_user(user.id, timezone(timedelta()), Team.KNIGHTS.value)
+
+        with patch.object(Config, "WRITE_BATCH_DELAY_MS", 60_000):
+            writes = [asyncio.ensure_future(write) for write in (
+                *[self.backend.add_poms_to_user_session(user, None, count, NOW)
+                  for count in (1, 2, 3)],
+                *[self.backend.add_pom_war_action(
+                    user, Team.KNIGHTS.value, ActionType.NORMAL_ATTACK, was_successful,
+                    False, "", 1.5, NOW + timedelta(minutes=minutes))
+                  for minutes, was_successful in ((0, True), (1, False), (2, False))],
+            )]
+            await asyncio.sleep(0.01)
+
+            self.assertFalse(any(write.done() for write in writes))
+            self.assertEqual({}, await self.backend.get_daily_pom_counts())
+            self.assertEqual([], await self.backend.get_actions())
+
+            await self.backend.flush_writes()
+
+        self.assertTrue(all(write.done() for write in writes))
+        self.assertEqual([1, 2, 3], [write.result() for write in writes[:3]])
+        self.assertEqual({NOW.date(): 6}, await self.backend.get_daily_pom_counts())
+
+        team_stats = (await self.backend.get_team_stats())[Team.KNIGHTS.value]
+        self.assertEqual((450, 3), (team_stats.raw_damage, team_stats.normal_attacks))
+
+        _, _, daily_actions, streak = await self.backend.get_action_context_rows(
+            user,
+            actions_range=DateRange(NOW, NOW + timedelta(hours=1)),
+            daily_actions_since=date(2021, 8, 1),
+            include_streak=True,
+        )
+
+        self.assertEqual({NOW.date(): DailyActions(NOW.date(), 3, 1)}, daily_actions)
+        self.assertEqual(ActionStreak(NOW.date(), 2), streak)
+
+    async def test_duplicate_user_is_refused(self):
+        """Test adding a user twice raises rather than replacing them."""
+        await self.backend.add_user(1, timezone(timedelta()), Team.VIKINGS.value)
+
+        with self.assertRaises(war_crimes.UserAlreadyExistsError):
+            await self.backend.add_user(1, timezone(timedelta()), Team.KNIGHTS.value)
+
+        self.assertEqual(Team.VIKINGS.value, (await self.backend.get_user_by_id(1)).team)
+        self.assertEqual(1, (await self.backend.get_team_stats())[Team.VIKINGS.value].population)
+
+    async def test_users_are_looked_up_in_bounded_in_lists(self):
+        """Test repeated and missing user IDs across several IN lists."""
+        for user_id in range(1, 6):
+            await self.backend.add_user(user_id, timezone(timedelta()), Team.VIKINGS.value)
+
+        with patch.object(SQLiteBackend, "_MAX_IN_LIST_SIZE", 2):
+            users = await self.backend.get_users_by_id([5, 1, 1, 9, 3, 5, 2])
+
+        self.assertEqual([1, 2, 3, 5], sorted(users))
+        self.assertEqual({user_id: user_id for user_id in (1, 2, 3, 5)},
+                         {user_id: user.user_id for user_id, user in users.items()})
+
+    async def test_delete_poms_by_time_set_and_session(self):
+        """Test both criteria are applied when deleting poms."""
+        user = mock_discord.MockUser()
+        await self.backend.add_poms_to_user_session(user, None, 2, NOW)
+        await self.backend.bank_user_session_poms(user)
+        await self.backend.add_poms_to_user_session(user, None, 1, NOW)
+        await self.backend.add_poms_to_user_session(user, None, 1, NOW + timedelta(hours=1))
+
+        self.assertEqual({NOW: 1}, await self.backend.delete_poms(
+            user=user, time_set=NOW, session=SessionType.CURRENT))
+        self.assertEqual(3, len(await self.backend.get_poms(user=user)))
+
+    async def test_get_unsuccessful_actions(self):
+        """Test asking for unsuccessful actions returns only those."""
+        user = mock_discord.MockUser()
+        await self.backend.add_user(user.id, timezone(timedelta()), Team.KNIGHTS.value)
+
+        for was_successful in (True, False, False):
+            await self.backend.add_pom_war_action(
+                user, Team.KNIGHTS.value, ActionType.NORMAL_ATTACK, was_successful,
+                False, "", 1, NOW)
+
+        self.assertEqual(2, len(await self.backend.get_actions(was_successful=False)))
+        self.assertEqual(1, len(await self.backend.get_actions(was_successful=True)))
+
+    async def test_column_sizes_are_enforced_like_mysql(self):
+        """Test values SQLite would store despite their column sizes are
+        refused, as MySQL refuses them.
+        """
+        user = mock_discord.MockUser()
+        await self.backend.add_poms_to_user_session(user, "x" * 30, 1, NOW)
+
+        with self.assertRaises(errors.DescriptionTooLongError):
+            await self.backend.add_poms_to_user_session(user, "x" * 31, 1, NOW)
+
+        with self.assertRaises(errors.DescriptionTooLongError):
+            await self.backend.update_user_poms_descriptions(user, "x" * 30, "x" * 31)
+
+        date_range = DateRange(NOW, NOW + timedelta(days=1))
+
+        with self.assertRaises(errors.EventCreationError):
+            await self.backend.add_new_event("x" * 101, 10, date_range)
+
+        with self.assertRaises(errors.EventCreationError):
+            await self.backend.add_new_event("event", 2 ** 31, date_range)
+
+        self.assertEqual(["x" * 30], [pom.descript for pom in await self.backend.get_poms()])
+        self.assertEqual([], await self.backend.get_all_events())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from parameterized import parameterized
+
+from pombot.config import Config
+from pombot.lib.pom_wars.team import Team
+from pombot.lib.storage import Storage
+from pombot.lib.types import ActionType
+from tests.helpers import mock_discord
+
+NOW = datetime(2021, 8, 2, 12)
+
+
+class TestTeamStats(IsolatedAsyncioTestCase):
+    """Test the running team totals match the rows they summarize."""
+    async def asyncSetUp(self):
+        await Storage.create_tables_if_not_exists()
+        await Storage.delete_all_rows_from_all_tables()
+
+    async def asyncTearDown(self):
+        await Storage.delete_all_rows_from_all_tables()
+        await Storage.close_connection_pool()
+
+    async def assert_team_stats_match_rows(self):
+        """Assert every team's totals equal an aggregate of its rows."""
+        team_stats = await Storage.get_team_stats()
+
+        for team in Team:
+            stats = team_stats.get(team.value)
+            actions = await Storage.get_actions(team=team.value)
+
+            self.assertEqual(sum(action.raw_damage or 0 for action in actions),
+                             stats.raw_damage if stats else 0)
+
+            for action_type in ActionType:
+                self.assertEqual(
+                    await Storage.count_rows_in_table(Config.ACTIONS_TABLE,
+                                                      action_type=action_type,
+                                                      team=team.value),
+                    stats.action_counts[action_type] if stats else 0)
+
+            self.assertEqual(
+                await Storage.count_rows_in_table(Config.USERS_TABLE, team=team.value),
+                stats.population if stats else 0)
+
+    @parameterized.expand([
+        ("whole", 10, 1000),
+        ("hundredths", 2.57, 257),
+        ("half_hundredth", 0.125, 13),
+        ("float_error", 1.15, 115),
+        ("none", None, 0),
+    ])
+    async def test_damage_is_totalled_in_hundredths(self, _, damage, expected_raw_damage):
+        """Test fractional damage is totalled as it is stored in each row."""
+        user = mock_discord.MockUser()
+        await Storage.add_user(user.id, timezone(timedelta()), Team.KNIGHTS.value)
+
+        for _ in range(3):
+            await Storage.add_pom_war_action(user, Team.KNIGHTS.value,
+                                             ActionType.NORMAL_ATTACK, True, False,
+                                             "", damage, NOW)
+
+        stats = (await Storage.get_team_stats())[Team.KNIGHTS.value]
+        self.assertEqual(3 * expected_raw_damage, stats.raw_damage)
+        await self.assert_team_stats_match_rows()
+
+    async def test_team_stats_follow_added_and_deleted_rows(self):
+        """Test the totals stay in step as users and actions come and go."""
+        knight, viking = mock_discord.MockUser(), mock_discord.MockUser()
+        await Storage.add_user(knight.id, timezone(timedelta()), Team.KNIGHTS.value)
+        await Storage.add_user(viking.id, timezone(timedelta()), Team.VIKINGS.value)
+
+        for minutes, (user, team, action_type, damage) in enumerate((
+            (knight, Team.KNIGHTS, ActionType.NORMAL_ATTACK, 1.5),
+            (knight, Team.KNIGHTS, ActionType.HEAVY_ATTACK, 7.33),
+            (viking, Team.VIKINGS, ActionType.DEFEND, None),
+            (viking, Team.VIKINGS, ActionType.BRIBE, 0),
+            (viking, Team.VIKINGS, ActionType.NORMAL_ATTACK, 0.005),
+        )):
+            await Storage.add_pom_war_action(user, team.value, action_type, True, False,
+                                             "", damage, NOW + timedelta(minutes=minutes))
+
+        await self.assert_team_stats_match_rows()
+
+        await Storage.update_user_team(viking.id, Team.KNIGHTS.value)
+        await self.assert_team_stats_match_rows()
+
+        await Storage.delete_all_rows_from_all_tables()
+        self.assertEqual({}, await Storage.get_team_stats())
+        await self.assert_team_stats_match_rows()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from pombot.config import Config
+from pombot.lib.storage.caches import _UserDailyActionsCache, _UserStreaksCache
+from pombot.lib.types import ActionStreak, DailyActions
+
+MONDAY, TUESDAY, WEDNESDAY = date(2021, 8, 2), date(2021, 8, 3), date(2021, 8, 4)
+
+
+class TestUserDailyActionsCache(unittest.TestCase):
+    """Test the in-memory cache of per-user daily action counts."""
+    def setUp(self):
+        self.cache = _UserDailyActionsCache()
+
+    def test_miss_until_put(self):
+        """Test an unknown user is a miss, and a cached one a hit."""
+        self.assertIsNone(self.cache.get(1, MONDAY))
+
+        self.cache.put(1, MONDAY, {MONDAY: DailyActions(MONDAY, 2, 1)},
+                       self.cache.generation(1))
+
+        self.assertEqual({MONDAY: DailyActions(MONDAY, 2, 1)}, self.cache.get(1, MONDAY))
+        self.assertEqual({}, self.cache.get(1, TUESDAY))
+        self.assertIsNone(self.cache.get(1, date(2021, 8, 1)))
+
+    def test_add_counts_incrementally(self):
+        """Test committed actions update a cached user's counts."""
+        self.cache.put(1, MONDAY, {MONDAY: DailyActions(MONDAY, 2, 1)},
+                       self.cache.generation(1))
+
+        self.cache.add(1, MONDAY, was_successful=False)
+        self.cache.add(1, TUESDAY, was_successful=True)
+        self.cache.add(2, TUESDAY, was_successful=True)
+
+        self.assertEqual({
+            MONDAY: DailyActions(MONDAY, 3, 1),
+            TUESDAY: DailyActions(TUESDAY, 1, 1),
+        }, self.cache.get(1, MONDAY))
+        self.assertIsNone(self.cache.get(2, MONDAY))
+
+    def test_put_racing_a_write_is_discarded(self):
+        """Test counts read before an action was committed are not cached."""
+        generation = self.cache.generation(1)
+        self.cache.add(1, MONDAY, was_successful=True)
+
+        self.cache.put(1, MONDAY, {}, generation)
+
+        self.assertIsNone(self.cache.get(1, MONDAY))
+
+    def test_put_racing_another_users_write_is_cached(self):
+        """Test actions by other users do not keep a user's counts from being
+        cached.
+        """
+        generation = self.cache.generation(1)
+        self.cache.add(2, MONDAY, was_successful=True)
+
+        self.cache.put(1, MONDAY, {MONDAY: DailyActions(MONDAY, 2, 1)}, generation)
+
+        self.assertEqual({MONDAY: DailyActions(MONDAY, 2, 1)}, self.cache.get(1, MONDAY))
+
+    def test_put_racing_a_clear_is_discarded(self):
+        """Test counts read before the cache was cleared are not cached."""
+        generation = self.cache.generation(1)
+        self.cache.clear()
+
+        self.cache.put(1, MONDAY, {}, generation)
+
+        self.assertIsNone(self.cache.get(1, MONDAY))
+
+    def test_least_recently_used_user_is_evicted(self):
+        """Test the cache holds at most USER_CACHE_SIZE users."""
+        with patch.object(Config, "USER_CACHE_SIZE", 2):
+            self.cache.put(1, MONDAY, {}, self.cache.generation(1))
+            self.cache.put(2, MONDAY, {}, self.cache.generation(2))
+            self.cache.get(1, MONDAY)
+            self.cache.put(3, MONDAY, {}, self.cache.generation(3))
+
+        self.assertIsNotNone(self.cache.get(1, MONDAY))
+        self.assertIsNone(self.cache.get(2, MONDAY))
+        self.assertIsNotNone(self.cache.get(3, MONDAY))
+
+    def test_old_days_are_dropped(self):
+        """Test days before the requested start are forgotten."""
+        self.cache.put(1, MONDAY, {
+            MONDAY: DailyActions(MONDAY, 1, 1),
+            WEDNESDAY: DailyActions(WEDNESDAY, 1, 1),
+        }, self.cache.generation(1))
+
+        self.assertEqual({WEDNESDAY: DailyActions(WEDNESDAY, 1, 1)},
+                         self.cache.get(1, TUESDAY))
+        self.assertIsNone(self.cache.get(1, MONDAY))
+
+
+class TestUserStreaksCache(unittest.TestCase):
+    """Test the in-memory cache of per-user streaks of unsuccessful actions."""
+    def setUp(self):
+        self.cache = _UserStreaksCache()
+
+    def test_add_extends_and_resets_streaks(self):
+        """Test misses extend a streak, while successes and new days end it."""
+        self.cache.put(1, ActionStreak(MONDAY, 2), self.cache.generation(1))
+
+        for action_date, was_successful, expected_streak in (
+            (MONDAY,    False, ActionStreak(MONDAY, 3)),
+            (MONDAY,    True,  ActionStreak(MONDAY, 0)),
+            (MONDAY,    False, ActionStreak(MONDAY, 1)),
+            (TUESDAY,   False, ActionStreak(TUESDAY, 1)),
+            (WEDNESDAY, True,  ActionStreak(WEDNESDAY, 0)),
+        ):
+            self.cache.add(1, action_date, was_successful)
+            self.assertEqual(expected_streak, self.cache.get(1))
+
+    def test_unknown_user_is_not_guessed(self):
+        """Test actions by an uncached user are not cached, as their streak
+        before the action is unknown.
+        """
+        self.cache.add(1, MONDAY, was_successful=False)
+
+        self.assertIsNone(self.cache.get(1))
+
+    def test_put_racing_a_write_is_discarded(self):
+        """Test a streak read before the user's action was committed is not
+        cached.
+        """
+        generation = self.cache.generation(1)
+        self.cache.add(1, MONDAY, was_successful=False)
+
+        self.cache.put(1, ActionStreak(MONDAY, 2), generation)
+
+        self.assertIsNone(self.cache.get(1))
+
+    def test_put_racing_another_users_write_is_cached(self):
+        """Test an action by user 2 does not discard user 1's streak."""
+        generation = self.cache.generation(1)
+        self.cache.add(2, MONDAY, was_successful=False)
+
+        self.cache.put(1, ActionStreak(MONDAY, 2), generation)
+
+        self.assertEqual(ActionStreak(MONDAY, 2), self.cache.get(1))
+
+    def test_streaks_end_with_the_day(self):
+        """Test yesterday's misses do not count today."""
+        streak = ActionStreak(MONDAY, 4)
+
+        self.assertEqual(4, streak.misses_on(MONDAY))
+        self.assertEqual(0, streak.misses_on(TUESDAY))
+
+
+if __name__ == "__main__":
+    unittest.main()